@@ -1,13 +1,46 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from typing import Generator
+from sqlalchemy.orm import Session, make_transient_to_detached
+from typing import Generator, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import decode_token
 from app.models.user import User
 
 security = HTTPBearer()
 
+# Column values of recently authenticated users, per worker. Writes to a user
+# call invalidate_user(); other workers see them within USER_CACHE_TTL_SECONDS.
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user from the authentication cache (call after commit)"""
+    user_cache.delete(user_id)
+
+
+def load_user(db: Session, user_id: int) -> Optional[User]:
+    """
+    User for an authenticated request, from the cache when possible.
+
+    A cached user is merged into the request session without a query, so the
+    endpoint gets a normal persistent instance (attribute changes are flushed
+    on commit, relationships lazy-load).
+    """
+    columns = user_cache.get(user_id)
+    if columns is not None:
+        user = User(**columns)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        user_cache.set(user_id, {
+            column.key: getattr(user, column.key) for column in User.__table__.columns
+        })
+    return user
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -31,7 +64,7 @@ def get_current_user(
             detail="Invalid token payload",
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = load_user(db, int(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
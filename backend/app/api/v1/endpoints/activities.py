@@ -13,6 +13,7 @@ from app.schemas.activity import (
     ActivityCreate, ActivityUpdate, ActivityResponse, ActivityListResponse
 )
 from app.core.permissions import check_permission
+from app.core.pagination import CountMode, paginate
 
 router = APIRouter()
 
@@ -57,6 +58,8 @@ def create_activity(
 def list_activities(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
     lead_id: Optional[int] = None,
     customer_id: Optional[int] = None,
     activity_type: Optional[ActivityType] = None,
@@ -65,7 +68,13 @@ def list_activities(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List activities with filtering and pagination"""
+    """
+    List activities with filtering and pagination
+
+    Pass the previous response's `next_cursor` as `cursor` for keyset
+    pagination (page is then ignored); `count=estimated|none` makes the
+    total approximate or skips it.
+    """
     if not check_permission(current_user.role, "activities", "read"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
@@ -87,22 +96,7 @@ def list_activities(
     if performed_by:
         query = query.filter(Activity.performed_by == performed_by)
 
-    # Get total count
-    total = query.count()
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    activities = query.order_by(Activity.created_at.desc()).offset(offset).limit(page_size).all()
-
-    total_pages = (total + page_size - 1) // page_size
-
-    return ActivityListResponse(
-        items=activities,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    return ActivityListResponse(**paginate(query, Activity, page, page_size, cursor, count))
 
 
 @router.get("/lead/{lead_id}", response_model=list[ActivityResponse])
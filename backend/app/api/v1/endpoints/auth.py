@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
-from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.database import get_db, get_async_db
+from app.core.security import create_access_token
 from app.core.config import settings
+from app.core.password_hashing import password_hasher, needs_rehash
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, Token, UserResponse
 
@@ -12,10 +15,10 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if email exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = (await db.execute(select(User).where(User.email == user_data.email))).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,23 +28,23 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create new user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         full_name=user_data.full_name,
         phone=user_data.phone,
         role=user_data.role
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login and get access token"""
     # Find user
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = (await db.execute(select(User).where(User.email == credentials.email))).scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,7 +52,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
     # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    if not await password_hasher.verify(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -62,6 +65,11 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is disabled"
         )
 
+    # Upgrade hashes made with a different cost factor (PASSWORD_HASH_ROUNDS)
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await password_hasher.hash(credentials.password)
+        await db.commit()
+
     # Create access token
     access_token = create_access_token(
         data={"sub": str(user.id), "email": user.email, "role": user.role.value},
@@ -11,6 +11,7 @@ from app.schemas.contact import (
     ContactCreate, ContactUpdate, ContactResponse, ContactListResponse
 )
 from app.core.permissions import check_permission
+from app.core.export import ExportFormat, stream_export
 
 router = APIRouter()
 
@@ -54,24 +55,14 @@ def create_contact(
     return contact
 
 
-@router.get("/", response_model=ContactListResponse)
-def list_contacts(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+def filter_contacts(
+    query,
     search: Optional[str] = None,
     lead_id: Optional[int] = None,
     customer_id: Optional[int] = None,
-    contact_type: Optional[ContactType] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    contact_type: Optional[ContactType] = None
 ):
-    """List contacts with filtering and pagination"""
-    if not check_permission(current_user.role, "contacts", "read"):
-        raise HTTPException(status_code=403, detail="Permission denied")
-
-    query = db.query(Contact)
-
-    # Apply filters
+    """Apply the list_contacts and export filters"""
     if search:
         search_term = f"%{search}%"
         query = query.filter(
@@ -92,6 +83,26 @@ def list_contacts(
     if contact_type:
         query = query.filter(Contact.contact_type == contact_type)
 
+    return query
+
+
+@router.get("/", response_model=ContactListResponse)
+def list_contacts(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    search: Optional[str] = None,
+    lead_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    contact_type: Optional[ContactType] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List contacts with filtering and pagination"""
+    if not check_permission(current_user.role, "contacts", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    query = filter_contacts(db.query(Contact), search, lead_id, customer_id, contact_type)
+
     # Get total count
     total = query.count()
 
@@ -110,6 +121,28 @@ def list_contacts(
     )
 
 
+@router.get("/export")
+def export_contacts(
+    format: ExportFormat = ExportFormat.CSV,
+    search: Optional[str] = None,
+    lead_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    contact_type: Optional[ContactType] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export all contacts matching the list filters as CSV or NDJSON
+
+    The file is streamed, so there is no page size limit.
+    """
+    if not check_permission(current_user.role, "contacts", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    query = filter_contacts(db.query(Contact), search, lead_id, customer_id, contact_type)
+    return stream_export(query, Contact, format, "contacts")
+
+
 @router.get("/lead/{lead_id}", response_model=list[ContactResponse])
 def get_lead_contacts(
     lead_id: int,
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import distinct, func
 
 from app.api.deps import get_db, get_current_user
+from app.core.http_cache import cache_response, invalidate
 from app.models.cri_email_template import CRIEmailTemplate
 from app.schemas.cri_email_template import (
     CRIEmailTemplateCreate,
@@ -13,8 +14,12 @@ from app.schemas.cri_email_template import (
 
 router = APIRouter()
 
+# app.core.http_cache namespace of the GET responses below
+TEMPLATE_CACHE = "cri_email_templates"
+
 
 @router.get("/distinct-formats", response_model=List[str])
+@cache_response(TEMPLATE_CACHE)
 def get_distinct_email_format_values(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
@@ -28,6 +33,7 @@ def get_distinct_email_format_values(
 
 
 @router.get("/by-format/{format_value}", response_model=List[CRIEmailTemplateResponse])
+@cache_response(TEMPLATE_CACHE)
 def get_templates_by_format(
     format_value: str,
     db: Session = Depends(get_db),
@@ -41,6 +47,7 @@ def get_templates_by_format(
 
 
 @router.get("/", response_model=List[CRIEmailTemplateResponse])
+@cache_response(TEMPLATE_CACHE)
 def get_cri_email_templates(
     tab: Optional[str] = Query(None, description="Filter by tab name"),
     company_id: Optional[int] = Query(None, description="Filter by company ID"),
@@ -60,6 +67,7 @@ def get_cri_email_templates(
 
 
 @router.get("/{template_id}", response_model=CRIEmailTemplateResponse)
+@cache_response(TEMPLATE_CACHE)
 def get_cri_email_template(
     template_id: int,
     db: Session = Depends(get_db),
@@ -82,6 +90,7 @@ def create_cri_email_template(
     template = CRIEmailTemplate(**template_data.model_dump())
     db.add(template)
     db.commit()
+    invalidate(TEMPLATE_CACHE)
     db.refresh(template)
     return template
 
@@ -103,6 +112,7 @@ def update_cri_email_template(
         setattr(template, field, value)
 
     db.commit()
+    invalidate(TEMPLATE_CACHE)
     db.refresh(template)
     return template
 
@@ -120,4 +130,5 @@ def delete_cri_email_template(
 
     db.delete(template)
     db.commit()
+    invalidate(TEMPLATE_CACHE)
     return {"message": "CRI email template deleted successfully"}
@@ -1,11 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-import os
-import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.lead import Lead
@@ -33,11 +32,14 @@ from app.schemas.customer_requirement import (
 )
 import json
 from app.core.permissions import check_permission
+from app.services.cr_pdf import (
+    PdfPackFormat, invalidate_cr_pdfs, load_cr_for_pack, load_tab_section, pdf_pack_response, pdf_response
+)
+from app.services.document_download import document_response
+from app.services.file_storage import store_upload, release_file
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads/customer_requirements"
-
 
 # ============== Main Customer Requirement ==============
 
@@ -146,6 +148,7 @@ def update_customer_requirement(
 
     cr.updated_by = current_user.id
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(cr)
 
     return cr
@@ -193,6 +196,7 @@ def update_introduction(
         setattr(intro, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(intro)
 
     return intro
@@ -240,6 +244,7 @@ def update_requirement(
         setattr(req, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(req)
 
     return req
@@ -270,6 +275,7 @@ def create_presentation(
     pres = CRPresentation(customer_requirement_id=cr_id, **data.model_dump(), created_by=current_user.id)
     db.add(pres)
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(pres)
     return pres
 
@@ -294,6 +300,7 @@ def update_presentation(
         setattr(pres, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(pres)
     return pres
 
@@ -323,6 +330,7 @@ def create_demo(
     demo = CRDemo(customer_requirement_id=cr_id, **data.model_dump(), created_by=current_user.id)
     db.add(demo)
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(demo)
     return demo
 
@@ -347,6 +355,7 @@ def update_demo(
         setattr(demo, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(demo)
     return demo
 
@@ -376,6 +385,7 @@ def create_proposal(
     proposal = CRProposal(customer_requirement_id=cr_id, **data.model_dump(), created_by=current_user.id)
     db.add(proposal)
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(proposal)
     return proposal
 
@@ -400,6 +410,7 @@ def update_proposal(
         setattr(proposal, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(proposal)
     return proposal
 
@@ -429,6 +440,7 @@ def create_agreement(
     agreement = CRAgreement(customer_requirement_id=cr_id, **data.model_dump(), created_by=current_user.id)
     db.add(agreement)
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(agreement)
     return agreement
 
@@ -453,6 +465,7 @@ def update_agreement(
         setattr(agreement, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(agreement)
     return agreement
 
@@ -533,23 +546,12 @@ async def upload_document(
     sub_tab_name: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload a document"""
-    # Create upload directory if not exists
-    upload_path = f"{UPLOAD_DIR}/{cr_id}/{tab_name}"
-    os.makedirs(upload_path, exist_ok=True)
-
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = f"{upload_path}/{unique_filename}"
-
-    # Save file
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Stream into content-addressed storage
+    stored = await store_upload(db, file)
 
     # Create document record
     doc = CRDocument(
@@ -557,19 +559,44 @@ async def upload_document(
         tab_name=tab_name,
         sub_tab_name=sub_tab_name,
         file_name=file.filename,
-        file_path=file_path,
-        file_size=len(content),
+        file_path=stored.path,
+        file_size=stored.size,
         file_type=file.content_type,
         description=description,
         uploaded_by=current_user.id
     )
     db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    await db.commit()
+    await db.refresh(doc)
 
     return doc
 
 
+@router.get("/{cr_id}/documents/{doc_id}/download")
+def download_document(
+    cr_id: int,
+    doc_id: int,
+    request: Request,
+    inline: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download a document (resumable with Range; ?inline=true to open in the browser)"""
+    if not check_permission(current_user.role, "leads", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    doc = db.query(CRDocument).filter(
+        CRDocument.id == doc_id,
+        CRDocument.customer_requirement_id == cr_id
+    ).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return document_response(
+        request, doc.file_path, doc.file_name, doc.file_type, doc.uploaded_at, inline
+    )
+
+
 @router.delete("/{cr_id}/documents/{doc_id}")
 def delete_document(
     cr_id: int,
@@ -585,9 +612,8 @@ def delete_document(
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Delete file from disk
-    if os.path.exists(doc.file_path):
-        os.remove(doc.file_path)
+    # Delete the file once no other document uses it
+    release_file(db, doc.file_path)
 
     db.delete(doc)
     db.commit()
@@ -889,6 +915,7 @@ def update_diligence_short_form(
         setattr(form, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(form)
 
     return form
@@ -912,12 +939,14 @@ def create_diligence_short_form(
         for field, value in data.model_dump(exclude_unset=True).items():
             setattr(existing, field, value)
         db.commit()
+        invalidate_cr_pdfs(cr_id)
         db.refresh(existing)
         return existing
 
     form = CRDiligenceShortForm(customer_requirement_id=cr_id, **data.model_dump(), created_by=current_user.id)
     db.add(form)
     db.commit()
+    invalidate_cr_pdfs(cr_id)
     db.refresh(form)
 
     return form
@@ -1002,20 +1031,12 @@ def get_meeting_calendar(
 
 
 # ============== PDF Generation ==============
-from fastapi.responses import FileResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.units import inch
-from io import BytesIO
-import tempfile
-
 
 @router.get("/{cr_id}/generate-pdf/{tab_name}")
 def generate_pdf(
     cr_id: int,
     tab_name: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -1028,107 +1049,29 @@ def generate_pdf(
     if not cr:
         raise HTTPException(status_code=404, detail="Customer requirement not found")
 
-    # Get lead info
-    lead = db.query(Lead).filter(Lead.id == cr.lead_id).first()
-
-    # Create PDF
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-    doc = SimpleDocTemplate(temp_file.name, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18, spaceAfter=30, alignment=1)
-    heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'], fontSize=14, spaceAfter=12)
-    normal_style = styles['Normal']
-
-    story = []
-
-    # Header
-    company_name = cr.company_name or (lead.company_name if lead else "N/A")
-    story.append(Paragraph(f"Customer Requirement - {tab_name.title()}", title_style))
-    story.append(Paragraph(f"Company: {company_name}", normal_style))
-    story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", normal_style))
-    story.append(Spacer(1, 20))
-
-    # Tab-specific content
-    if tab_name == "agreement":
-        agreement = db.query(CRAgreement).filter(CRAgreement.customer_requirement_id == cr_id).first()
-        if agreement:
-            story.append(Paragraph("Agreement Details", heading_style))
-            story.append(Paragraph(f"Agreement Type: {agreement.agreement_type or 'N/A'}", normal_style))
-            story.append(Paragraph(f"Status: {agreement.status or 'N/A'}", normal_style))
-            if agreement.content:
-                story.append(Spacer(1, 10))
-                story.append(Paragraph("Content:", heading_style))
-                # Strip HTML tags for PDF
-                import re
-                clean_content = re.sub('<[^<]+?>', '', agreement.content or '')
-                story.append(Paragraph(clean_content[:2000], normal_style))
-
-    elif tab_name == "proposal":
-        proposal = db.query(CRProposal).filter(CRProposal.customer_requirement_id == cr_id).first()
-        if proposal:
-            story.append(Paragraph("Proposal Details", heading_style))
-            story.append(Paragraph(f"Status: {proposal.status or 'N/A'}", normal_style))
-            story.append(Paragraph(f"Proposal Date: {proposal.proposal_date or 'N/A'}", normal_style))
-            if proposal.content:
-                story.append(Spacer(1, 10))
-                import re
-                clean_content = re.sub('<[^<]+?>', '', proposal.content or '')
-                story.append(Paragraph(clean_content[:2000], normal_style))
-
-    elif tab_name == "requirement":
-        requirement = db.query(CRRequirement).filter(CRRequirement.customer_requirement_id == cr_id).first()
-        if requirement:
-            story.append(Paragraph("Requirement Details", heading_style))
-            if requirement.requirements_json:
-                try:
-                    reqs = json.loads(requirement.requirements_json) if isinstance(requirement.requirements_json, str) else requirement.requirements_json
-                    if isinstance(reqs, list):
-                        for i, req in enumerate(reqs[:20], 1):
-                            if isinstance(req, dict):
-                                story.append(Paragraph(f"{i}. {req.get('title', req.get('name', 'N/A'))}", normal_style))
-                except:
-                    pass
-
-    elif tab_name == "introduction":
-        intro = db.query(CRIntroduction).filter(CRIntroduction.customer_requirement_id == cr_id).first()
-        if intro:
-            story.append(Paragraph("Introduction Details", heading_style))
-            story.append(Paragraph(f"Contact Person: {intro.contact_person or 'N/A'}", normal_style))
-            story.append(Paragraph(f"Email: {intro.email or 'N/A'}", normal_style))
-            story.append(Paragraph(f"Phone: {intro.phone or 'N/A'}", normal_style))
-            if intro.notes:
-                story.append(Spacer(1, 10))
-                story.append(Paragraph(f"Notes: {intro.notes}", normal_style))
-
-    elif tab_name == "demo":
-        demo = db.query(CRDemo).filter(CRDemo.customer_requirement_id == cr_id).first()
-        if demo:
-            story.append(Paragraph("Demo Details", heading_style))
-            story.append(Paragraph(f"Demo Date: {demo.demo_date or 'N/A'}", normal_style))
-            story.append(Paragraph(f"Status: {demo.status or 'N/A'}", normal_style))
-            if demo.notes:
-                story.append(Paragraph(f"Notes: {demo.notes}", normal_style))
-
-    elif tab_name == "presentation":
-        pres = db.query(CRPresentation).filter(CRPresentation.customer_requirement_id == cr_id).first()
-        if pres:
-            story.append(Paragraph("Presentation Details", heading_style))
-            story.append(Paragraph(f"Status: {pres.status or 'N/A'}", normal_style))
-            if pres.notes:
-                story.append(Paragraph(f"Notes: {pres.notes}", normal_style))
-
-    else:
-        story.append(Paragraph(f"PDF generation for '{tab_name}' tab", normal_style))
-
-    # Build PDF
-    doc.build(story)
-
-    # Return file
+    # Rendered once per content version (ETag: 304 for unchanged downloads)
+    section = load_tab_section(cr, tab_name)
     filename = f"CR_{cr_id}_{tab_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    return FileResponse(
-        temp_file.name,
-        media_type='application/pdf',
-        filename=filename,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return pdf_response(request, (cr_id, tab_name), [section], filename)
+
+
+@router.get("/{cr_id}/pdf-pack")
+def generate_pdf_pack(
+    cr_id: int,
+    request: Request,
+    format: PdfPackFormat = PdfPackFormat.PDF,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Review pack with every tab: one combined PDF, or format=zip for a ZIP
+    with a PDF per tab
+    """
+    if not check_permission(current_user.role, "leads", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    cr = load_cr_for_pack(db, cr_id)
+    if not cr:
+        raise HTTPException(status_code=404, detail="Customer requirement not found")
+
+    return pdf_pack_response(request, cr, format, f"CR_{cr_id}_pack_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
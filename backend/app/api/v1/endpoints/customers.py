@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from typing import Optional
 
 from app.core.database import get_db
@@ -11,6 +10,9 @@ from app.schemas.customer import (
     CustomerCreate, CustomerUpdate, CustomerResponse, CustomerListResponse
 )
 from app.core.permissions import check_permission
+from app.core.export import ExportFormat, stream_export
+from app.core.pagination import CountMode, paginate
+from app.services.search import apply_search, CUSTOMER_SEARCH_COLUMNS
 
 router = APIRouter()
 
@@ -42,10 +44,34 @@ def create_customer(
     return customer
 
 
+def filter_customers(
+    query,
+    search: Optional[str] = None,
+    status: Optional[CustomerStatus] = None,
+    customer_type: Optional[CustomerType] = None,
+    account_manager: Optional[int] = None
+):
+    """Apply the list_customers and export filters; returns the query and the search ranking"""
+    query, search_order = apply_search(query, search, CUSTOMER_SEARCH_COLUMNS)
+
+    if status:
+        query = query.filter(Customer.status == status)
+
+    if customer_type:
+        query = query.filter(Customer.customer_type == customer_type)
+
+    if account_manager:
+        query = query.filter(Customer.account_manager == account_manager)
+
+    return query, search_order
+
+
 @router.get("/", response_model=CustomerListResponse)
 def list_customers(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
     search: Optional[str] = None,
     status: Optional[CustomerStatus] = None,
     customer_type: Optional[CustomerType] = None,
@@ -53,51 +79,42 @@ def list_customers(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List customers with filtering and pagination"""
+    """
+    List customers with filtering and pagination
+
+    Pass the previous response's `next_cursor` as `cursor` for keyset
+    pagination (page is then ignored); `count=estimated|none` makes the
+    total approximate or skips it. Search results are ranked by relevance
+    and use page mode.
+    """
     if not check_permission(current_user.role, "customers", "read"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    query = db.query(Customer)
-
-    # Apply filters
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Customer.first_name.ilike(search_term),
-                Customer.last_name.ilike(search_term),
-                Customer.email.ilike(search_term),
-                Customer.phone.ilike(search_term),
-                Customer.company_name.ilike(search_term),
-                Customer.customer_code.ilike(search_term)
-            )
-        )
+    query, search_order = filter_customers(db.query(Customer), search, status, customer_type, account_manager)
 
-    if status:
-        query = query.filter(Customer.status == status)
-
-    if customer_type:
-        query = query.filter(Customer.customer_type == customer_type)
+    return CustomerListResponse(**paginate(query, Customer, page, page_size, cursor, count, search_order))
 
-    if account_manager:
-        query = query.filter(Customer.account_manager == account_manager)
 
-    # Get total count
-    total = query.count()
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    customers = query.order_by(Customer.created_at.desc()).offset(offset).limit(page_size).all()
+@router.get("/export")
+def export_customers(
+    format: ExportFormat = ExportFormat.CSV,
+    search: Optional[str] = None,
+    status: Optional[CustomerStatus] = None,
+    customer_type: Optional[CustomerType] = None,
+    account_manager: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export all customers matching the list filters as CSV or NDJSON
 
-    total_pages = (total + page_size - 1) // page_size
+    The file is streamed, so there is no page size limit.
+    """
+    if not check_permission(current_user.role, "customers", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
 
-    return CustomerListResponse(
-        items=customers,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    query, _ = filter_customers(db.query(Customer), search, status, customer_type, account_manager)
+    return stream_export(query, Customer, format, "customers")
 
 
 @router.get("/{customer_id}", response_model=CustomerResponse)
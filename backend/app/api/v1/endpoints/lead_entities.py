@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
 import os
-import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.lead import Lead
@@ -24,79 +24,54 @@ from app.schemas.lead_entities import (
     LeadQualifiedProfileCreate, LeadQualifiedProfileUpdate, LeadQualifiedProfileResponse,
     LeadFullResponse
 )
+from app.core.includes import included_collections, parse_include, with_includes
 from app.core.permissions import check_permission
+from app.services.document_download import document_response
+from app.services.file_storage import store_upload, release_file
+from app.services.name_lookup import get_person_names, get_user_names
+from app.services.search import apply_search, LEAD_CONTACT_SEARCH_COLUMNS, LEAD_COMPANY_SEARCH_COLUMNS
 
 router = APIRouter()
 
-# Upload directory for documents
-UPLOAD_DIR = "uploads/leads"
-
 
 # ============== Full Lead with all entities ==============
 
+# LeadFullResponse collection -> Lead relationship
+LEAD_FULL_INCLUDES = {
+    "contacts": "lead_contacts",
+    "activities": "lead_activities",
+    "memos": "lead_memos",
+    "documents": "lead_documents",
+    "status_history": "status_history",
+    "qualified_profiles": "qualified_profiles",
+}
+
+
 @router.get("/{lead_id}/full", response_model=LeadFullResponse)
 def get_lead_full(
     lead_id: int,
+    include: Optional[str] = Query(
+        None, description=f"Comma-separated collections to return (default all): {', '.join(LEAD_FULL_INCLUDES)}"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get lead with all related entities"""
+    """Get lead with all (or the `include`d) related entities"""
     if not check_permission(current_user.role, "leads", "read"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    includes = parse_include(include, LEAD_FULL_INCLUDES)
+    lead = with_includes(db.query(Lead), Lead, LEAD_FULL_INCLUDES, includes).filter(Lead.id == lead_id).first()
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
 
-    # Get related entities
-    contacts = db.query(LeadContact).filter(LeadContact.lead_id == lead_id).all()
-    activities = db.query(LeadActivity).filter(LeadActivity.lead_id == lead_id).order_by(LeadActivity.created_at.desc()).all()
-    memos = db.query(LeadMemo).filter(LeadMemo.lead_id == lead_id).order_by(LeadMemo.created_at.desc()).all()
-    documents = db.query(LeadDocument).filter(LeadDocument.lead_id == lead_id).all()
-    status_history = db.query(LeadStatusHistory).filter(LeadStatusHistory.lead_id == lead_id).order_by(LeadStatusHistory.created_at.desc()).all()
-    qualified_profiles = db.query(LeadQualifiedProfile).filter(LeadQualifiedProfile.lead_id == lead_id).all()
-
-    return LeadFullResponse(
-        id=lead.id,
-        first_name=lead.first_name,
-        last_name=lead.last_name,
-        email=lead.email,
-        phone=lead.phone,
-        company_name=lead.company_name,
-        website=lead.website,
+    fields = {name: getattr(lead, name) for name in LeadFullResponse.model_fields if name not in LEAD_FULL_INCLUDES}
+    fields.update(
         status=lead.status.value if hasattr(lead.status, 'value') else str(lead.status),
         source=lead.source.value if hasattr(lead.source, 'value') else str(lead.source),
         priority=lead.priority.value if hasattr(lead.priority, 'value') else str(lead.priority),
-        pipeline_stage=lead.pipeline_stage,
-        expected_value=lead.expected_value,
-        address_line1=lead.address_line1,
-        address_line2=lead.address_line2,
-        city_id=lead.city_id,
-        state_id=lead.state_id,
-        country_id=lead.country_id,
-        zip_code=lead.zip_code,
-        phone_no=lead.phone_no,
-        fax=lead.fax,
-        nof_representative=lead.nof_representative,
-        group_id=lead.group_id,
-        industry_id=lead.industry_id,
-        region_id=lead.region_id,
-        office_timings=lead.office_timings,
-        timezone=lead.timezone,
-        sales_rep=lead.sales_rep,
-        lead_source=lead.lead_source,
-        lead_score=lead.lead_score,
-        lead_since=lead.lead_since,
-        remarks=lead.remarks,
-        created_at=lead.created_at,
-        updated_at=lead.updated_at,
-        contacts=contacts,
-        activities=activities,
-        memos=memos,
-        documents=documents,
-        status_history=status_history,
-        qualified_profiles=qualified_profiles
     )
+    return LeadFullResponse(**fields, **included_collections(lead, LEAD_FULL_INCLUDES, includes))
 
 
 # ============== Contacts ==============
@@ -116,14 +91,9 @@ def list_all_lead_contacts(
 
     query = db.query(LeadContact, Lead).join(Lead, LeadContact.lead_id == Lead.id)
 
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (LeadContact.first_name.ilike(search_filter)) |
-            (LeadContact.last_name.ilike(search_filter)) |
-            (LeadContact.work_email.ilike(search_filter)) |
-            (Lead.company_name.ilike(search_filter))
-        )
+    query, search_order = apply_search(query, search, LEAD_CONTACT_SEARCH_COLUMNS, LEAD_COMPANY_SEARCH_COLUMNS)
+    if search_order:
+        query = query.order_by(*search_order, LeadContact.id)
 
     if contact_type and contact_type != 'all':
         query = query.filter(LeadContact.contact_type == contact_type)
@@ -309,22 +279,12 @@ def list_all_lead_activities(
 
     results = query.order_by(LeadActivity.created_at.desc()).offset(skip).limit(limit).all()
 
+    # Resolve contact and user names for the whole page at once
+    contact_names = get_person_names(db, LeadContact, (activity.contact_id for activity, _ in results))
+    user_names = get_user_names(db, (activity.created_by for activity, _ in results))
+
     activities_with_lead = []
     for activity, lead in results:
-        # Get contact name if contact_id exists
-        contact_name = None
-        if activity.contact_id:
-            contact = db.query(LeadContact).filter(LeadContact.id == activity.contact_id).first()
-            if contact:
-                contact_name = f"{contact.first_name or ''} {contact.last_name or ''}".strip()
-
-        # Get assigned user name
-        assigned_to_name = None
-        if activity.created_by:
-            user = db.query(User).filter(User.id == activity.created_by).first()
-            if user:
-                assigned_to_name = user.full_name or user.email
-
         activity_dict = {
             "id": activity.id,
             "lead_id": activity.lead_id,
@@ -336,10 +296,10 @@ def list_all_lead_activities(
             "is_completed": activity.is_completed,
             "completed_at": activity.completed_at.isoformat() if activity.completed_at else None,
             "contact_id": activity.contact_id,
-            "contact_name": contact_name,
+            "contact_name": contact_names.get(activity.contact_id),
             "created_at": activity.created_at.isoformat() if activity.created_at else None,
             "created_by": activity.created_by,
-            "assigned_to": assigned_to_name,
+            "assigned_to": user_names.get(activity.created_by),
             "company_name": lead.company_name,
             "lead_status": lead.status,
         }
@@ -576,7 +536,7 @@ async def upload_document(
     lead_id: int,
     file: UploadFile = File(...),
     notes: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload a document for a lead"""
@@ -584,42 +544,56 @@ async def upload_document(
         raise HTTPException(status_code=403, detail="Permission denied")
 
     # Verify lead exists
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead = await db.get(Lead, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
 
-    # Create upload directory if not exists
-    upload_path = f"{UPLOAD_DIR}/{lead_id}"
-    os.makedirs(upload_path, exist_ok=True)
-
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = f"{upload_path}/{unique_filename}"
-
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Stream into content-addressed storage
+    stored = await store_upload(db, file)
 
     # Create document record
     document = LeadDocument(
         lead_id=lead_id,
-        name=unique_filename,
+        name=os.path.basename(stored.path),
         original_name=file.filename,
-        file_path=file_path,
+        file_path=stored.path,
         file_type=file.content_type,
-        size=len(content),
+        size=stored.size,
         notes=notes,
         uploaded_by=current_user.id
     )
     db.add(document)
-    db.commit()
-    db.refresh(document)
+    await db.commit()
+    await db.refresh(document)
 
     return document
 
 
+@router.get("/{lead_id}/documents/{document_id}/download")
+def download_document(
+    lead_id: int,
+    document_id: int,
+    request: Request,
+    inline: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download a document (resumable with Range; ?inline=true to open in the browser)"""
+    if not check_permission(current_user.role, "leads", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    document = db.query(LeadDocument).filter(
+        LeadDocument.id == document_id,
+        LeadDocument.lead_id == lead_id
+    ).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return document_response(
+        request, document.file_path, document.original_name, document.file_type, document.created_at, inline
+    )
+
+
 @router.delete("/{lead_id}/documents/{document_id}")
 def delete_document(
     lead_id: int,
@@ -638,9 +612,8 @@ def delete_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Delete file from disk
-    if os.path.exists(document.file_path):
-        os.remove(document.file_path)
+    # Delete the file once no other document uses it
+    release_file(db, document.file_path)
 
     db.delete(document)
     db.commit()
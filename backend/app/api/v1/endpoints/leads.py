@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, File, UploadFile
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import Optional
@@ -10,12 +10,20 @@ from app.models.user import User
 from app.models.lead import Lead, LeadSource, LeadPriority
 from app.models.customer import Customer, CustomerType
 from app.models.contact import Contact
-from app.models.location import Country, State, City
+from app.models.webhook import WebhookEvent
 from app.schemas.lead import (
     LeadCreate, LeadUpdate, LeadResponse,
     LeadListResponse, LeadConvert, LeadDiscard
 )
+from app.schemas.customer import CustomerResponse
+from app.schemas.import_job import ImportJobResponse
 from app.core.permissions import check_permission
+from app.core.export import ExportFormat, stream_export
+from app.core.pagination import CountMode, paginate
+from app.services.bulk_import import lead_create_data, start_import, get_import_job
+from app.services.reference_data import fill_location_names, user_display_name
+from app.services.search import apply_search, LEAD_SEARCH_COLUMNS
+from app.services.webhook_dispatcher import enqueue_event
 
 router = APIRouter()
 
@@ -30,54 +38,13 @@ def create_lead(
     if not check_permission(current_user.role, "leads", "create"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    # Convert to dict and apply field mappings
-    data = lead_data.model_dump(exclude={'from_timings', 'to_timings', 'customer_name', 'contact_phone', 'customer_email'})
+    data = lead_create_data(lead_data, current_user.id)
 
-    # Field mappings: frontend field -> database field
-    if lead_data.customer_name and not data.get('company_name'):
-        data['company_name'] = lead_data.customer_name
-    if lead_data.contact_phone and not data.get('phone'):
-        data['phone'] = lead_data.contact_phone
-    if lead_data.customer_email and not data.get('email'):
-        data['email'] = lead_data.customer_email
-
-    # Combine office timings from from_timings and to_timings
-    from_timings = lead_data.from_timings
-    to_timings = lead_data.to_timings
-    if from_timings and to_timings:
-        data['office_timings'] = f"{from_timings} - {to_timings}"
-    elif from_timings:
-        data['office_timings'] = from_timings
-    elif to_timings:
-        data['office_timings'] = to_timings
-
-    # Auto-assign system fields
-    data['createdby'] = current_user.id
-    data['updatedby'] = current_user.id
-    if not data.get('company_id'):
-        data['company_id'] = 1  # Default company
-
-    # Resolve location names from IDs
-    if data.get('country_id'):
-        country = db.query(Country).filter(Country.id == data['country_id']).first()
-        if country:
-            data['country'] = country.name
-
-    if data.get('state_id'):
-        state = db.query(State).filter(State.id == data['state_id']).first()
-        if state:
-            data['state'] = state.name
-
-    if data.get('city_id'):
-        city = db.query(City).filter(City.id == data['city_id']).first()
-        if city:
-            data['city'] = city.name
-
-    # Resolve sales rep name from assigned_to user ID
-    if data.get('assigned_to'):
-        user = db.query(User).filter(User.id == data['assigned_to']).first()
-        if user:
-            data['sales_rep'] = user.full_name or user.email
+    # Resolve location names and sales rep name from IDs
+    fill_location_names(db, data)
+    sales_rep = user_display_name(db, data.get('assigned_to'))
+    if sales_rep:
+        data['sales_rep'] = sales_rep
 
     lead = Lead(**data)
     db.add(lead)
@@ -87,38 +54,18 @@ def create_lead(
     return lead
 
 
-@router.get("/", response_model=LeadListResponse)
-def list_leads(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+def filter_leads(
+    query,
     search: Optional[str] = None,
-    status: Optional[int] = None,  # 0 = active, 1 = discarded
-    lead_status: Optional[str] = None,  # new, contacted, qualified, proposal_sent, negotiation, won, lost
+    status: Optional[int] = None,
+    lead_status: Optional[str] = None,
     source: Optional[LeadSource] = None,
     priority: Optional[LeadPriority] = None,
     assigned_to: Optional[int] = None,
-    pipeline_stage: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    pipeline_stage: Optional[int] = None
 ):
-    """List leads with filtering and pagination"""
-    if not check_permission(current_user.role, "leads", "read"):
-        raise HTTPException(status_code=403, detail="Permission denied")
-
-    query = db.query(Lead)
-
-    # Apply filters
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Lead.first_name.ilike(search_term),
-                Lead.last_name.ilike(search_term),
-                Lead.email.ilike(search_term),
-                Lead.phone.ilike(search_term),
-                Lead.company_name.ilike(search_term)
-            )
-        )
+    """Apply the list_leads and export filters; returns the query and the search ranking"""
+    query, search_order = apply_search(query, search, LEAD_SEARCH_COLUMNS)
 
     if status is not None:
         query = query.filter(Lead.status == status)
@@ -138,23 +85,104 @@ def list_leads(
     if pipeline_stage:
         query = query.filter(Lead.pipeline_stage == pipeline_stage)
 
-    # Get total count
-    total = query.count()
+    return query, search_order
 
-    # Apply pagination
-    offset = (page - 1) * page_size
-    leads = query.order_by(Lead.created_at.desc()).offset(offset).limit(page_size).all()
 
-    total_pages = (total + page_size - 1) // page_size
+@router.get("/", response_model=LeadListResponse)
+def list_leads(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
+    search: Optional[str] = None,
+    status: Optional[int] = None,  # 0 = active, 1 = discarded
+    lead_status: Optional[str] = None,  # new, contacted, qualified, proposal_sent, negotiation, won, lost
+    source: Optional[LeadSource] = None,
+    priority: Optional[LeadPriority] = None,
+    assigned_to: Optional[int] = None,
+    pipeline_stage: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List leads with filtering and pagination
 
-    return LeadListResponse(
-        items=leads,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
+    Pass the previous response's `next_cursor` as `cursor` for keyset
+    pagination (page is then ignored); `count=estimated|none` makes the
+    total approximate or skips it. Search results are ranked by relevance
+    and use page mode.
+    """
+    if not check_permission(current_user.role, "leads", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    query, search_order = filter_leads(
+        db.query(Lead), search, status, lead_status, source, priority, assigned_to, pipeline_stage
     )
 
+    return LeadListResponse(**paginate(query, Lead, page, page_size, cursor, count, search_order))
+
+
+@router.get("/export")
+def export_leads(
+    format: ExportFormat = ExportFormat.CSV,
+    search: Optional[str] = None,
+    status: Optional[int] = None,
+    lead_status: Optional[str] = None,
+    source: Optional[LeadSource] = None,
+    priority: Optional[LeadPriority] = None,
+    assigned_to: Optional[int] = None,
+    pipeline_stage: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export all leads matching the list filters as CSV or NDJSON
+
+    The file is streamed, so there is no page size limit.
+    """
+    if not check_permission(current_user.role, "leads", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    query, _ = filter_leads(
+        db.query(Lead), search, status, lead_status, source, priority, assigned_to, pipeline_stage
+    )
+    return stream_export(query, Lead, format, "leads")
+
+
+@router.post("/import", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def import_leads(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bulk import leads from a CSV or XLSX file
+
+    The first row holds the column names (LeadCreate field names). Rows are
+    validated and inserted in chunks by a background job; poll
+    GET /import/{job_id} for progress and per-row errors. assigned_to
+    accepts a user id, email or full name; country/state/city names are
+    resolved to their ids.
+    """
+    if not check_permission(current_user.role, "leads", "create"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    return start_import(db, file, "lead", current_user, background_tasks)
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+def get_lead_import(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Progress and row errors of a leads import job"""
+    if not check_permission(current_user.role, "leads", "create"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    return get_import_job(db, job_id, "lead", current_user)
+
 
 @router.get("/{lead_id}", response_model=LeadResponse)
 def get_lead(
@@ -218,36 +246,31 @@ def update_lead(
     # Auto-assign updatedby
     data['updatedby'] = current_user.id
 
-    # Resolve location names from IDs
-    if 'country_id' in data and data['country_id']:
-        country = db.query(Country).filter(Country.id == data['country_id']).first()
-        if country:
-            data['country'] = country.name
-
-    if 'state_id' in data and data['state_id']:
-        state = db.query(State).filter(State.id == data['state_id']).first()
-        if state:
-            data['state'] = state.name
-
-    if 'city_id' in data and data['city_id']:
-        city = db.query(City).filter(City.id == data['city_id']).first()
-        if city:
-            data['city'] = city.name
-
-    # Resolve sales rep name from assigned_to user ID
-    if 'assigned_to' in data and data['assigned_to']:
-        user = db.query(User).filter(User.id == data['assigned_to']).first()
-        if user:
-            data['sales_rep'] = user.full_name or user.email
+    # Resolve location names and sales rep name from IDs
+    fill_location_names(db, data)
+    sales_rep = user_display_name(db, data.get('assigned_to'))
+    if sales_rep:
+        data['sales_rep'] = sales_rep
 
+    previous_status = lead.lead_status
     for field, value in data.items():
         setattr(lead, field, value)
 
+    if lead.lead_status != previous_status:
+        enqueue_event(
+            db, WebhookEvent.LEAD_STATUS_CHANGED,
+            {
+                "lead_id": lead.id,
+                "previous_status": previous_status,
+                "lead_status": lead.lead_status,
+                "lead": LeadResponse.model_validate(lead)
+            },
+            entity_type="lead", entity_id=lead.id
+        )
+
     db.commit()
     db.refresh(lead)
 
-    # TODO: If status changed, trigger webhook
-
     return lead
 
 
@@ -328,12 +351,22 @@ def convert_lead(
     for contact in lead_contacts:
         contact.customer_id = customer.id
 
+    # Outgoing webhooks (ERP sync subscribes to customer_created)
+    customer_payload = CustomerResponse.model_validate(customer)
+    enqueue_event(
+        db, WebhookEvent.LEAD_CONVERTED,
+        {"lead_id": lead.id, "customer": customer_payload},
+        entity_type="lead", entity_id=lead.id
+    )
+    enqueue_event(
+        db, WebhookEvent.CUSTOMER_CREATED,
+        {"customer": customer_payload},
+        entity_type="customer", entity_id=customer.id
+    )
+
     db.commit()
     db.refresh(customer)
 
-    # TODO: Trigger outgoing webhook for lead_converted event
-    # TODO: Sync customer to ERP
-
     return {
         "message": "Lead converted to customer",
         "customer_id": customer.id,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -11,6 +11,8 @@ from app.schemas.location import (
     StateCreate, StateUpdate, StateResponse, StateWithCitiesResponse,
     CityCreate, CityUpdate, CityResponse
 )
+from app.core.http_cache import cached_json_response
+from app.services.reference_data import location_cache
 
 router = APIRouter()
 
@@ -19,29 +21,41 @@ router = APIRouter()
 
 @router.get("/countries", response_model=List[CountryResponse])
 def get_countries(
+    request: Request,
     status: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """Get all countries (public endpoint)"""
-    query = db.query(Country)
-    if status:
-        query = query.filter(Country.status == status)
-    return query.offset(skip).limit(limit).all()
+    def load():
+        query = db.query(Country)
+        if status:
+            query = query.filter(Country.status == status)
+        return query.offset(skip).limit(limit).all()
+
+    return cached_json_response(
+        request, location_cache, ("countries", status, skip, limit), List[CountryResponse], load
+    )
 
 
 @router.get("/countries/{country_id}", response_model=CountryWithStatesResponse)
 def get_country(
     country_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a country with its states"""
-    country = db.query(Country).filter(Country.id == country_id).first()
-    if not country:
-        raise HTTPException(status_code=404, detail="Country not found")
-    return country
+    def load():
+        country = db.query(Country).filter(Country.id == country_id).first()
+        if not country:
+            raise HTTPException(status_code=404, detail="Country not found")
+        return country
+
+    return cached_json_response(
+        request, location_cache, ("country", country_id), CountryWithStatesResponse, load
+    )
 
 
 @router.post("/countries", response_model=CountryResponse)
@@ -54,6 +68,7 @@ def create_country(
     country = Country(**data.model_dump())
     db.add(country)
     db.commit()
+    location_cache.invalidate()
     db.refresh(country)
     return country
 
@@ -75,6 +90,7 @@ def update_country(
         setattr(country, field, value)
 
     db.commit()
+    location_cache.invalidate()
     db.refresh(country)
     return country
 
@@ -92,6 +108,7 @@ def delete_country(
 
     db.delete(country)
     db.commit()
+    location_cache.invalidate()
     return {"message": "Country deleted successfully"}
 
 
@@ -99,6 +116,7 @@ def delete_country(
 
 @router.get("/states", response_model=List[StateResponse])
 def get_states(
+    request: Request,
     country_id: Optional[int] = None,
     status: Optional[str] = None,
     skip: int = 0,
@@ -106,25 +124,36 @@ def get_states(
     db: Session = Depends(get_db)
 ):
     """Get all states, optionally filtered by country (public endpoint)"""
-    query = db.query(State)
-    if country_id:
-        query = query.filter(State.country_id == country_id)
-    if status:
-        query = query.filter(State.status == status)
-    return query.offset(skip).limit(limit).all()
+    def load():
+        query = db.query(State)
+        if country_id:
+            query = query.filter(State.country_id == country_id)
+        if status:
+            query = query.filter(State.status == status)
+        return query.offset(skip).limit(limit).all()
+
+    return cached_json_response(
+        request, location_cache, ("states", country_id, status, skip, limit), List[StateResponse], load
+    )
 
 
 @router.get("/states/{state_id}", response_model=StateWithCitiesResponse)
 def get_state(
     state_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a state with its cities"""
-    state = db.query(State).filter(State.id == state_id).first()
-    if not state:
-        raise HTTPException(status_code=404, detail="State not found")
-    return state
+    def load():
+        state = db.query(State).filter(State.id == state_id).first()
+        if not state:
+            raise HTTPException(status_code=404, detail="State not found")
+        return state
+
+    return cached_json_response(
+        request, location_cache, ("state", state_id), StateWithCitiesResponse, load
+    )
 
 
 @router.post("/states", response_model=StateResponse)
@@ -142,6 +171,7 @@ def create_state(
     state = State(**data.model_dump())
     db.add(state)
     db.commit()
+    location_cache.invalidate()
     db.refresh(state)
     return state
 
@@ -163,6 +193,7 @@ def update_state(
         setattr(state, field, value)
 
     db.commit()
+    location_cache.invalidate()
     db.refresh(state)
     return state
 
@@ -180,6 +211,7 @@ def delete_state(
 
     db.delete(state)
     db.commit()
+    location_cache.invalidate()
     return {"message": "State deleted successfully"}
 
 
@@ -187,6 +219,7 @@ def delete_state(
 
 @router.get("/cities", response_model=List[CityResponse])
 def get_cities(
+    request: Request,
     state_id: Optional[int] = None,
     status: Optional[str] = None,
     skip: int = 0,
@@ -194,25 +227,34 @@ def get_cities(
     db: Session = Depends(get_db)
 ):
     """Get all cities, optionally filtered by state (public endpoint)"""
-    query = db.query(City)
-    if state_id:
-        query = query.filter(City.state_id == state_id)
-    if status:
-        query = query.filter(City.status == status)
-    return query.offset(skip).limit(limit).all()
+    def load():
+        query = db.query(City)
+        if state_id:
+            query = query.filter(City.state_id == state_id)
+        if status:
+            query = query.filter(City.status == status)
+        return query.offset(skip).limit(limit).all()
+
+    return cached_json_response(
+        request, location_cache, ("cities", state_id, status, skip, limit), List[CityResponse], load
+    )
 
 
 @router.get("/cities/{city_id}", response_model=CityResponse)
 def get_city(
     city_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a city"""
-    city = db.query(City).filter(City.id == city_id).first()
-    if not city:
-        raise HTTPException(status_code=404, detail="City not found")
-    return city
+    def load():
+        city = db.query(City).filter(City.id == city_id).first()
+        if not city:
+            raise HTTPException(status_code=404, detail="City not found")
+        return city
+
+    return cached_json_response(request, location_cache, ("city", city_id), CityResponse, load)
 
 
 @router.post("/cities", response_model=CityResponse)
@@ -230,6 +272,7 @@ def create_city(
     city = City(**data.model_dump())
     db.add(city)
     db.commit()
+    location_cache.invalidate()
     db.refresh(city)
     return city
 
@@ -251,6 +294,7 @@ def update_city(
         setattr(city, field, value)
 
     db.commit()
+    location_cache.invalidate()
     db.refresh(city)
     return city
 
@@ -268,4 +312,5 @@ def delete_city(
 
     db.delete(city)
     db.commit()
+    location_cache.invalidate()
     return {"message": "City deleted successfully"}
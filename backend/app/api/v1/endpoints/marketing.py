@@ -1,24 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, File, UploadFile
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel, EmailStr
 import json
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, AsyncSessionLocal
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.lead import Lead
 from app.models.customer import Customer
 from app.models.activity import Activity, ActivityType
+from app.models.email_campaign import EmailCampaign, EmailCampaignRecipient, EmailCampaignStatus
 from app.models.lead_contact import LeadContact
 from app.models.whatsapp_message import (
     WhatsAppMessage as WhatsAppMessageModel,
     WhatsAppDocument, WhatsAppEngagement, WhatsAppAuditLog,
     MessageDirection, MessageStatus
 )
-from app.core.permissions import check_permission
+from app.core.http_cache import cache_response
+from app.core.permissions import check_permission, UserRole
+from app.schemas.email_campaign import EmailCampaignResponse, EmailCampaignRecipientResponse
+from app.services.email_campaigns import (
+    create_campaign, add_recipients, add_recipients_from_query, cancel_campaign
+)
+from app.services.file_storage import store_upload, release_file
+from app.services.name_lookup import get_user_names
+from app.services.search import apply_search, LEAD_SEARCH_COLUMNS
 
 router = APIRouter()
 
@@ -45,6 +55,7 @@ class BulkEmailResponse(BaseModel):
     queued: int
     failed: int
     message: str
+    campaign_id: Optional[int] = None
 
 
 class WhatsAppMessageSchema(BaseModel):
@@ -67,60 +78,45 @@ class WhatsAppResponse(BaseModel):
 @router.post("/bulk-email", response_model=BulkEmailResponse)
 async def send_bulk_email(
     email_request: BulkEmailRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Send bulk emails to leads or customers.
-    Emails are queued for background processing.
+    Emails are queued as a campaign and sent by the email campaign worker;
+    track it with GET /bulk-email/campaigns/{campaign_id}.
     """
     if not check_permission(current_user.role, "leads", "bulk_email"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    recipients = []
-
     if email_request.recipient_type == "lead":
-        query = db.query(Lead).filter(Lead.email.isnot(None))
-
-        if email_request.recipient_ids:
-            query = query.filter(Lead.id.in_(email_request.recipient_ids))
-
+        model = Lead
+        query = select(Lead)
         if email_request.filters:
             if "status" in email_request.filters:
-                query = query.filter(Lead.status == email_request.filters["status"])
+                query = query.where(Lead.status == email_request.filters["status"])
             if "source" in email_request.filters:
-                query = query.filter(Lead.source == email_request.filters["source"])
-
-        leads = query.all()
-        recipients = [
-            EmailRecipient(
-                email=lead.email,
-                name=f"{lead.first_name} {lead.last_name or ''}".strip(),
-                entity_type="lead",
-                entity_id=lead.id
-            )
-            for lead in leads if lead.email
-        ]
-
+                query = query.where(Lead.source == email_request.filters["source"])
     elif email_request.recipient_type == "customer":
-        query = db.query(Customer).filter(Customer.email.isnot(None))
+        model = Customer
+        query = select(Customer)
+    else:
+        raise HTTPException(status_code=400, detail="recipient_type must be 'lead' or 'customer'")
 
-        if email_request.recipient_ids:
-            query = query.filter(Customer.id.in_(email_request.recipient_ids))
+    if email_request.recipient_ids:
+        query = query.where(model.id.in_(email_request.recipient_ids))
 
-        customers = query.all()
-        recipients = [
-            EmailRecipient(
-                email=customer.email,
-                name=f"{customer.first_name} {customer.last_name or ''}".strip(),
-                entity_type="customer",
-                entity_id=customer.id
-            )
-            for customer in customers if customer.email
-        ]
+    campaign = await create_campaign(
+        db,
+        subject=email_request.subject,
+        body=email_request.body,
+        recipient_type=email_request.recipient_type,
+        created_by=current_user.id,
+    )
+    queued = await add_recipients_from_query(db, campaign, model, query)
 
-    if not recipients:
+    if not queued:
+        await db.rollback()
         return BulkEmailResponse(
             total_recipients=0,
             queued=0,
@@ -128,48 +124,14 @@ async def send_bulk_email(
             message="No recipients found matching criteria"
         )
 
-    # Queue email sending task
-    def send_emails_task():
-        """Background task to send emails"""
-        # In production, integrate with email service (SendGrid, SES, etc.)
-        for recipient in recipients:
-            try:
-                # Create activity log for each email
-                activity = Activity(
-                    activity_type=ActivityType.EMAIL,
-                    subject=f"Bulk Email: {email_request.subject}",
-                    description=f"Sent bulk email campaign",
-                    email_subject=email_request.subject,
-                    performed_by=current_user.id
-                )
-
-                if recipient.entity_type == "lead":
-                    activity.lead_id = recipient.entity_id
-                else:
-                    activity.customer_id = recipient.entity_id
-
-                db.add(activity)
-
-                # TODO: Actually send email via email service
-                # email_service.send(
-                #     to=recipient.email,
-                #     subject=email_request.subject,
-                #     body=email_request.body,
-                #     name=recipient.name
-                # )
-
-            except Exception as e:
-                print(f"Failed to send email to {recipient.email}: {e}")
-
-        db.commit()
-
-    background_tasks.add_task(send_emails_task)
+    await db.commit()
 
     return BulkEmailResponse(
-        total_recipients=len(recipients),
-        queued=len(recipients),
+        total_recipients=queued,
+        queued=queued,
         failed=0,
-        message=f"Queued {len(recipients)} emails for sending"
+        message=f"Queued {queued} emails for sending",
+        campaign_id=campaign.id
     )
 
 
@@ -243,8 +205,7 @@ class BulkEmailDocument(BaseModel):
 @router.post("/bulk-email/advanced", response_model=BulkEmailResponse)
 async def send_bulk_email_advanced(
     request: AdvancedBulkEmailRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -266,51 +227,37 @@ async def send_bulk_email_advanced(
     cc_emails = [e.strip() for e in request.cc.split(',') if e.strip()] if request.cc else []
     bcc_emails = [e.strip() for e in request.bcc.split(',') if e.strip()] if request.bcc else []
 
-    # Get attachment URLs if provided
-    attachment_urls = []
+    # Attachments are read from disk by the worker
+    attachments = []
     if request.attachment_ids:
         from app.models.customer_requirement import BulkEmailDoc
-        docs = db.query(BulkEmailDoc).filter(BulkEmailDoc.id.in_(request.attachment_ids)).all()
-        attachment_urls = [doc.url for doc in docs if doc.url]
-
-    # Queue email sending task
-    def send_emails_task():
-        """Background task to send emails to each lead"""
-        for lead_recipient in request.leads:
-            try:
-                # Create activity log for each email
-                activity = Activity(
-                    activity_type=ActivityType.EMAIL,
-                    subject=f"Bulk Email: {request.subject}",
-                    description=f"Sent bulk email to {lead_recipient.contact_email}",
-                    email_subject=request.subject,
-                    lead_id=lead_recipient.lead_id,
-                    performed_by=current_user.id
-                )
-                db.add(activity)
-
-                # TODO: Actually send email via email service
-                # email_service.send(
-                #     to=lead_recipient.contact_email,
-                #     cc=cc_emails,
-                #     bcc=bcc_emails,
-                #     subject=request.subject,
-                #     body=request.body.replace('{{contact_name}}', lead_recipient.contact_name),
-                #     attachments=attachment_urls
-                # )
-
-            except Exception as e:
-                print(f"Failed to send email to {lead_recipient.contact_email}: {e}")
-
-        db.commit()
-
-    background_tasks.add_task(send_emails_task)
+        docs = (await db.execute(
+            select(BulkEmailDoc).where(BulkEmailDoc.id.in_(request.attachment_ids))
+        )).scalars().all()
+        attachments = [{"name": doc.name, "path": doc.url.lstrip('/')} for doc in docs if doc.url]
+
+    campaign = await create_campaign(
+        db,
+        subject=request.subject,
+        body=request.body,
+        recipient_type="lead",
+        created_by=current_user.id,
+        cc=cc_emails,
+        bcc=bcc_emails,
+        attachments=attachments,
+    )
+    queued = await add_recipients(db, campaign, [
+        {"email": recipient.contact_email, "name": recipient.contact_name, "lead_id": recipient.lead_id}
+        for recipient in request.leads
+    ])
+    await db.commit()
 
     return BulkEmailResponse(
-        total_recipients=len(request.leads),
-        queued=len(request.leads),
+        total_recipients=queued,
+        queued=queued,
         failed=0,
-        message=f"Queued {len(request.leads)} emails for sending"
+        message=f"Queued {queued} emails for sending",
+        campaign_id=campaign.id
     )
 
 
@@ -342,7 +289,7 @@ def get_bulk_email_documents(
 @router.post("/bulk-email/documents")
 async def upload_bulk_email_document(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload a document for bulk email attachments"""
@@ -350,32 +297,20 @@ async def upload_bulk_email_document(
         raise HTTPException(status_code=403, detail="Permission denied")
 
     from app.models.customer_requirement import BulkEmailDoc
-    import os
-    import uuid
-
-    # Save file locally (in production, upload to S3 or similar)
-    upload_dir = "uploads/bulk_email"
-    os.makedirs(upload_dir, exist_ok=True)
 
-    file_ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(upload_dir, unique_filename)
-
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Stream into content-addressed storage
+    stored = await store_upload(db, file)
 
     # Create document record
     doc = BulkEmailDoc(
         name=file.filename,
-        size=len(content),
-        url=f"/uploads/bulk_email/{unique_filename}",
+        size=stored.size,
+        url=f"/{stored.path}",
         created_by=current_user.id,
         created_at=datetime.utcnow()
     )
     db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    await db.commit()
 
     return {
         "id": doc.id,
@@ -397,18 +332,13 @@ def delete_bulk_email_document(
         raise HTTPException(status_code=403, detail="Permission denied")
 
     from app.models.customer_requirement import BulkEmailDoc
-    import os
 
     doc = db.query(BulkEmailDoc).filter(BulkEmailDoc.id == doc_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Delete file from disk
-    if doc.url and os.path.exists(doc.url.lstrip('/')):
-        try:
-            os.remove(doc.url.lstrip('/'))
-        except:
-            pass
+    # Delete the file once no other document uses it
+    release_file(db, doc.url)
 
     db.delete(doc)
     db.commit()
@@ -447,13 +377,94 @@ def get_bulk_email_history(
     ]
 
 
+# ================== BULK EMAIL CAMPAIGNS ==================
+
+def _get_campaign(db: Session, campaign_id: int, current_user: User) -> EmailCampaign:
+    campaign = db.get(EmailCampaign, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if campaign.created_by != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return campaign
+
+
+@router.get("/bulk-email/campaigns", response_model=List[EmailCampaignResponse])
+def get_bulk_email_campaigns(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk email campaigns with their progress"""
+    if not check_permission(current_user.role, "leads", "bulk_email"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    query = db.query(EmailCampaign)
+    if current_user.role != UserRole.ADMIN:
+        query = query.filter(EmailCampaign.created_by == current_user.id)
+    return query.order_by(EmailCampaign.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/bulk-email/campaigns/{campaign_id}", response_model=EmailCampaignResponse)
+def get_bulk_email_campaign(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a bulk email campaign"""
+    if not check_permission(current_user.role, "leads", "bulk_email"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    return _get_campaign(db, campaign_id, current_user)
+
+
+@router.get("/bulk-email/campaigns/{campaign_id}/recipients", response_model=List[EmailCampaignRecipientResponse])
+def get_bulk_email_campaign_recipients(
+    campaign_id: int,
+    recipient_status: Optional[str] = Query(None, alias="status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delivery status per recipient (e.g. ?status=failed)"""
+    if not check_permission(current_user.role, "leads", "bulk_email"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    _get_campaign(db, campaign_id, current_user)
+    query = db.query(EmailCampaignRecipient).filter(EmailCampaignRecipient.campaign_id == campaign_id)
+    if recipient_status:
+        query = query.filter(EmailCampaignRecipient.status == recipient_status)
+    return query.order_by(EmailCampaignRecipient.id).offset(skip).limit(limit).all()
+
+
+@router.post("/bulk-email/campaigns/{campaign_id}/cancel", response_model=EmailCampaignResponse)
+def cancel_bulk_email_campaign(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stop sending a campaign; emails already sent are not affected"""
+    if not check_permission(current_user.role, "leads", "bulk_email"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    campaign = _get_campaign(db, campaign_id, current_user)
+    if campaign.status not in (EmailCampaignStatus.QUEUED.value, EmailCampaignStatus.RUNNING.value):
+        raise HTTPException(status_code=400, detail=f"Campaign is already {campaign.status}")
+
+    cancel_campaign(db, campaign)
+    db.commit()
+    db.refresh(campaign)
+    return campaign
+
+
 # ================== WHATSAPP MARKETING ==================
 
 @router.post("/whatsapp", response_model=WhatsAppResponse)
 async def send_whatsapp_messages(
     whatsapp_request: WhatsAppMessageSchema,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -466,16 +477,16 @@ async def send_whatsapp_messages(
     recipients = []
 
     if whatsapp_request.recipient_type == "lead":
-        query = db.query(Lead).filter(Lead.phone.isnot(None))
+        query = select(Lead).where(Lead.phone.isnot(None))
 
         if whatsapp_request.recipient_ids:
-            query = query.filter(Lead.id.in_(whatsapp_request.recipient_ids))
+            query = query.where(Lead.id.in_(whatsapp_request.recipient_ids))
 
         if whatsapp_request.filters:
             if "status" in whatsapp_request.filters:
-                query = query.filter(Lead.status == whatsapp_request.filters["status"])
+                query = query.where(Lead.status == whatsapp_request.filters["status"])
 
-        leads = query.all()
+        leads = (await db.execute(query)).scalars().all()
         recipients = [
             {
                 "phone": lead.phone,
@@ -487,12 +498,12 @@ async def send_whatsapp_messages(
         ]
 
     elif whatsapp_request.recipient_type == "customer":
-        query = db.query(Customer).filter(Customer.phone.isnot(None))
+        query = select(Customer).where(Customer.phone.isnot(None))
 
         if whatsapp_request.recipient_ids:
-            query = query.filter(Customer.id.in_(whatsapp_request.recipient_ids))
+            query = query.where(Customer.id.in_(whatsapp_request.recipient_ids))
 
-        customers = query.all()
+        customers = (await db.execute(query)).scalars().all()
         recipients = [
             {
                 "phone": customer.phone,
@@ -511,38 +522,41 @@ async def send_whatsapp_messages(
             message="No recipients found matching criteria"
         )
 
+    performed_by = current_user.id
+
     # Queue WhatsApp sending task
-    def send_whatsapp_task():
-        """Background task to send WhatsApp messages"""
+    async def send_whatsapp_task():
+        """Background task to send WhatsApp messages (uses its own session)"""
         # In production, integrate with WhatsApp Business API
-        for recipient in recipients:
-            try:
-                # Create activity log
-                activity = Activity(
-                    activity_type=ActivityType.WHATSAPP,
-                    subject=f"WhatsApp: {whatsapp_request.template_name}",
-                    description=f"Sent WhatsApp template message",
-                    performed_by=current_user.id
-                )
-
-                if recipient["entity_type"] == "lead":
-                    activity.lead_id = recipient["entity_id"]
-                else:
-                    activity.customer_id = recipient["entity_id"]
-
-                db.add(activity)
-
-                # TODO: Actually send WhatsApp via API
-                # whatsapp_service.send_template(
-                #     to=recipient["phone"],
-                #     template=whatsapp_request.template_name,
-                #     params=whatsapp_request.template_params
-                # )
-
-            except Exception as e:
-                print(f"Failed to send WhatsApp to {recipient['phone']}: {e}")
-
-        db.commit()
+        async with AsyncSessionLocal() as task_db:
+            for recipient in recipients:
+                try:
+                    # Create activity log
+                    activity = Activity(
+                        activity_type=ActivityType.WHATSAPP,
+                        subject=f"WhatsApp: {whatsapp_request.template_name}",
+                        description=f"Sent WhatsApp template message",
+                        performed_by=performed_by
+                    )
+
+                    if recipient["entity_type"] == "lead":
+                        activity.lead_id = recipient["entity_id"]
+                    else:
+                        activity.customer_id = recipient["entity_id"]
+
+                    task_db.add(activity)
+
+                    # TODO: Actually send WhatsApp via API
+                    # whatsapp_service.send_template(
+                    #     to=recipient["phone"],
+                    #     template=whatsapp_request.template_name,
+                    #     params=whatsapp_request.template_params
+                    # )
+
+                except Exception as e:
+                    print(f"Failed to send WhatsApp to {recipient['phone']}: {e}")
+
+            await task_db.commit()
 
     background_tasks.add_task(send_whatsapp_task)
 
@@ -555,6 +569,7 @@ async def send_whatsapp_messages(
 
 
 @router.get("/whatsapp/templates")
+@cache_response("whatsapp_templates")
 def get_whatsapp_templates(
     current_user: User = Depends(get_current_user)
 ):
@@ -646,7 +661,7 @@ class WhatsAppSendRequest(BaseModel):
 async def send_whatsapp_message(
     request: WhatsAppSendRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -681,7 +696,7 @@ async def send_whatsapp_message(
                     sent_at=datetime.utcnow()
                 )
                 db.add(message)
-                db.flush()
+                await db.flush()
                 messages_created.append(message)
 
                 # TODO: Integrate with actual WhatsApp Business API
@@ -703,7 +718,7 @@ async def send_whatsapp_message(
                 failed_count += 1
                 print(f"Failed to send WhatsApp to {recipient.number}: {e}")
 
-        db.commit()
+        await db.commit()
     except Exception as e:
         print(f"WhatsApp send error (tables may not exist): {e}")
         # Return a mock success for now - in production, should create tables first
@@ -750,40 +765,28 @@ def get_whatsapp_documents(
 @router.post("/whatsapp/documents")
 async def upload_whatsapp_document(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload a document for WhatsApp marketing"""
     if not check_permission(current_user.role, "leads", "whatsapp"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    import os
-    import uuid
-
     try:
-        # Save file locally (in production, upload to S3 or similar)
-        upload_dir = "uploads/whatsapp"
-        os.makedirs(upload_dir, exist_ok=True)
-
-        file_ext = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
-        file_path = os.path.join(upload_dir, unique_filename)
-
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream into content-addressed storage
+        stored = await store_upload(db, file)
 
         # Create document record
         doc = WhatsAppDocument(
             name=file.filename,
-            folder=upload_dir,
-            size=len(content),
-            url=f"/uploads/whatsapp/{unique_filename}",
+            folder="uploads/whatsapp",
+            size=stored.size,
+            url=f"/{stored.path}",
             created_by=current_user.id
         )
         db.add(doc)
-        db.commit()
-        db.refresh(doc)
+        await db.flush()
+        await db.refresh(doc)
 
         # Create audit log
         audit = WhatsAppAuditLog(
@@ -792,7 +795,7 @@ async def upload_whatsapp_document(
             comment=f"Uploaded document: {file.filename}"
         )
         db.add(audit)
-        db.commit()
+        await db.commit()
 
         return {
             "success": True,
@@ -804,6 +807,8 @@ async def upload_whatsapp_document(
                 "uploaded_at": doc.created_at.strftime("%m/%d/%Y") if doc.created_at else ""
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"WhatsApp document upload error: {e}")
         raise HTTPException(status_code=500, detail="Failed to upload document. Database tables may not exist - please run migrations.")
@@ -823,19 +828,13 @@ def delete_whatsapp_document(
     if not doc_id:
         raise HTTPException(status_code=400, detail="Document ID required")
 
-    import os
-
     try:
         doc = db.query(WhatsAppDocument).filter(WhatsAppDocument.id == doc_id).first()
         if not doc:
             raise HTTPException(status_code=404, detail="Document not found")
 
-        # Delete file from disk
-        if doc.url and os.path.exists(doc.url.lstrip('/')):
-            try:
-                os.remove(doc.url.lstrip('/'))
-            except:
-                pass
+        # Delete the file once no other document uses it
+        release_file(db, doc.url)
 
         db.delete(doc)
         db.commit()
@@ -955,7 +954,7 @@ def get_whatsapp_conversation(
 @router.post("/whatsapp/conversation/send")
 async def send_conversation_message(
     data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send a message in a conversation"""
@@ -970,7 +969,7 @@ async def send_conversation_message(
 
     try:
         # Find lead by phone number
-        lead = db.query(Lead).filter(Lead.phone == phone_number).first()
+        lead = (await db.execute(select(Lead).where(Lead.phone == phone_number))).scalars().first()
 
         # Create message record
         message = WhatsAppMessageModel(
@@ -983,7 +982,7 @@ async def send_conversation_message(
             sent_at=datetime.utcnow()
         )
         db.add(message)
-        db.commit()
+        await db.commit()
 
         # TODO: Actually send via WhatsApp API
 
@@ -1010,8 +1009,7 @@ def get_whatsapp_audit_log(
         ).offset(skip).limit(limit).all()
 
         # Get user names
-        user_ids = [log.user_id for log in logs if log.user_id]
-        users = {u.id: u.full_name or u.email for u in db.query(User).filter(User.id.in_(user_ids)).all()}
+        users = get_user_names(db, (log.user_id for log in logs))
 
         return [
             {
@@ -1054,15 +1052,7 @@ def get_whatsapp_leads(
     query = db.query(Lead).filter(Lead.phone.isnot(None))
 
     # Apply filters
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Lead.company_name.ilike(search_term),
-                Lead.first_name.ilike(search_term),
-                Lead.phone.ilike(search_term)
-            )
-        )
+    query, search_order = apply_search(query, search, LEAD_SEARCH_COLUMNS)
 
     if country_id:
         query = query.filter(Lead.country_id == country_id)
@@ -1086,7 +1076,7 @@ def get_whatsapp_leads(
 
     # Paginate
     skip = (page - 1) * page_size
-    leads = query.order_by(desc(Lead.created_at)).offset(skip).limit(page_size).all()
+    leads = query.order_by(*(search_order or []), desc(Lead.created_at)).offset(skip).limit(page_size).all()
 
     return {
         "items": [
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_
 from typing import List, Optional
 
@@ -11,6 +11,8 @@ from app.schemas.option_master import (
     OptionCreate, OptionUpdate, OptionResponse, OptionWithDropdownsResponse,
     OptionDropdownCreate, OptionDropdownUpdate, OptionDropdownResponse
 )
+from app.core.http_cache import cached_json_response
+from app.services.reference_data import option_cache
 
 router = APIRouter()
 
@@ -19,57 +21,76 @@ router = APIRouter()
 
 @router.get("/", response_model=List[OptionResponse])
 def get_options(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all option categories"""
-    options = db.query(Option).offset(skip).limit(limit).all()
-    return options
+    return cached_json_response(
+        request, option_cache, ("options", skip, limit), List[OptionResponse],
+        lambda: db.query(Option).offset(skip).limit(limit).all()
+    )
 
 
 @router.get("/with-dropdowns", response_model=List[OptionWithDropdownsResponse])
 def get_options_with_dropdowns(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all option categories with their dropdown items"""
-    options = db.query(Option).all()
-    return options
+    return cached_json_response(
+        request, option_cache, "with-dropdowns", List[OptionWithDropdownsResponse],
+        lambda: db.query(Option).options(selectinload(Option.dropdowns)).all()
+    )
 
 
 @router.get("/by-title/{title}", response_model=OptionWithDropdownsResponse)
 def get_option_by_title(
     title: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get an option category by title with its dropdown items"""
-    option = db.query(Option).filter(Option.title == title).first()
-    if not option:
-        raise HTTPException(status_code=404, detail="Option not found")
-    return option
+    def load():
+        option = db.query(Option).filter(Option.title == title).first()
+        if not option:
+            raise HTTPException(status_code=404, detail="Option not found")
+        return option
+
+    return cached_json_response(
+        request, option_cache, ("by-title", title), OptionWithDropdownsResponse, load
+    )
 
 
 @router.get("/dropdown-values/{option_title}", response_model=List[OptionDropdownResponse])
 def get_dropdown_values_by_option_title(
     option_title: str,
+    request: Request,
     active_only: bool = True,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get dropdown values for an option by its title (useful for populating form dropdowns)"""
-    option = db.query(Option).filter(Option.title == option_title).first()
-    if not option:
-        raise HTTPException(status_code=404, detail="Option not found")
+    def load():
+        option = db.query(Option).filter(Option.title == option_title).first()
+        if not option:
+            raise HTTPException(status_code=404, detail="Option not found")
 
-    query = db.query(OptionDropdown).filter(OptionDropdown.option_id == option.id)
+        query = db.query(OptionDropdown).filter(OptionDropdown.option_id == option.id)
 
-    if active_only:
-        query = query.filter(OptionDropdown.status == "Active")
+        if active_only:
+            query = query.filter(OptionDropdown.status == "Active")
 
-    return query.all()
+        return query.all()
+
+    return cached_json_response(
+        request, option_cache, ("dropdown-values", option_title, active_only),
+        List[OptionDropdownResponse], load
+    )
 
 
 @router.post("/", response_model=OptionResponse)
@@ -87,6 +108,7 @@ def create_option(
     option = Option(**option_data.model_dump())
     db.add(option)
     db.commit()
+    option_cache.invalidate()
     db.refresh(option)
     return option
 
@@ -94,14 +116,20 @@ def create_option(
 @router.get("/{option_id}", response_model=OptionWithDropdownsResponse)
 def get_option(
     option_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a single option category with its dropdown items"""
-    option = db.query(Option).filter(Option.id == option_id).first()
-    if not option:
-        raise HTTPException(status_code=404, detail="Option not found")
-    return option
+    def load():
+        option = db.query(Option).filter(Option.id == option_id).first()
+        if not option:
+            raise HTTPException(status_code=404, detail="Option not found")
+        return option
+
+    return cached_json_response(
+        request, option_cache, ("option", option_id), OptionWithDropdownsResponse, load
+    )
 
 
 @router.put("/{option_id}", response_model=OptionResponse)
@@ -121,6 +149,7 @@ def update_option(
         setattr(option, field, value)
 
     db.commit()
+    option_cache.invalidate()
     db.refresh(option)
     return option
 
@@ -138,6 +167,7 @@ def delete_option(
 
     db.delete(option)
     db.commit()
+    option_cache.invalidate()
     return {"message": "Option deleted successfully"}
 
 
@@ -146,18 +176,23 @@ def delete_option(
 @router.get("/{option_id}/dropdowns", response_model=List[OptionDropdownResponse])
 def get_option_dropdowns(
     option_id: int,
+    request: Request,
     status: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all dropdown items for an option category"""
-    query = db.query(OptionDropdown).filter(OptionDropdown.option_id == option_id)
+    def load():
+        query = db.query(OptionDropdown).filter(OptionDropdown.option_id == option_id)
 
-    if status:
-        query = query.filter(OptionDropdown.status == status)
+        if status:
+            query = query.filter(OptionDropdown.status == status)
 
-    dropdowns = query.all()
-    return dropdowns
+        return query.all()
+
+    return cached_json_response(
+        request, option_cache, ("dropdowns", option_id, status), List[OptionDropdownResponse], load
+    )
 
 
 @router.post("/{option_id}/dropdowns", response_model=OptionDropdownResponse)
@@ -189,6 +224,7 @@ def create_option_dropdown(
     )
     db.add(dropdown)
     db.commit()
+    option_cache.invalidate()
     db.refresh(dropdown)
     return dropdown
 
@@ -227,6 +263,7 @@ def update_option_dropdown(
         setattr(dropdown, field, value)
 
     db.commit()
+    option_cache.invalidate()
     db.refresh(dropdown)
     return dropdown
 
@@ -251,4 +288,5 @@ def delete_option_dropdown(
 
     db.delete(dropdown)
     db.commit()
+    option_cache.invalidate()
     return {"message": "Dropdown deleted successfully"}
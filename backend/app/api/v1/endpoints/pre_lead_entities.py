@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
 import os
-import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.pre_lead import PreLead
@@ -24,78 +24,56 @@ from app.schemas.pre_lead_entities import (
     QualifiedLeadProfileCreate, QualifiedLeadProfileUpdate, QualifiedLeadProfileResponse,
     PreLeadFullResponse
 )
+from app.core.includes import included_collections, parse_include, with_includes
 from app.core.permissions import check_permission
+from app.services.document_download import document_response
+from app.services.file_storage import store_upload, release_file
 
 router = APIRouter()
 
-# Upload directory for documents
-UPLOAD_DIR = "uploads/pre_leads"
-
 
 # ============== Full Pre-Lead with all entities ==============
 
+# PreLeadFullResponse collection -> PreLead relationship
+PRE_LEAD_FULL_INCLUDES = {
+    "contacts": "contacts",
+    "activities": "activities",
+    "memos": "memos",
+    "documents": "documents",
+    "status_history": "status_history",
+    "qualified_profiles": "qualified_profiles",
+}
+
+
 @router.get("/{pre_lead_id}/full", response_model=PreLeadFullResponse)
 def get_pre_lead_full(
     pre_lead_id: int,
+    include: Optional[str] = Query(
+        None, description=f"Comma-separated collections to return (default all): {', '.join(PRE_LEAD_FULL_INCLUDES)}"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get pre-lead with all related entities"""
+    """Get pre-lead with all (or the `include`d) related entities"""
     if not check_permission(current_user.role, "pre_leads", "read"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
+    includes = parse_include(include, PRE_LEAD_FULL_INCLUDES)
+    pre_lead = with_includes(
+        db.query(PreLead), PreLead, PRE_LEAD_FULL_INCLUDES, includes
+    ).filter(PreLead.id == pre_lead_id).first()
     if not pre_lead:
         raise HTTPException(status_code=404, detail="Pre-lead not found")
 
-    # Get related entities
-    contacts = db.query(PreLeadContact).filter(PreLeadContact.pre_lead_id == pre_lead_id).all()
-    activities = db.query(PreLeadActivity).filter(PreLeadActivity.pre_lead_id == pre_lead_id).order_by(PreLeadActivity.created_at.desc()).all()
-    memos = db.query(PreLeadMemo).filter(PreLeadMemo.pre_lead_id == pre_lead_id).order_by(PreLeadMemo.created_at.desc()).all()
-    documents = db.query(PreLeadDocument).filter(PreLeadDocument.pre_lead_id == pre_lead_id).all()
-    status_history = db.query(PreLeadStatusHistory).filter(PreLeadStatusHistory.pre_lead_id == pre_lead_id).order_by(PreLeadStatusHistory.created_at.desc()).all()
-    qualified_profiles = db.query(QualifiedLeadProfile).filter(QualifiedLeadProfile.pre_lead_id == pre_lead_id).all()
-
-    return PreLeadFullResponse(
-        id=pre_lead.id,
-        first_name=pre_lead.first_name,
-        last_name=pre_lead.last_name,
-        email=pre_lead.email,
-        phone=pre_lead.phone,
-        company_name=pre_lead.company_name,
-        website=pre_lead.website,
+    fields = {
+        name: getattr(pre_lead, name)
+        for name in PreLeadFullResponse.model_fields if name not in PRE_LEAD_FULL_INCLUDES
+    }
+    fields.update(
         status=pre_lead.status.value if hasattr(pre_lead.status, 'value') else str(pre_lead.status),
         source=pre_lead.source.value if hasattr(pre_lead.source, 'value') else str(pre_lead.source),
-        address_line1=pre_lead.address_line1,
-        address_line2=pre_lead.address_line2,
-        city_id=pre_lead.city_id,
-        state_id=pre_lead.state_id,
-        country_id=pre_lead.country_id,
-        zip_code=pre_lead.zip_code,
-        phone_no=pre_lead.phone_no,
-        fax=pre_lead.fax,
-        nof_representative=pre_lead.nof_representative,
-        group_id=pre_lead.group_id,
-        industry_id=pre_lead.industry_id,
-        region_id=pre_lead.region_id,
-        office_timings=pre_lead.office_timings,
-        timezone=pre_lead.timezone,
-        sales_rep=pre_lead.sales_rep,
-        lead_source=pre_lead.lead_source,
-        lead_status=pre_lead.lead_status,
-        lead_score=pre_lead.lead_score,
-        lead_since=pre_lead.lead_since,
-        remarks=pre_lead.remarks,
-        memo=pre_lead.memo,
-        created_at=pre_lead.created_at,
-        updated_at=pre_lead.updated_at,
-        contacts=contacts,
-        activities=activities,
-        memos=memos,
-        documents=documents,
-        status_history=status_history,
-        qualified_profiles=qualified_profiles
     )
+    return PreLeadFullResponse(**fields, **included_collections(pre_lead, PRE_LEAD_FULL_INCLUDES, includes))
 
 
 # ============== Contacts ==============
@@ -422,7 +400,7 @@ async def upload_document(
     pre_lead_id: int,
     file: UploadFile = File(...),
     notes: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload a document for a pre-lead"""
@@ -430,42 +408,57 @@ async def upload_document(
         raise HTTPException(status_code=403, detail="Permission denied")
 
     # Verify pre-lead exists
-    pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
+    pre_lead = await db.get(PreLead, pre_lead_id)
     if not pre_lead:
         raise HTTPException(status_code=404, detail="Pre-lead not found")
 
-    # Create upload directory if not exists
-    upload_path = f"{UPLOAD_DIR}/{pre_lead_id}"
-    os.makedirs(upload_path, exist_ok=True)
-
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = f"{upload_path}/{unique_filename}"
-
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Stream into content-addressed storage
+    stored = await store_upload(db, file)
 
     # Create document record
     document = PreLeadDocument(
         pre_lead_id=pre_lead_id,
-        name=unique_filename,
+        name=os.path.basename(stored.path),
         original_name=file.filename,
-        file_path=file_path,
+        file_path=stored.path,
         file_type=file.content_type,
-        size=len(content),
+        size=stored.size,
         notes=notes,
         uploaded_by=current_user.id
     )
     db.add(document)
-    db.commit()
-    db.refresh(document)
+    await db.commit()
+    await db.refresh(document)
 
     return document
 
 
+@router.get("/{pre_lead_id}/documents/{document_id}/download")
+def download_document(
+    pre_lead_id: int,
+    document_id: int,
+    request: Request,
+    inline: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download a document (resumable with Range; ?inline=true to open in the browser)"""
+    if not check_permission(current_user.role, "pre_leads", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    document = db.query(PreLeadDocument).filter(
+        PreLeadDocument.id == document_id,
+        PreLeadDocument.pre_lead_id == pre_lead_id
+    ).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return document_response(
+        request, document.file_path, document.original_name or document.name, document.file_type,
+        document.created_at, inline
+    )
+
+
 @router.delete("/{pre_lead_id}/documents/{document_id}")
 def delete_document(
     pre_lead_id: int,
@@ -484,9 +477,8 @@ def delete_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Delete file from disk
-    if os.path.exists(document.file_path):
-        os.remove(document.file_path)
+    # Delete the file once no other document uses it
+    release_file(db, document.file_path)
 
     db.delete(document)
     db.commit()
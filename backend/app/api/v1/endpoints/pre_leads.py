@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, File, UploadFile
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import Optional
@@ -9,11 +9,19 @@ from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.pre_lead import PreLead, PreLeadSource
 from app.models.lead import Lead, LeadSource
+from app.models.webhook import WebhookEvent
 from app.schemas.pre_lead import (
     PreLeadCreate, PreLeadUpdate, PreLeadResponse,
     PreLeadListResponse, PreLeadValidate, PreLeadDiscard
 )
+from app.schemas.lead import LeadResponse
+from app.schemas.import_job import ImportJobResponse
 from app.core.permissions import check_permission
+from app.core.export import ExportFormat, stream_export
+from app.core.pagination import CountMode, paginate
+from app.services.bulk_import import pre_lead_create_data, start_import, get_import_job
+from app.services.search import apply_search, PRE_LEAD_SEARCH_COLUMNS
+from app.services.webhook_dispatcher import enqueue_event
 
 router = APIRouter()
 
@@ -28,37 +36,56 @@ def create_pre_lead(
     if not check_permission(current_user.role, "pre_leads", "create"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    # Convert to dict and handle special fields
-    data = pre_lead_data.model_dump(exclude={'from_timings', 'to_timings'})
-
-    # Combine office timings from from_timings and to_timings
-    from_timings = pre_lead_data.from_timings
-    to_timings = pre_lead_data.to_timings
-    if from_timings and to_timings:
-        data['office_timings'] = f"{from_timings} - {to_timings}"
-    elif from_timings:
-        data['office_timings'] = from_timings
-    elif to_timings:
-        data['office_timings'] = to_timings
-
-    # Auto-assign system fields
-    data['createdby'] = current_user.id
-    data['updatedby'] = current_user.id
-    if not data.get('company_id'):
-        data['company_id'] = 1  # Default company
+    data = pre_lead_create_data(pre_lead_data, current_user.id)
 
     pre_lead = PreLead(**data)
     db.add(pre_lead)
+    db.flush()  # Get pre-lead ID
+
+    enqueue_event(
+        db, WebhookEvent.PRE_LEAD_CREATED,
+        {"pre_lead": PreLeadResponse.model_validate(pre_lead)},
+        entity_type="pre_lead", entity_id=pre_lead.id
+    )
+
     db.commit()
     db.refresh(pre_lead)
 
     return pre_lead
 
 
+def filter_pre_leads(
+    query,
+    search: Optional[str] = None,
+    status: Optional[int] = None,
+    source: Optional[PreLeadSource] = None,
+    assigned_to: Optional[int] = None
+):
+    """Apply the list_pre_leads and export filters; returns the query and the search ranking"""
+    query, search_order = apply_search(query, search, PRE_LEAD_SEARCH_COLUMNS)
+
+    # Filter by status (0 = active, 1 = discarded)
+    if status is not None:
+        query = query.filter(PreLead.status == status)
+        # For active pre-leads (status=0), exclude converted ones
+        if status == 0:
+            query = query.filter(PreLead.is_converted == False)
+
+    if source:
+        query = query.filter(PreLead.source == source)
+
+    if assigned_to:
+        query = query.filter(PreLead.assigned_to == assigned_to)
+
+    return query, search_order
+
+
 @router.get("/", response_model=PreLeadListResponse)
 def list_pre_leads(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
     search: Optional[str] = None,
     status: Optional[int] = None,  # 0 = active, 1 = discarded
     source: Optional[PreLeadSource] = None,
@@ -66,54 +93,77 @@ def list_pre_leads(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List pre-leads with filtering and pagination"""
+    """
+    List pre-leads with filtering and pagination
+
+    Pass the previous response's `next_cursor` as `cursor` for keyset
+    pagination (page is then ignored); `count=estimated|none` makes the
+    total approximate or skips it. Search results are ranked by relevance
+    and use page mode.
+    """
     if not check_permission(current_user.role, "pre_leads", "read"):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    query = db.query(PreLead)
+    query, search_order = filter_pre_leads(db.query(PreLead), search, status, source, assigned_to)
 
-    # Apply filters
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                PreLead.first_name.ilike(search_term),
-                PreLead.last_name.ilike(search_term),
-                PreLead.email.ilike(search_term),
-                PreLead.phone.ilike(search_term),
-                PreLead.company_name.ilike(search_term)
-            )
-        )
+    return PreLeadListResponse(**paginate(query, PreLead, page, page_size, cursor, count, search_order))
 
-    # Filter by status (0 = active, 1 = discarded)
-    if status is not None:
-        query = query.filter(PreLead.status == status)
-        # For active pre-leads (status=0), exclude converted ones
-        if status == 0:
-            query = query.filter(PreLead.is_converted == False)
 
-    if source:
-        query = query.filter(PreLead.source == source)
+@router.get("/export")
+def export_pre_leads(
+    format: ExportFormat = ExportFormat.CSV,
+    search: Optional[str] = None,
+    status: Optional[int] = None,
+    source: Optional[PreLeadSource] = None,
+    assigned_to: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export all pre-leads matching the list filters as CSV or NDJSON
 
-    if assigned_to:
-        query = query.filter(PreLead.assigned_to == assigned_to)
+    The file is streamed, so there is no page size limit.
+    """
+    if not check_permission(current_user.role, "pre_leads", "read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
 
-    # Get total count
-    total = query.count()
+    query, _ = filter_pre_leads(db.query(PreLead), search, status, source, assigned_to)
+    return stream_export(query, PreLead, format, "pre-leads")
 
-    # Apply pagination
-    offset = (page - 1) * page_size
-    pre_leads = query.order_by(PreLead.created_at.desc()).offset(offset).limit(page_size).all()
 
-    total_pages = (total + page_size - 1) // page_size
+@router.post("/import", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def import_pre_leads(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bulk import pre-leads from a CSV or XLSX file
 
-    return PreLeadListResponse(
-        items=pre_leads,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    The first row holds the column names (PreLeadCreate field names). Rows are
+    validated and inserted in chunks by a background job; poll
+    GET /import/{job_id} for progress and per-row errors. assigned_to
+    accepts a user id, email or full name; country/state/city names are
+    resolved to their ids.
+    """
+    if not check_permission(current_user.role, "pre_leads", "create"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    return start_import(db, file, "pre_lead", current_user, background_tasks)
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+def get_pre_lead_import(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Progress and row errors of a pre-leads import job"""
+    if not check_permission(current_user.role, "pre_leads", "create"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    return get_import_job(db, job_id, "pre_lead", current_user)
 
 
 @router.get("/{pre_lead_id}", response_model=PreLeadResponse)
@@ -256,11 +306,15 @@ def validate_pre_lead(
     pre_lead.converted_lead_id = lead.id
     pre_lead.converted_at = datetime.utcnow()
 
+    enqueue_event(
+        db, WebhookEvent.LEAD_VALIDATED,
+        {"pre_lead_id": pre_lead.id, "lead": LeadResponse.model_validate(lead)},
+        entity_type="lead", entity_id=lead.id
+    )
+
     db.commit()
     db.refresh(lead)
 
-    # TODO: Trigger outgoing webhook for lead_validated event
-
     return {
         "message": "Pre-lead validated and converted to lead",
         "lead_id": lead.id
@@ -4,6 +4,7 @@ from typing import Optional
 
 from app.core.database import get_db
 from app.models.customer_requirement import CustomerRequirement, CRDiligenceShortForm, CRMeetingCalendar, CRPresentationMeeting
+from app.services.cr_pdf import invalidate_cr_pdfs
 from app.schemas.customer_requirement import (
     CRDiligenceShortFormUpdate, CRDiligenceShortFormResponse,
     CRMeetingCalendarUpdate, CRMeetingCalendarResponse,
@@ -73,6 +74,7 @@ def update_public_diligence_form(
         setattr(form, field, value)
 
     db.commit()
+    invalidate_cr_pdfs(cr.id)
     db.refresh(form)
 
     return form
@@ -256,6 +258,7 @@ def update_public_meeting_calendar(
     form.gi_branch_office = cr.branch_office
 
     db.commit()
+    invalidate_cr_pdfs(cr.id)
     db.refresh(form)
 
     # Return fresh data
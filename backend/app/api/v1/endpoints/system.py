@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_admin_user
+from app.models.user import User
+from app.core.http_cache import cache_stats
+from app.core.password_hashing import password_hasher
+from app.core.pool_metrics import get_pool_stats, reset_pool_metrics
+from app.services.email_campaigns import email_campaign_worker
+from app.services.pdf_rendering import pdf_renderer
+from app.services.webhook_log_writer import webhook_log_writer
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(current_user: User = Depends(get_admin_user)):
+    """
+    Connection pool statistics for this worker process (Admin only)
+
+    Reports live checkouts/overflow plus wait-time and checkout-duration
+    histograms (milliseconds, cumulative buckets) since start or last reset.
+    Each uvicorn worker has its own pools; `pid` identifies the worker.
+    """
+    return get_pool_stats()
+
+
+@router.post("/db-pool/reset")
+def reset_db_pool_stats(current_user: User = Depends(get_admin_user)):
+    """Reset the pool histograms and counters for this worker (Admin only)"""
+    reset_pool_metrics()
+    return {"message": "Pool metrics reset"}
+
+
+@router.get("/webhook-log-writer")
+def get_webhook_log_writer_stats(current_user: User = Depends(get_admin_user)):
+    """
+    Incoming webhook log writer status for this worker process (Admin only)
+
+    `queued` rows are not yet in the database; `fallbacks` counts rows written
+    in the request's transaction because the queue stayed full.
+    """
+    return webhook_log_writer.stats()
+
+
+@router.get("/response-cache")
+def get_response_cache_stats(current_user: User = Depends(get_admin_user)):
+    """Response / reference data cache namespaces for this worker (Admin only)"""
+    return cache_stats()
+
+
+@router.get("/password-hasher")
+def get_password_hasher_stats(current_user: User = Depends(get_admin_user)):
+    """
+    Password hashing executor status for this worker process (Admin only)
+
+    `pending` counts hashes queued or running, `queued` those waiting for a
+    free hasher; logins are rejected with 503 once `max_pending` is reached.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/email-worker")
+def get_email_worker_stats(current_user: User = Depends(get_admin_user)):
+    """
+    Email campaign worker status for this process (Admin only)
+
+    Counts are since startup; `deferred` are sends postponed by the
+    per-domain rate limits.
+    """
+    return email_campaign_worker.stats()
+
+
+@router.get("/pdf-renderer")
+def get_pdf_renderer_stats(current_user: User = Depends(get_admin_user)):
+    """
+    PDF rendering status for this process (Admin only)
+
+    `hits` are served from the cache, `inline` and `process` are renders in
+    the request thread and on the worker processes.
+    """
+    return pdf_renderer.stats()
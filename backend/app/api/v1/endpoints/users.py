@@ -4,10 +4,11 @@ from typing import List, Optional
 
 from app.core.database import get_db
 from app.core.security import get_password_hash
-from app.api.deps import get_current_user, get_admin_user
+from app.api.deps import get_current_user, get_admin_user, invalidate_user
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
 from app.core.permissions import UserRole
+from app.services.reference_data import user_name_cache
 
 router = APIRouter()
 
@@ -36,6 +37,8 @@ def update_current_user_profile(
         setattr(current_user, field, value)
 
     db.commit()
+    invalidate_user(current_user.id)
+    user_name_cache.invalidate()
     db.refresh(current_user)
     return current_user
 
@@ -96,6 +99,8 @@ def update_user(
         setattr(user, field, value)
 
     db.commit()
+    invalidate_user(user.id)
+    user_name_cache.invalidate()
     db.refresh(user)
     return user
 
@@ -122,4 +127,6 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
+    user_name_cache.invalidate()
     return {"message": "User deleted successfully"}
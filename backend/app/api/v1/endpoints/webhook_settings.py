@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel
 import json
 import httpx
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.webhook_setting import MenuWebhookSetting, MenuWebhookConfig
@@ -315,12 +316,15 @@ def update_webhook_config(
 @router.post("/config/{menu_key}/test")
 async def test_webhook(
     menu_key: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Test webhook configuration by sending a test request"""
+    config = None
     try:
-        config = db.query(MenuWebhookConfig).filter(MenuWebhookConfig.menu_key == menu_key).first()
+        config = (await db.execute(
+            select(MenuWebhookConfig).where(MenuWebhookConfig.menu_key == menu_key)
+        )).scalars().first()
 
         if not config or not config.webhook_url:
             raise HTTPException(status_code=400, detail="Webhook URL not configured")
@@ -352,7 +356,7 @@ async def test_webhook(
         config.last_triggered_at = datetime.utcnow()
         config.last_status = "success" if response.status_code < 400 else "failed"
         config.last_error = None if response.status_code < 400 else f"HTTP {response.status_code}"
-        db.commit()
+        await db.commit()
 
         return {
             "success": response.status_code < 400,
@@ -365,14 +369,14 @@ async def test_webhook(
             config.last_triggered_at = datetime.utcnow()
             config.last_status = "failed"
             config.last_error = "Connection timeout"
-            db.commit()
+            await db.commit()
         return {"success": False, "message": "Connection timeout"}
     except httpx.RequestError as e:
         if config:
             config.last_triggered_at = datetime.utcnow()
             config.last_status = "failed"
             config.last_error = str(e)
-            db.commit()
+            await db.commit()
         return {"success": False, "message": f"Connection error: {str(e)}"}
     except Exception as e:
         print(f"Error testing webhook: {e}")
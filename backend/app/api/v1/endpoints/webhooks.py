@@ -1,50 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Header
 from sqlalchemy.orm import Session
-from typing import Optional
-from datetime import datetime
-import hashlib
-import hmac
-import json
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.config import settings
 from app.api.deps import get_current_user
 from app.models.user import User
-from app.models.webhook import WebhookConfig, WebhookLog, WebhookDirection, WebhookEvent
-from app.models.pre_lead import PreLead, PreLeadSource
-from app.models.lead import Lead, LeadSource, LeadPriority
+from app.models.webhook import WebhookConfig, WebhookLog, WebhookDirection
 from app.schemas.webhook import (
     WebhookConfigCreate, WebhookConfigUpdate, WebhookConfigResponse,
     WebhookLogResponse, IncomingWebhookPayload,
     WebhookConfigListResponse, WebhookLogListResponse
 )
 from app.core.permissions import check_permission
+from app.services.incoming_webhooks import dispatch_incoming_webhook, process_incoming_batch
 
 router = APIRouter()
 
 
-def verify_webhook_signature(payload: bytes, signature: str, secret: str) -> bool:
-    """Verify HMAC signature of incoming webhook"""
-    expected = hmac.new(
-        secret.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
-    return hmac.compare_digest(signature, expected)
-
-
-def log_webhook(db: Session, direction: WebhookDirection, event: str, payload: dict,
-                entity_type: str = None, entity_id: int = None) -> WebhookLog:
-    """Create a webhook log entry"""
-    log = WebhookLog(
-        direction=direction,
-        event=WebhookEvent(event) if event in [e.value for e in WebhookEvent] else None,
-        method="POST",
-        request_payload=payload,
-        entity_type=entity_type,
-        entity_id=entity_id
-    )
-    return log
+async def run_entity_webhook(db: AsyncSession, request: Request, payload: IncomingWebhookPayload,
+                             signature: Optional[str], event: str, **params) -> dict:
+    """Run the registered handler for a per-entity route (path ids in params)"""
+    handler, data = await dispatch_incoming_webhook(db, request, payload, signature, event, params)
+    return {
+        "status": "success",
+        "message": handler.message,
+        "data": data
+    }
 
 
 # ================== INCOMING WEBHOOKS - PRE-LEAD ==================
@@ -54,7 +37,7 @@ async def webhook_create_pre_lead(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new pre-lead via webhook
@@ -80,84 +63,9 @@ async def webhook_create_pre_lead(
     - office_timings: str
     - timezone: str
     """
-    log = log_webhook(db, WebhookDirection.INCOMING, "new_inquiry", payload.model_dump())
-
-    try:
-        if x_webhook_signature and settings.WEBHOOK_SECRET:
-            body = await request.body()
-            if not verify_webhook_signature(body, x_webhook_signature, settings.WEBHOOK_SECRET):
-                log.is_successful = False
-                log.error_message = "Invalid webhook signature"
-                db.add(log)
-                db.commit()
-                raise HTTPException(status_code=401, detail="Invalid signature")
-
-        data = payload.data
-
-        # Map source string to enum
-        source_mapping = {
-            "website": PreLeadSource.WEBSITE,
-            "referral": PreLeadSource.REFERRAL,
-            "social_media": PreLeadSource.SOCIAL_MEDIA,
-            "cold_call": PreLeadSource.COLD_CALL,
-            "walk_in": PreLeadSource.WALK_IN,
-            "whatsapp": PreLeadSource.WHATSAPP,
-            "email": PreLeadSource.EMAIL,
-            "erp": PreLeadSource.ERP,
-            "other": PreLeadSource.OTHER,
-        }
-        source_value = data.get("source") or payload.source
-        source_enum = source_mapping.get(source_value, PreLeadSource.WEBSITE)
-
-        pre_lead = PreLead(
-            first_name=data.get("first_name") or data.get("company_name") or "Unknown",
-            last_name=data.get("last_name"),
-            email=data.get("email"),
-            phone=data.get("phone"),
-            company_name=data.get("company_name"),
-            source=source_enum,
-            source_details=f"Webhook: {payload.source}",
-            product_interest=data.get("product_interest"),
-            requirements=data.get("requirements"),
-            city=data.get("city"),
-            state=data.get("state"),
-            country=data.get("country", "India"),
-            notes=data.get("notes"),
-            address_line1=data.get("address_line1"),
-            address_line2=data.get("address_line2"),
-            zip_code=data.get("zip_code"),
-            lead_status=data.get("lead_status"),
-            industry_id=data.get("industry_id"),
-            region_id=data.get("region_id"),
-            office_timings=data.get("office_timings"),
-            timezone=data.get("timezone"),
-            company_id=data.get("company_id") or 1,
-        )
-        db.add(pre_lead)
-        db.flush()
-
-        log.entity_type = "pre_lead"
-        log.entity_id = pre_lead.id
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Pre-lead created successfully",
-            "data": {"pre_lead_id": pre_lead.id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "new_inquiry"
+    )
 
 
 @router.post("/incoming/pre-lead/{pre_lead_id}/update", status_code=status.HTTP_200_OK)
@@ -166,7 +74,7 @@ async def webhook_update_pre_lead(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing pre-lead via webhook
@@ -184,50 +92,9 @@ async def webhook_update_pre_lead(
     - office_timings, timezone: str
     - notes, remarks: str
     """
-    log = log_webhook(db, WebhookDirection.INCOMING, "pre_lead_update", payload.model_dump(), "pre_lead", pre_lead_id)
-
-    try:
-        pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
-        if not pre_lead:
-            raise HTTPException(status_code=404, detail="Pre-lead not found")
-
-        data = payload.data
-
-        # Update fields if provided
-        updatable_fields = [
-            'first_name', 'last_name', 'email', 'phone', 'company_name',
-            'product_interest', 'requirements', 'city', 'state', 'country',
-            'address_line1', 'address_line2', 'zip_code', 'lead_status',
-            'industry_id', 'region_id', 'office_timings', 'timezone',
-            'notes', 'remarks', 'memo', 'fax', 'phone_no'
-        ]
-
-        for field in updatable_fields:
-            if field in data and data[field] is not None:
-                setattr(pre_lead, field, data[field])
-
-        pre_lead.updated_at = datetime.utcnow()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Pre-lead updated successfully",
-            "data": {"pre_lead_id": pre_lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "pre_lead_update", pre_lead_id=pre_lead_id
+    )
 
 
 @router.post("/incoming/pre-lead/{pre_lead_id}/discard", status_code=status.HTTP_200_OK)
@@ -236,7 +103,7 @@ async def webhook_discard_pre_lead(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Discard a pre-lead via webhook
@@ -246,38 +113,9 @@ async def webhook_discard_pre_lead(
     **Payload Data Fields:**
     - reason: str (optional - reason for discarding)
     """
-    log = log_webhook(db, WebhookDirection.INCOMING, "pre_lead_discard", payload.model_dump(), "pre_lead", pre_lead_id)
-
-    try:
-        pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
-        if not pre_lead:
-            raise HTTPException(status_code=404, detail="Pre-lead not found")
-
-        pre_lead.status = 1  # 1 = discarded
-        if payload.data.get("reason"):
-            pre_lead.remarks = payload.data.get("reason")
-        pre_lead.updated_at = datetime.utcnow()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Pre-lead discarded successfully",
-            "data": {"pre_lead_id": pre_lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "pre_lead_discard", pre_lead_id=pre_lead_id
+    )
 
 
 @router.post("/incoming/pre-lead/{pre_lead_id}/contact/add", status_code=status.HTTP_200_OK)
@@ -286,7 +124,7 @@ async def webhook_add_pre_lead_contact(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a contact to a pre-lead via webhook
@@ -303,51 +141,9 @@ async def webhook_add_pre_lead_contact(
     - is_primary: bool
     - contact_type: str (primary, billing, technical, decision_maker)
     """
-    from app.models.pre_lead_contact import PreLeadContact
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "pre_lead_contact_add", payload.model_dump(), "pre_lead", pre_lead_id)
-
-    try:
-        pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
-        if not pre_lead:
-            raise HTTPException(status_code=404, detail="Pre-lead not found")
-
-        data = payload.data
-
-        contact = PreLeadContact(
-            pre_lead_id=pre_lead_id,
-            first_name=data.get("first_name", "Unknown"),
-            last_name=data.get("last_name"),
-            email=data.get("email"),
-            phone=data.get("phone"),
-            designation=data.get("designation"),
-            department=data.get("department"),
-            is_primary=data.get("is_primary", False),
-            contact_type=data.get("contact_type", "primary")
-        )
-        db.add(contact)
-        db.flush()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Contact added successfully",
-            "data": {"contact_id": contact.id, "pre_lead_id": pre_lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "pre_lead_contact_add", pre_lead_id=pre_lead_id
+    )
 
 
 @router.post("/incoming/pre-lead/{pre_lead_id}/memo/add", status_code=status.HTTP_200_OK)
@@ -356,7 +152,7 @@ async def webhook_add_pre_lead_memo(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a memo to a pre-lead via webhook
@@ -368,46 +164,9 @@ async def webhook_add_pre_lead_memo(
     - content: str (required)
     - memo_type: str (general, meeting_notes, call_notes, internal, important)
     """
-    from app.models.pre_lead_memo import PreLeadMemo
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "pre_lead_memo_add", payload.model_dump(), "pre_lead", pre_lead_id)
-
-    try:
-        pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
-        if not pre_lead:
-            raise HTTPException(status_code=404, detail="Pre-lead not found")
-
-        data = payload.data
-
-        memo = PreLeadMemo(
-            pre_lead_id=pre_lead_id,
-            title=data.get("title", "Memo"),
-            content=data.get("content", ""),
-            memo_type=data.get("memo_type", "general")
-        )
-        db.add(memo)
-        db.flush()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Memo added successfully",
-            "data": {"memo_id": memo.id, "pre_lead_id": pre_lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "pre_lead_memo_add", pre_lead_id=pre_lead_id
+    )
 
 
 @router.post("/incoming/pre-lead/{pre_lead_id}/status/update", status_code=status.HTTP_200_OK)
@@ -416,7 +175,7 @@ async def webhook_update_pre_lead_status(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update pre-lead status via webhook
@@ -428,63 +187,9 @@ async def webhook_update_pre_lead_status(
     - remarks: str (optional)
     - status_date: str (optional - ISO date)
     """
-    from app.models.pre_lead_status_history import PreLeadStatusHistory
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "pre_lead_status_update", payload.model_dump(), "pre_lead", pre_lead_id)
-
-    try:
-        pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
-        if not pre_lead:
-            raise HTTPException(status_code=404, detail="Pre-lead not found")
-
-        data = payload.data
-        old_status = pre_lead.lead_status
-        new_status = data.get("lead_status")
-
-        if not new_status:
-            raise HTTPException(status_code=400, detail="lead_status is required")
-
-        pre_lead.lead_status = new_status
-        pre_lead.updated_at = datetime.utcnow()
-
-        # Parse status date
-        from datetime import date
-        status_date = date.today()
-        if data.get("status_date"):
-            try:
-                status_date = datetime.fromisoformat(data["status_date"].replace('Z', '+00:00')).date()
-            except:
-                pass
-
-        # Create status history
-        status_history = PreLeadStatusHistory(
-            pre_lead_id=pre_lead_id,
-            status=new_status,
-            status_date=status_date,
-            remarks=data.get("remarks")
-        )
-        db.add(status_history)
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Pre-lead status updated successfully",
-            "data": {"pre_lead_id": pre_lead_id, "old_status": old_status, "new_status": new_status}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "pre_lead_status_update", pre_lead_id=pre_lead_id
+    )
 
 
 @router.post("/incoming/pre-lead/{pre_lead_id}/document/add", status_code=status.HTTP_200_OK)
@@ -493,7 +198,7 @@ async def webhook_add_pre_lead_document(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a document to a pre-lead via webhook
@@ -528,70 +233,9 @@ async def webhook_add_pre_lead_document(
     }
     ```
     """
-    from app.models.lead_document import LeadDocument
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "pre_lead_document_add", payload.model_dump(), "pre_lead", pre_lead_id)
-
-    try:
-        pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
-        if not pre_lead:
-            raise HTTPException(status_code=404, detail="Pre-lead not found")
-
-        data = payload.data
-
-        # Validate required fields
-        if not data.get("name"):
-            raise HTTPException(status_code=400, detail="name is required")
-        if not data.get("original_name"):
-            raise HTTPException(status_code=400, detail="original_name is required")
-        if not data.get("file_path"):
-            raise HTTPException(status_code=400, detail="file_path is required")
-
-        # For pre-lead documents, we use lead_id as NULL and set pre_lead_id
-        # This allows tracking documents even before lead conversion
-        document = LeadDocument(
-            lead_id=pre_lead.converted_lead_id if pre_lead.is_converted else None,
-            name=data.get("name"),
-            original_name=data.get("original_name"),
-            file_path=data.get("file_path"),
-            file_type=data.get("file_type"),
-            size=data.get("size"),
-            notes=data.get("notes"),
-            uploaded_by=data.get("uploaded_by"),
-            company_id=data.get("company_id") or pre_lead.company_id,
-            pre_lead_id=pre_lead_id
-        )
-        db.add(document)
-        db.flush()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Document added to pre-lead successfully",
-            "data": {
-                "document_id": document.id,
-                "pre_lead_id": pre_lead_id,
-                "name": document.name,
-                "original_name": document.original_name,
-                "file_path": document.file_path,
-                "file_type": document.file_type,
-                "size": document.size
-            }
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "pre_lead_document_add", pre_lead_id=pre_lead_id
+    )
 
 
 @router.post("/incoming/pre-lead/{pre_lead_id}/convert", status_code=status.HTTP_200_OK)
@@ -600,7 +244,7 @@ async def webhook_convert_pre_lead_to_lead(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Convert pre-lead to lead via webhook
@@ -613,83 +257,9 @@ async def webhook_convert_pre_lead_to_lead(
     - expected_value: float
     - notes: str
     """
-    log = log_webhook(db, WebhookDirection.INCOMING, "pre_lead_convert", payload.model_dump(), "pre_lead", pre_lead_id)
-
-    try:
-        pre_lead = db.query(PreLead).filter(PreLead.id == pre_lead_id).first()
-        if not pre_lead:
-            raise HTTPException(status_code=404, detail="Pre-lead not found")
-
-        if pre_lead.is_converted:
-            raise HTTPException(status_code=400, detail="Pre-lead already converted")
-
-        data = payload.data
-
-        # Map priority
-        priority_mapping = {
-            "low": LeadPriority.LOW,
-            "medium": LeadPriority.MEDIUM,
-            "high": LeadPriority.HIGH,
-            "critical": LeadPriority.CRITICAL,
-        }
-        priority = priority_mapping.get(data.get("priority", "medium"), LeadPriority.MEDIUM)
-
-        # Create lead from pre-lead
-        lead = Lead(
-            first_name=pre_lead.first_name,
-            last_name=pre_lead.last_name,
-            email=pre_lead.email,
-            phone=pre_lead.phone,
-            company_name=pre_lead.company_name,
-            source=LeadSource.PRE_LEAD,
-            source_details=f"Converted from Pre-Lead #{pre_lead_id}",
-            priority=priority,
-            product_interest=pre_lead.product_interest,
-            requirements=pre_lead.requirements,
-            city=pre_lead.city,
-            state=pre_lead.state,
-            country=pre_lead.country,
-            address_line1=pre_lead.address_line1,
-            address_line2=pre_lead.address_line2,
-            zip_code=pre_lead.zip_code,
-            notes=data.get("notes") or pre_lead.notes,
-            pre_lead_id=pre_lead_id,
-            assigned_to=data.get("assigned_to"),
-            expected_value=data.get("expected_value"),
-            company_id=pre_lead.company_id,
-            industry_id=pre_lead.industry_id,
-            region_id=pre_lead.region_id,
-            office_timings=pre_lead.office_timings,
-            timezone=pre_lead.timezone,
-        )
-        db.add(lead)
-        db.flush()
-
-        # Update pre-lead
-        pre_lead.is_converted = True
-        pre_lead.converted_lead_id = lead.id
-        pre_lead.converted_at = datetime.utcnow()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Pre-lead converted to lead successfully",
-            "data": {"pre_lead_id": pre_lead_id, "lead_id": lead.id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "pre_lead_convert", pre_lead_id=pre_lead_id
+    )
 
 
 # ================== INCOMING WEBHOOKS - LEAD ==================
@@ -699,7 +269,7 @@ async def webhook_create_lead(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new lead via webhook
@@ -722,82 +292,9 @@ async def webhook_create_lead(
     - assigned_to: int (user ID)
     - notes: str
     """
-    log = log_webhook(db, WebhookDirection.INCOMING, "new_lead", payload.model_dump())
-
-    try:
-        data = payload.data
-
-        # Map source
-        source_mapping = {
-            "website": LeadSource.WEBSITE,
-            "referral": LeadSource.REFERRAL,
-            "social_media": LeadSource.SOCIAL_MEDIA,
-            "cold_call": LeadSource.COLD_CALL,
-            "walk_in": LeadSource.WALK_IN,
-            "whatsapp": LeadSource.WHATSAPP,
-            "email": LeadSource.EMAIL,
-            "erp": LeadSource.ERP,
-            "direct": LeadSource.DIRECT,
-            "other": LeadSource.OTHER,
-        }
-        source = source_mapping.get(data.get("source", "website"), LeadSource.WEBSITE)
-
-        # Map priority
-        priority_mapping = {
-            "low": LeadPriority.LOW,
-            "medium": LeadPriority.MEDIUM,
-            "high": LeadPriority.HIGH,
-            "critical": LeadPriority.CRITICAL,
-        }
-        priority = priority_mapping.get(data.get("priority", "medium"), LeadPriority.MEDIUM)
-
-        lead = Lead(
-            first_name=data.get("first_name") or data.get("company_name") or "Unknown",
-            last_name=data.get("last_name"),
-            email=data.get("email"),
-            phone=data.get("phone"),
-            company_name=data.get("company_name"),
-            source=source,
-            source_details=f"Webhook: {payload.source}",
-            priority=priority,
-            product_interest=data.get("product_interest"),
-            requirements=data.get("requirements"),
-            expected_value=data.get("expected_value"),
-            city=data.get("city"),
-            state=data.get("state"),
-            country=data.get("country", "India"),
-            address_line1=data.get("address_line1"),
-            address_line2=data.get("address_line2"),
-            zip_code=data.get("zip_code"),
-            assigned_to=data.get("assigned_to"),
-            notes=data.get("notes"),
-            company_id=data.get("company_id") or 1,
-        )
-        db.add(lead)
-        db.flush()
-
-        log.entity_type = "lead"
-        log.entity_id = lead.id
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Lead created successfully",
-            "data": {"lead_id": lead.id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "new_lead"
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/update", status_code=status.HTTP_200_OK)
@@ -806,7 +303,7 @@ async def webhook_update_lead(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing lead via webhook
@@ -824,63 +321,9 @@ async def webhook_update_lead(
     - priority: str (low, medium, high, critical)
     - notes, remarks: str
     """
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_update", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        data = payload.data
-
-        # Update fields if provided
-        updatable_fields = [
-            'first_name', 'last_name', 'email', 'phone', 'alternate_phone',
-            'company_name', 'company_code', 'designation', 'company_size',
-            'industry', 'website', 'product_interest', 'requirements',
-            'expected_value', 'city', 'state', 'country',
-            'address_line1', 'address_line2', 'zip_code', 'pincode',
-            'lead_status', 'notes', 'remarks', 'memo',
-            'industry_id', 'region_id', 'office_timings', 'timezone',
-            'fax', 'phone_no', 'lead_score'
-        ]
-
-        for field in updatable_fields:
-            if field in data and data[field] is not None:
-                setattr(lead, field, data[field])
-
-        # Handle priority separately
-        if "priority" in data:
-            priority_mapping = {
-                "low": LeadPriority.LOW,
-                "medium": LeadPriority.MEDIUM,
-                "high": LeadPriority.HIGH,
-                "critical": LeadPriority.CRITICAL,
-            }
-            lead.priority = priority_mapping.get(data["priority"], lead.priority)
-
-        lead.updated_at = datetime.utcnow()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Lead updated successfully",
-            "data": {"lead_id": lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_update", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/discard", status_code=status.HTTP_200_OK)
@@ -889,7 +332,7 @@ async def webhook_discard_lead(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Discard a lead via webhook
@@ -900,40 +343,9 @@ async def webhook_discard_lead(
     - reason: str (optional - reason for discarding)
     - loss_reason: str (optional - specific loss reason)
     """
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_discard", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        lead.status = 1  # 1 = discarded
-        if payload.data.get("reason"):
-            lead.remarks = payload.data.get("reason")
-        if payload.data.get("loss_reason"):
-            lead.loss_reason = payload.data.get("loss_reason")
-        lead.updated_at = datetime.utcnow()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Lead discarded successfully",
-            "data": {"lead_id": lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_discard", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/contact/add", status_code=status.HTTP_200_OK)
@@ -942,7 +354,7 @@ async def webhook_add_lead_contact(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a contact to a lead via webhook
@@ -959,51 +371,9 @@ async def webhook_add_lead_contact(
     - is_primary: bool
     - contact_type: str (primary, billing, technical, decision_maker)
     """
-    from app.models.lead_contact import LeadContact
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_contact_add", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        data = payload.data
-
-        contact = LeadContact(
-            lead_id=lead_id,
-            first_name=data.get("first_name", "Unknown"),
-            last_name=data.get("last_name"),
-            email=data.get("email"),
-            phone=data.get("phone"),
-            designation=data.get("designation"),
-            department=data.get("department"),
-            is_primary=data.get("is_primary", False),
-            contact_type=data.get("contact_type", "primary")
-        )
-        db.add(contact)
-        db.flush()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Contact added successfully",
-            "data": {"contact_id": contact.id, "lead_id": lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_contact_add", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/activity/add", status_code=status.HTTP_200_OK)
@@ -1012,7 +382,7 @@ async def webhook_add_lead_activity(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add an activity to a lead via webhook
@@ -1028,72 +398,9 @@ async def webhook_add_lead_activity(
     - outcome: str
     - is_completed: bool
     """
-    from app.models.lead_activity import LeadActivity
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_activity_add", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        data = payload.data
-
-        # Parse activity date
-        from datetime import date
-        activity_date = date.today()
-        if data.get("activity_date"):
-            try:
-                activity_date = datetime.fromisoformat(data["activity_date"].replace('Z', '+00:00')).date()
-            except:
-                pass
-
-        due_date = None
-        if data.get("due_date"):
-            try:
-                due_date = datetime.fromisoformat(data["due_date"].replace('Z', '+00:00')).date()
-            except:
-                pass
-
-        completed_at = None
-        is_completed = data.get("is_completed", False)
-        if is_completed:
-            completed_at = datetime.utcnow()
-
-        activity = LeadActivity(
-            lead_id=lead_id,
-            activity_type=data.get("activity_type", "note"),
-            subject=data.get("subject") or data.get("title", "Activity"),
-            description=data.get("description"),
-            activity_date=activity_date,
-            due_date=due_date,
-            outcome=data.get("outcome"),
-            is_completed=is_completed,
-            completed_at=completed_at
-        )
-        db.add(activity)
-        db.flush()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Activity added successfully",
-            "data": {"activity_id": activity.id, "lead_id": lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_activity_add", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/qualified-profile/update", status_code=status.HTTP_200_OK)
@@ -1102,7 +409,7 @@ async def webhook_update_lead_qualified_profile(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update lead qualified profile via webhook
@@ -1126,56 +433,9 @@ async def webhook_update_lead_qualified_profile(
     - requirements: str
     - notes: str
     """
-    from app.models.lead_qualified_profile import LeadQualifiedProfile
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_qualified_profile_update", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        data = payload.data
-
-        # Find or create profile
-        profile = db.query(LeadQualifiedProfile).filter(LeadQualifiedProfile.lead_id == lead_id).first()
-
-        if not profile:
-            profile = LeadQualifiedProfile(lead_id=lead_id)
-            db.add(profile)
-
-        # Update fields
-        updatable_fields = [
-            'profile_type', 'company_name', 'company_type', 'industry_id',
-            'annual_revenue', 'employee_count', 'decision_maker', 'decision_process',
-            'budget', 'timeline', 'competitors', 'current_solution',
-            'pain_points', 'requirements', 'notes'
-        ]
-
-        for field in updatable_fields:
-            if field in data and data[field] is not None:
-                setattr(profile, field, data[field])
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Qualified profile updated successfully",
-            "data": {"lead_id": lead_id, "profile_id": profile.id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_qualified_profile_update", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/memo/add", status_code=status.HTTP_200_OK)
@@ -1184,7 +444,7 @@ async def webhook_add_lead_memo(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a memo to a lead via webhook
@@ -1196,46 +456,9 @@ async def webhook_add_lead_memo(
     - content: str (required)
     - memo_type: str (general, meeting_notes, call_notes, internal, important)
     """
-    from app.models.lead_memo import LeadMemo
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_memo_add", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        data = payload.data
-
-        memo = LeadMemo(
-            lead_id=lead_id,
-            title=data.get("title", "Memo"),
-            content=data.get("content", ""),
-            memo_type=data.get("memo_type", "general")
-        )
-        db.add(memo)
-        db.flush()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Memo added successfully",
-            "data": {"memo_id": memo.id, "lead_id": lead_id}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_memo_add", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/document/add", status_code=status.HTTP_200_OK)
@@ -1244,7 +467,7 @@ async def webhook_add_lead_document(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a document to a lead via webhook
@@ -1281,68 +504,9 @@ async def webhook_add_lead_document(
     }
     ```
     """
-    from app.models.lead_document import LeadDocument
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_document_add", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        data = payload.data
-
-        # Validate required fields
-        if not data.get("name"):
-            raise HTTPException(status_code=400, detail="name is required")
-        if not data.get("original_name"):
-            raise HTTPException(status_code=400, detail="original_name is required")
-        if not data.get("file_path"):
-            raise HTTPException(status_code=400, detail="file_path is required")
-
-        document = LeadDocument(
-            lead_id=lead_id,
-            name=data.get("name"),
-            original_name=data.get("original_name"),
-            file_path=data.get("file_path"),
-            file_type=data.get("file_type"),
-            size=data.get("size"),
-            notes=data.get("notes"),
-            uploaded_by=data.get("uploaded_by"),
-            company_id=data.get("company_id") or lead.company_id,
-            pre_lead_id=data.get("pre_lead_id") or lead.pre_lead_id
-        )
-        db.add(document)
-        db.flush()
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Document added successfully",
-            "data": {
-                "document_id": document.id,
-                "lead_id": lead_id,
-                "name": document.name,
-                "original_name": document.original_name,
-                "file_path": document.file_path,
-                "file_type": document.file_type,
-                "size": document.size
-            }
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_document_add", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/document/{document_id}/update", status_code=status.HTTP_200_OK)
@@ -1352,7 +516,7 @@ async def webhook_update_lead_document(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a lead document via webhook
@@ -1383,63 +547,9 @@ async def webhook_update_lead_document(
     }
     ```
     """
-    from app.models.lead_document import LeadDocument
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_document_update", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        document = db.query(LeadDocument).filter(
-            LeadDocument.id == document_id,
-            LeadDocument.lead_id == lead_id
-        ).first()
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-
-        data = payload.data
-
-        # Update fields if provided
-        updatable_fields = [
-            'name', 'original_name', 'file_path', 'file_type',
-            'size', 'notes', 'uploaded_by', 'company_id', 'pre_lead_id'
-        ]
-
-        for field in updatable_fields:
-            if field in data and data[field] is not None:
-                setattr(document, field, data[field])
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Document updated successfully",
-            "data": {
-                "document_id": document.id,
-                "lead_id": lead_id,
-                "name": document.name,
-                "original_name": document.original_name,
-                "file_path": document.file_path,
-                "file_type": document.file_type,
-                "size": document.size,
-                "notes": document.notes
-            }
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_document_update", lead_id=lead_id, document_id=document_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/document/{document_id}/delete", status_code=status.HTTP_200_OK)
@@ -1449,7 +559,7 @@ async def webhook_delete_lead_document(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a lead document via webhook
@@ -1470,50 +580,9 @@ async def webhook_delete_lead_document(
     }
     ```
     """
-    from app.models.lead_document import LeadDocument
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_document_delete", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        document = db.query(LeadDocument).filter(
-            LeadDocument.id == document_id,
-            LeadDocument.lead_id == lead_id
-        ).first()
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-
-        document_info = {
-            "document_id": document.id,
-            "name": document.name,
-            "original_name": document.original_name
-        }
-
-        db.delete(document)
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Document deleted successfully",
-            "data": document_info
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_document_delete", lead_id=lead_id, document_id=document_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/status/update", status_code=status.HTTP_200_OK)
@@ -1522,7 +591,7 @@ async def webhook_update_lead_status(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update lead status via webhook
@@ -1534,63 +603,9 @@ async def webhook_update_lead_status(
     - remarks: str (optional)
     - status_date: str (optional - ISO date)
     """
-    from app.models.lead_status_history import LeadStatusHistory
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_status_update", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        data = payload.data
-        old_status = lead.lead_status
-        new_status = data.get("lead_status")
-
-        if not new_status:
-            raise HTTPException(status_code=400, detail="lead_status is required")
-
-        lead.lead_status = new_status
-        lead.updated_at = datetime.utcnow()
-
-        # Parse status date
-        from datetime import date
-        status_date = date.today()
-        if data.get("status_date"):
-            try:
-                status_date = datetime.fromisoformat(data["status_date"].replace('Z', '+00:00')).date()
-            except:
-                pass
-
-        # Create status history
-        status_history = LeadStatusHistory(
-            lead_id=lead_id,
-            status=new_status,
-            status_date=status_date,
-            remarks=data.get("remarks")
-        )
-        db.add(status_history)
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Lead status updated successfully",
-            "data": {"lead_id": lead_id, "old_status": old_status, "new_status": new_status}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_status_update", lead_id=lead_id
+    )
 
 
 @router.post("/incoming/lead/{lead_id}/convert", status_code=status.HTTP_200_OK)
@@ -1599,7 +614,7 @@ async def webhook_convert_lead_to_customer(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Convert lead to customer via webhook
@@ -1612,77 +627,9 @@ async def webhook_convert_lead_to_customer(
     - payment_terms: str
     - notes: str
     """
-    from app.models.customer import Customer, CustomerStatus
-
-    log = log_webhook(db, WebhookDirection.INCOMING, "lead_convert", payload.model_dump(), "lead", lead_id)
-
-    try:
-        lead = db.query(Lead).filter(Lead.id == lead_id).first()
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-
-        if lead.is_converted:
-            raise HTTPException(status_code=400, detail="Lead already converted")
-
-        data = payload.data
-
-        # Generate customer code if not provided
-        customer_code = data.get("customer_code")
-        if not customer_code:
-            import random
-            import string
-            customer_code = f"CUST-{''.join(random.choices(string.ascii_uppercase + string.digits, k=8))}"
-
-        # Create customer from lead
-        customer = Customer(
-            customer_code=customer_code,
-            first_name=lead.first_name,
-            last_name=lead.last_name,
-            email=lead.email,
-            phone=lead.phone,
-            company_name=lead.company_name,
-            industry=lead.industry,
-            website=lead.website,
-            address=lead.address,
-            city=lead.city,
-            state=lead.state,
-            country=lead.country,
-            pincode=lead.pincode,
-            status=CustomerStatus.ACTIVE,
-            credit_limit=data.get("credit_limit", 0),
-            payment_terms=data.get("payment_terms"),
-            notes=data.get("notes") or lead.notes,
-            lead_id=lead_id,
-        )
-        db.add(customer)
-        db.flush()
-
-        # Update lead
-        lead.is_converted = True
-        lead.converted_customer_id = customer.id
-        lead.converted_at = datetime.utcnow()
-        lead.lead_status = "won"
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {
-            "status": "success",
-            "message": "Lead converted to customer successfully",
-            "data": {"lead_id": lead_id, "customer_id": customer.id, "customer_code": customer_code}
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_entity_webhook(
+        db, request, payload, x_webhook_signature, "lead_convert", lead_id=lead_id
+    )
 
 
 # ================== GENERIC INCOMING WEBHOOK ==================
@@ -1692,30 +639,41 @@ async def receive_incoming_webhook(
     request: Request,
     payload: IncomingWebhookPayload,
     x_webhook_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generic incoming webhook endpoint - routes to appropriate handler based on event type
 
+    Every event handled by the per-entity routes is accepted here too; ids
+    that those routes take from the path are read from `data` instead.
+
+    Send an `Idempotency-Key` header (or `idempotency_key` in the payload) to
+    make retries safe: a repeated key returns the original response without
+    processing the event again. This applies to every incoming route.
+
     **Supported Events:**
 
-    **Pre-Lead Events:**
+    **Pre-Lead Events:** (all but `new_inquiry` require pre_lead_id in data)
     - `new_inquiry` - Create new pre-lead
-    - `pre_lead_update` - Update pre-lead (requires pre_lead_id in data)
-    - `pre_lead_discard` - Discard pre-lead (requires pre_lead_id in data)
+    - `pre_lead_update` - Update pre-lead
+    - `pre_lead_discard` - Discard pre-lead
     - `pre_lead_contact_add` - Add contact to pre-lead
     - `pre_lead_memo_add` - Add memo to pre-lead
     - `pre_lead_status_update` - Update pre-lead status
+    - `pre_lead_document_add` - Add document to pre-lead
     - `pre_lead_convert` - Convert pre-lead to lead
 
-    **Lead Events:**
+    **Lead Events:** (all but `new_lead` require lead_id in data)
     - `new_lead` - Create new lead
-    - `lead_update` - Update lead (requires lead_id in data)
-    - `lead_discard` - Discard lead (requires lead_id in data)
+    - `lead_update` - Update lead
+    - `lead_discard` - Discard lead
     - `lead_contact_add` - Add contact to lead
     - `lead_activity_add` - Add activity to lead
     - `lead_qualified_profile_update` - Update qualified profile
     - `lead_memo_add` - Add memo to lead
+    - `lead_document_add` - Add document to lead
+    - `lead_document_update` - Update document (also requires document_id)
+    - `lead_document_delete` - Delete document (also requires document_id)
     - `lead_status_update` - Update lead status
     - `lead_convert` - Convert lead to customer
 
@@ -1723,177 +681,42 @@ async def receive_incoming_webhook(
     - `order_created` - Update customer order stats
     - `payment_received` - Update customer payment info
     """
-    log = WebhookLog(
-        direction=WebhookDirection.INCOMING,
-        event=WebhookEvent(payload.event) if payload.event in [e.value for e in WebhookEvent] else None,
-        method="POST",
-        request_payload=payload.model_dump(),
-        entity_type=None,
-        entity_id=None
+    _, result = await dispatch_incoming_webhook(
+        db, request, payload, x_webhook_signature, payload.event
     )
+    return {"status": "success", "result": result}
 
-    try:
-        # Verify signature if provided
-        if x_webhook_signature and settings.WEBHOOK_SECRET:
-            body = await request.body()
-            if not verify_webhook_signature(body, x_webhook_signature, settings.WEBHOOK_SECRET):
-                log.is_successful = False
-                log.error_message = "Invalid webhook signature"
-                db.add(log)
-                db.commit()
-                raise HTTPException(status_code=401, detail="Invalid signature")
-
-        result = {}
-        data = payload.data
-
-        # Pre-Lead Events
-        if payload.event == "new_inquiry":
-            source_mapping = {
-                "website": PreLeadSource.WEBSITE,
-                "referral": PreLeadSource.REFERRAL,
-                "social_media": PreLeadSource.SOCIAL_MEDIA,
-                "cold_call": PreLeadSource.COLD_CALL,
-                "walk_in": PreLeadSource.WALK_IN,
-                "whatsapp": PreLeadSource.WHATSAPP,
-                "email": PreLeadSource.EMAIL,
-                "erp": PreLeadSource.ERP,
-                "other": PreLeadSource.OTHER,
-            }
-            source_value = data.get("lead_source") or data.get("source") or payload.source
-            source_enum = source_mapping.get(source_value, PreLeadSource.WEBSITE)
-            if payload.source == "erp":
-                source_enum = PreLeadSource.ERP
-
-            office_timings = data.get("office_timings")
-            if not office_timings:
-                from_timings = data.get("from_timings")
-                to_timings = data.get("to_timings")
-                if from_timings and to_timings:
-                    office_timings = f"{from_timings} - {to_timings}"
-
-            pre_lead = PreLead(
-                first_name=data.get("first_name") or data.get("company_name") or "Unknown",
-                last_name=data.get("last_name"),
-                email=data.get("email"),
-                phone=data.get("phone"),
-                company_name=data.get("company_name"),
-                source=source_enum,
-                source_details=f"Webhook: {payload.source}",
-                product_interest=data.get("product_interest"),
-                requirements=data.get("requirements"),
-                city=data.get("city"),
-                state=data.get("state"),
-                country=data.get("country", "India"),
-                notes=data.get("notes"),
-                address_line1=data.get("address_line1") or data.get("address"),
-                address_line2=data.get("address_line2"),
-                zip_code=data.get("zip_code") or data.get("postal_code"),
-                lead_status=data.get("lead_status"),
-                industry_id=data.get("industry_id"),
-                region_id=data.get("region_id"),
-                office_timings=office_timings,
-                timezone=data.get("timezone"),
-                company_id=data.get("company_id") or 1,
-            )
-            db.add(pre_lead)
-            db.flush()
-            log.entity_type = "pre_lead"
-            log.entity_id = pre_lead.id
-            result = {"pre_lead_id": pre_lead.id}
-
-        elif payload.event == "new_lead":
-            source_mapping = {
-                "website": LeadSource.WEBSITE,
-                "referral": LeadSource.REFERRAL,
-                "social_media": LeadSource.SOCIAL_MEDIA,
-                "cold_call": LeadSource.COLD_CALL,
-                "walk_in": LeadSource.WALK_IN,
-                "whatsapp": LeadSource.WHATSAPP,
-                "email": LeadSource.EMAIL,
-                "erp": LeadSource.ERP,
-                "direct": LeadSource.DIRECT,
-                "other": LeadSource.OTHER,
-            }
-            source_value = data.get("lead_source") or data.get("source") or payload.source
-            source_enum = source_mapping.get(source_value, LeadSource.WEBSITE)
-
-            priority_mapping = {
-                "low": LeadPriority.LOW,
-                "medium": LeadPriority.MEDIUM,
-                "high": LeadPriority.HIGH,
-                "critical": LeadPriority.CRITICAL,
-            }
-            priority_enum = priority_mapping.get(data.get("priority", "medium").lower(), LeadPriority.MEDIUM)
-
-            lead = Lead(
-                first_name=data.get("first_name") or data.get("company_name") or "Unknown",
-                last_name=data.get("last_name"),
-                email=data.get("email") or data.get("customer_email"),
-                phone=data.get("phone") or data.get("contact_phone"),
-                company_name=data.get("company_name") or data.get("customer_name"),
-                source=source_enum,
-                source_details=f"Webhook: {payload.source}",
-                priority=priority_enum,
-                product_interest=data.get("product_interest"),
-                requirements=data.get("requirements"),
-                expected_value=data.get("expected_value"),
-                city=data.get("city"),
-                state=data.get("state"),
-                country=data.get("country", "India"),
-                notes=data.get("notes"),
-                company_id=data.get("company_id") or 1,
-            )
-            db.add(lead)
-            db.flush()
-            log.entity_type = "lead"
-            log.entity_id = lead.id
-            result = {"lead_id": lead.id}
-
-        elif payload.event == "order_created":
-            from app.models.customer import Customer
-            customer_code = data.get("customer_code")
-            if customer_code:
-                customer = db.query(Customer).filter(Customer.customer_code == customer_code).first()
-                if customer:
-                    customer.total_orders = (customer.total_orders or 0) + 1
-                    customer.last_order_date = datetime.utcnow()
-                    order_value = data.get("order_value", 0)
-                    customer.total_revenue = float(customer.total_revenue or 0) + float(order_value)
-                    log.entity_type = "customer"
-                    log.entity_id = customer.id
-                    result = {"customer_id": customer.id}
-
-        elif payload.event == "payment_received":
-            from app.models.customer import Customer
-            customer_code = data.get("customer_code")
-            if customer_code:
-                customer = db.query(Customer).filter(Customer.customer_code == customer_code).first()
-                if customer:
-                    payment_amount = data.get("amount", 0)
-                    customer.outstanding_amount = max(0, float(customer.outstanding_amount or 0) - float(payment_amount))
-                    log.entity_type = "customer"
-                    log.entity_id = customer.id
-                    result = {"customer_id": customer.id}
-
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown event type: {payload.event}")
-
-        log.is_successful = True
-        log.response_status = 200
-        log.processed_at = datetime.utcnow()
-        db.add(log)
-        db.commit()
-
-        return {"status": "success", "result": result}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.is_successful = False
-        log.error_message = str(e)
-        db.add(log)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/incoming/batch", status_code=status.HTTP_200_OK)
+async def receive_incoming_webhook_batch(
+    request: Request,
+    items: List[IncomingWebhookPayload],
+    x_webhook_signature: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Batch incoming webhook endpoint for backfills
+
+    **Body:** JSON array of incoming webhook payloads (same shape as `/incoming`)
+
+    - `X-Webhook-Signature` is one HMAC over the whole request body
+    - Items are committed in chunks of `WEBHOOK_BATCH_CHUNK_SIZE`; `new_inquiry`
+      and `new_lead` items are inserted in bulk, other events run individually
+    - A failing item does not fail the rest of its chunk
+    - Items may carry `idempotency_key`; repeats replay the original result
+    - Returns one result per item, in request order, with its `index`
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > settings.WEBHOOK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.WEBHOOK_BATCH_MAX_ITEMS} items"
+        )
+
+    return await process_incoming_batch(
+        db, request, items, x_webhook_signature, settings.WEBHOOK_BATCH_CHUNK_SIZE
+    )
 
 
 # ================== WEBHOOK CONFIGS ==================
@@ -18,7 +18,8 @@ from app.api.v1.endpoints import (
     option_master,
     location,
     cri_email_template,
-    public_forms
+    public_forms,
+    system
 )
 
 api_router = APIRouter()
@@ -80,3 +81,6 @@ api_router.include_router(cri_email_template.router, prefix="/cri-email-template
 
 # Public Forms (no authentication required)
 api_router.include_router(public_forms.router, prefix="/public/forms", tags=["Public Forms"])
+
+# System (pool metrics, admin only)
+api_router.include_router(system.router, prefix="/system", tags=["System"])
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Union, Optional
+from typing import Dict, List, Union, Optional
 import os
 import json
 
@@ -17,6 +17,21 @@ class Settings(BaseSettings):
     # Settings will read it from the environment; we validate it below to
     # give a clear error if it's missing.
     DATABASE_URL: Optional[str] = None
+    # Async driver URL for get_async_db. Derived from DATABASE_URL
+    # (postgresql:// -> postgresql+asyncpg://) when unset.
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool (per uvicorn worker; size against PgBouncer limits
+    # using /api/v1/system/db-pool). DB_POOL_RECYCLE=-1 disables recycling.
+    # DB_POOL_PRE_PING tests each connection on checkout (pessimistic); set
+    # it to false to rely on DB_POOL_RECYCLE and disconnect handling instead.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = True
+    DB_ASYNC_POOL_SIZE: int = 10
+    DB_ASYNC_MAX_OVERFLOW: int = 20
 
     # JWT Settings
     # Secrets and environment-specific settings should come from the .env
@@ -64,6 +79,158 @@ class Settings(BaseSettings):
     WEBHOOK_SECRET: Optional[str] = None
     ERP_WEBHOOK_URL: Optional[str] = "http://localhost:8001/api/crm-webhook"
 
+    # POST /webhooks/incoming/batch: max items per request, items per transaction
+    WEBHOOK_BATCH_MAX_ITEMS: int = 10000
+    WEBHOOK_BATCH_CHUNK_SIZE: int = 500
+
+    # Incoming webhook idempotency keys: in-process front cache per worker
+    # (the webhook_idempotency_keys table is the source of truth). The webhook
+    # dispatcher deletes keys older than WEBHOOK_IDEMPOTENCY_RETENTION_DAYS;
+    # replays after that are processed again.
+    WEBHOOK_IDEMPOTENCY_CACHE_SIZE: int = 10000
+    WEBHOOK_IDEMPOTENCY_CACHE_TTL_SECONDS: int = 3600
+    WEBHOOK_IDEMPOTENCY_RETENTION_DAYS: int = 30
+
+    # Incoming webhook logs: "sync" writes the WebhookLog row in the request's
+    # transaction; "buffered" queues it in memory and a background task writes
+    # batches of up to WEBHOOK_LOG_BATCH_SIZE rows. Rows still queued are lost
+    # if the process dies (they are flushed on graceful shutdown). When the
+    # queue is full, requests wait up to WEBHOOK_LOG_ENQUEUE_TIMEOUT_SECONDS,
+    # then fall back to writing the row in their own transaction.
+    WEBHOOK_LOG_MODE: str = "buffered"
+    WEBHOOK_LOG_QUEUE_SIZE: int = 10000
+    WEBHOOK_LOG_BATCH_SIZE: int = 500
+    WEBHOOK_LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    WEBHOOK_LOG_ENQUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Outgoing webhook dispatcher
+    # Events are written to webhook_outbox inside the request transaction and
+    # delivered by WEBHOOK_DISPATCH_WORKERS background workers. Failed
+    # deliveries are retried with exponential backoff (base * 2^attempt, capped
+    # at WEBHOOK_RETRY_MAX_SECONDS) up to WebhookConfig.retry_count times, then
+    # dead-lettered into webhook_logs.
+    WEBHOOK_DISPATCH_ENABLED: bool = True
+    WEBHOOK_DISPATCH_WORKERS: int = 2
+    WEBHOOK_DISPATCH_BATCH_SIZE: int = 100
+    WEBHOOK_DISPATCH_POLL_SECONDS: float = 2.0
+    WEBHOOK_MAX_CONCURRENCY: int = 100
+    WEBHOOK_PER_ENDPOINT_CONCURRENCY: int = 10
+    WEBHOOK_RETRY_BASE_SECONDS: int = 5
+    WEBHOOK_RETRY_MAX_SECONDS: int = 3600
+    WEBHOOK_OUTBOX_RETENTION_HOURS: int = 72
+
+    # Dashboard snapshots
+    # /dashboard/stats and /dashboard/quick-stats are served from the
+    # dashboard_snapshots table, refreshed in the background every
+    # DASHBOARD_SNAPSHOT_REFRESH_SECONDS and after writes to the tracked
+    # tables (but never more often than DASHBOARD_SNAPSHOT_MIN_REFRESH_SECONDS).
+    DASHBOARD_SNAPSHOT_ENABLED: bool = True
+    DASHBOARD_SNAPSHOT_REFRESH_SECONDS: int = 60
+    DASHBOARD_SNAPSHOT_MIN_REFRESH_SECONDS: int = 5
+
+    # List endpoints with count=estimated: filtered counts are cached per
+    # worker for LIST_COUNT_CACHE_TTL_SECONDS (unfiltered lists on PostgreSQL
+    # use the planner's row estimate instead)
+    LIST_COUNT_CACHE_SIZE: int = 1000
+    LIST_COUNT_CACHE_TTL_SECONDS: int = 60
+
+    # /export endpoints: rows fetched per server-side cursor batch
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Bulk lead/pre-lead import: rows per INSERT/commit, row errors kept per job
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000
+
+    # Reference data (locations, option master, user names) cached per worker.
+    # Writes through this worker invalidate at once; other workers see the
+    # change within REFERENCE_CACHE_TTL_SECONDS.
+    REFERENCE_CACHE_SIZE: int = 5000
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+
+    # HTTP caching: GET JSON responses up to HTTP_ETAG_MAX_BODY_BYTES get an
+    # ETag and 304s; routes opted in with @cache_response keep their bodies
+    # per worker (keyed by path, query and role) for HTTP_CACHE_TTL_SECONDS
+    HTTP_ETAG_ENABLED: bool = True
+    HTTP_ETAG_MAX_BODY_BYTES: int = 2 * 1024 * 1024
+    HTTP_CACHE_SIZE: int = 2000
+    HTTP_CACHE_TTL_SECONDS: int = 60
+
+    # Authenticated users (get_current_user) cached per worker. User writes
+    # invalidate at once in the worker that made them; a deactivated or
+    # deleted user is rejected by every worker within USER_CACHE_TTL_SECONDS.
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 30
+
+    # Password hashing (bcrypt) runs on its own executor per worker process:
+    # PASSWORD_HASH_EXECUTOR "thread" or "process", PASSWORD_HASH_WORKERS
+    # concurrent hashes, and at most PASSWORD_HASH_MAX_PENDING queued or
+    # running before logins get 503. Changing PASSWORD_HASH_ROUNDS rehashes
+    # each password on its next successful login.
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_ROUNDS: int = 12
+
+    # Bulk email campaigns. The worker sends EMAIL_CAMPAIGN_BATCH_SIZE
+    # recipients per transaction and holds a lease of
+    # EMAIL_CAMPAIGN_LEASE_SECONDS on its campaign (resumed elsewhere when it
+    # expires). Disable EMAIL_CAMPAIGN_WORKER_ENABLED on API pods that leave
+    # sending to `python email_worker.py`. Retryable failures are retried up
+    # to EMAIL_MAX_ATTEMPTS times with exponential backoff.
+    # EMAIL_DOMAIN_RATE_LIMITS overrides the per-domain rate, e.g.
+    # '{"gmail.com": 300}'. EMAIL_BACKEND "smtp" or "console" (log only).
+    EMAIL_BACKEND: str = "smtp"
+    EMAIL_FROM_ADDRESS: str = "noreply@example.com"
+    EMAIL_FROM_NAME: Optional[str] = None
+    EMAIL_CAMPAIGN_WORKER_ENABLED: bool = True
+    EMAIL_CAMPAIGN_BATCH_SIZE: int = 100
+    EMAIL_CAMPAIGN_POLL_SECONDS: float = 5.0
+    EMAIL_CAMPAIGN_LEASE_SECONDS: int = 300
+    EMAIL_MAX_ATTEMPTS: int = 3
+    EMAIL_RETRY_DELAY_SECONDS: int = 60
+    EMAIL_DOMAIN_RATE_PER_MINUTE: int = 600
+    EMAIL_DOMAIN_RATE_LIMITS: Dict[str, int] = {}
+
+    # SMTP server (SMTP_POOL_SIZE connections, also the send concurrency)
+    SMTP_HOST: Optional[str] = None
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = True
+    SMTP_SSL: bool = False
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    SMTP_POOL_SIZE: int = 4
+
+    # Document storage. Uploads are content-addressed (identical files are
+    # stored once) and limited to UPLOAD_MAX_BYTES, also for imports.
+    # STORAGE_BACKEND "local" (STORAGE_LOCAL_ROOT, served under /uploads) or
+    # "s3" (any S3-compatible service; needs boto3).
+    STORAGE_BACKEND: str = "local"
+    STORAGE_LOCAL_ROOT: str = "uploads"
+    STORAGE_S3_BUCKET: Optional[str] = None
+    STORAGE_S3_PREFIX: str = ""
+    STORAGE_S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO
+    STORAGE_S3_REGION: Optional[str] = None
+    STORAGE_S3_ACCESS_KEY_ID: Optional[str] = None
+    STORAGE_S3_SECRET_ACCESS_KEY: Optional[str] = None
+    UPLOAD_MAX_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+    # Document downloads (/.../documents/{id}/download, access checked).
+    # UPLOADS_STATIC_ENABLED keeps the unauthenticated /uploads mount for
+    # clients that still link to file paths directly.
+    DOCUMENT_CACHE_MAX_AGE: int = 3600
+    DOCUMENT_DOWNLOAD_CHUNK_BYTES: int = 256 * 1024
+    UPLOADS_STATIC_ENABLED: bool = True
+
+    # CR tab PDFs: cached per (CR, tab) until the content changes, and
+    # rendered on PDF_RENDER_WORKERS processes (0 = always in the request
+    # thread) once they have PDF_RENDER_PROCESS_THRESHOLD characters of text
+    PDF_RENDER_WORKERS: int = 2
+    PDF_RENDER_PROCESS_THRESHOLD: int = 20000
+    PDF_CACHE_SIZE: int = 200
+    PDF_CACHE_TTL_SECONDS: int = 3600
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,89 @@
+"""
+Streaming CSV / NDJSON export.
+
+`stream_export()` takes a filtered ORM query (the same filters as the list
+endpoint) and streams every matching row. Rows are read with `yield_per`
+(a server-side cursor on PostgreSQL) in batches of EXPORT_BATCH_SIZE and
+written out batch by batch, so memory stays flat regardless of row count.
+
+The rows are read in their own session: the response body is produced after
+the endpoint has returned and its request-scoped session may be closed.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, List
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def export_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def iter_export(statement, keys: List[str], format: ExportFormat) -> Iterator[str]:
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if format == ExportFormat.CSV else None
+        if writer:
+            writer.writerow(keys)
+
+        for rows in result.partitions():
+            for row in rows:
+                values = [export_value(value) for value in row]
+                if writer:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(keys, values)), default=str))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def stream_export(query: Query, model, format: ExportFormat, name: str) -> StreamingResponse:
+    """Stream all rows of a filtered query (newest first) as a file download"""
+    columns = list(model.__table__.columns)
+    statement = (
+        query.with_entities(*columns)
+        .order_by(None)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .statement
+    )
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format.value}"
+    return StreamingResponse(
+        iter_export(statement, [column.key for column in columns], format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,290 @@
+"""
+HTTP response caching: ETags, conditional GET and opt-in server-side caching.
+
+- `ETagMiddleware` (installed in main.py) gives every successful GET JSON
+  response without an ETag a strong one (hash of the body) and answers a
+  matching If-None-Match with 304. The handler still runs; the client skips
+  the download.
+- `@cache_response(namespace)` on a route also keeps the serialized body in
+  a per-worker TTL cache keyed by path, query parameters and the caller's
+  role (responses are role-dependent through app.core.permissions), so
+  repeat loads skip the handler, its queries and serialization.
+  `invalidate(namespace)` from the write endpoints drops the cached bodies.
+
+Namespaces are versioned: invalidation bumps the version, so a response that
+was being built while the data changed is stored under the old version and
+never served. Each worker has its own caches; other workers converge within
+the namespace TTL.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cached responses are revalidated on every use, never reused blindly
+CACHE_CONTROL = "private, no-cache"
+
+
+class VersionedCache:
+    """Per-worker TTL cache for one namespace, invalidated by bumping its version"""
+
+    def __init__(self, name: str, maxsize: int, ttl_seconds: float):
+        self.name = name
+        self.version = 0
+        self._entries = TTLCache(maxsize, ttl_seconds)
+
+    def lookup(self, key: Hashable, version: Optional[int] = None) -> Any:
+        return self._entries.get((self.version if version is None else version, key))
+
+    def store(self, version: int, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Cache a value built from data read at `version` (dropped if stale)"""
+        if version == self.version:
+            self._entries.set((version, key), value, ttl_seconds)
+
+    def get(self, key: Hashable, loader: Callable[[], Any], ttl_seconds: Optional[float] = None) -> Any:
+        """Cached value for key, calling loader() on a miss (None is not cached)"""
+        version = self.version
+        value = self.lookup(key, version)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.store(version, key, value, ttl_seconds)
+        return value
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._entries.clear()
+        logger.debug("Cache namespace %s invalidated (version %s)", self.name, self.version)
+
+    def stats(self) -> dict:
+        return {"version": self.version, "entries": len(self._entries), "ttl_seconds": self._entries.ttl_seconds}
+
+
+_namespaces: Dict[str, VersionedCache] = {}
+
+
+def cache_namespace(name: str, maxsize: Optional[int] = None, ttl_seconds: Optional[float] = None) -> VersionedCache:
+    """Get (or create on first use) the cache for a namespace"""
+    cache = _namespaces.get(name)
+    if cache is None:
+        cache = _namespaces[name] = VersionedCache(
+            name,
+            settings.HTTP_CACHE_SIZE if maxsize is None else maxsize,
+            settings.HTTP_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds,
+        )
+    return cache
+
+
+def invalidate(name: str) -> None:
+    cache = _namespaces.get(name)
+    if cache is not None:
+        cache.invalidate()
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in sorted(_namespaces.items())}
+
+
+# ============ ETags ============
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def conditional_response(request: Request, body: bytes, etag: str) -> Response:
+    """JSON response for a cached body, or 304 when the client already has it"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def serialize(value: Any, response_type: Any = None) -> bytes:
+    """JSON body as FastAPI would produce it for a route's response_model"""
+    if response_type is None:
+        return json.dumps(jsonable_encoder(value), ensure_ascii=False, separators=(",", ":")).encode()
+    adapter = TypeAdapter(response_type)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def cached_json_response(
+    request: Request,
+    cache: VersionedCache,
+    key: Hashable,
+    response_type: Any,
+    loader: Callable[[], Any],
+) -> Response:
+    """
+    Serve a GET endpoint's response from a cache namespace.
+
+    loader() returns what the endpoint would return (ORM objects); it is
+    serialized with response_type (the endpoint's response_model) once per
+    cache entry.
+    """
+    def load():
+        body = serialize(loader(), response_type)
+        return body, etag_for(body)
+
+    body, etag = cache.get(key, load)
+    return conditional_response(request, body, etag)
+
+
+# ============ Per-route decorator ============
+
+REQUEST_PARAM = "http_cache_request"
+
+
+def cache_response(namespace: str, vary_on: Optional[str] = "role", ttl_seconds: Optional[float] = None):
+    """
+    Cache a GET route's serialized response in a namespace.
+
+    The key is the path, the query parameters and, depending on vary_on,
+    the caller's role ("role"), user id ("user") or nothing (None); the
+    caller is the route's `current_user` argument. Dependencies (and so
+    authentication) still run on every request; the route body only runs on
+    a miss. Responses the route builds itself (Response objects) and errors
+    are never cached.
+
+    Place it under the @router.get(...) decorator.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        parameters = list(signature.parameters.values())
+        parameters.append(inspect.Parameter(REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        def cache_key(request: Request, kwargs: dict) -> tuple:
+            current_user = kwargs.get("current_user")
+            if vary_on == "role":
+                vary = getattr(current_user, "role", None)
+            elif vary_on == "user":
+                vary = getattr(current_user, "id", None)
+            else:
+                vary = None
+            return request.url.path, tuple(sorted(request.query_params.multi_items())), str(vary)
+
+        def response_type(request: Request):
+            route = request.scope.get("route")
+            return getattr(route, "response_model", None)
+
+        def finish(request: Request, cache: VersionedCache, version: int, key: tuple, result: Any) -> Response:
+            if isinstance(result, Response):
+                return result
+            body = serialize(result, response_type(request))
+            etag = etag_for(body)
+            cache.store(version, key, (body, etag), ttl_seconds)
+            return conditional_response(request, body, etag)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = kwargs.pop(REQUEST_PARAM)
+                cache = cache_namespace(namespace)
+                key = cache_key(request, kwargs)
+                version = cache.version
+                cached = cache.lookup(key, version)
+                if cached is not None:
+                    return conditional_response(request, *cached)
+                return finish(request, cache, version, key, await func(*args, **kwargs))
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                request = kwargs.pop(REQUEST_PARAM)
+                cache = cache_namespace(namespace)
+                key = cache_key(request, kwargs)
+                version = cache.version
+                cached = cache.lookup(key, version)
+                if cached is not None:
+                    return conditional_response(request, *cached)
+                return finish(request, cache, version, key, func(*args, **kwargs))
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
+
+
+# ============ Middleware ============
+
+class ETagMiddleware:
+    """
+    Strong ETags and 304s for GET responses.
+
+    Only buffers 200 JSON responses with a Content-Length up to
+    HTTP_ETAG_MAX_BODY_BYTES; streamed responses (exports), files and
+    responses that already carry an ETag pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Optional[Message] = None
+        chunks = []
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if self._should_buffer(message):
+                    start = message
+                    return
+            elif start is not None and message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+
+                body = b"".join(chunks)
+                etag = etag_for(body)
+                headers = MutableHeaders(raw=list(start["headers"]))
+                headers["ETag"] = etag
+                if etag_matches(if_none_match, etag):
+                    for name in ("content-length", "content-type"):
+                        del headers[name]
+                    await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": b""})
+                else:
+                    await send({**start, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": body})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    def _should_buffer(self, message: Message) -> bool:
+        if message["status"] != 200:
+            return False
+        headers = Headers(raw=message["headers"])
+        if "etag" in headers or "content-disposition" in headers:
+            return False
+        if not headers.get("content-type", "").startswith("application/json"):
+            return False
+        length = headers.get("content-length")
+        return length is not None and length.isdigit() and int(length) <= self.max_body_bytes
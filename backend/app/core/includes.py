@@ -0,0 +1,37 @@
+"""
+`include=` selection of child collections for detail ("full") endpoints.
+
+A full endpoint maps each include name to a relationship of its model and
+eager-loads only the requested ones with `selectinload` (one IN query per
+collection, issued together with the parent query); collections that are
+not requested come back as empty lists. Omitting `include` returns all of
+them, as before.
+"""
+from typing import Dict, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Query, selectinload
+
+
+def parse_include(include: Optional[str], relations: Dict[str, str]) -> Set[str]:
+    """Requested names of a comma-separated include (all when omitted)"""
+    if include is None:
+        return set(relations)
+    names = {name.strip() for name in include.split(",") if name.strip()}
+    unknown = names - set(relations)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include: {', '.join(sorted(unknown))} (available: {', '.join(relations)})",
+        )
+    return names
+
+
+def with_includes(query: Query, model, relations: Dict[str, str], names: Set[str]) -> Query:
+    """Eager-load the relationships behind the requested include names"""
+    return query.options(*[selectinload(getattr(model, relations[name])) for name in relations if name in names])
+
+
+def included_collections(instance, relations: Dict[str, str], names: Set[str]) -> dict:
+    """Response fields for the collections: loaded rows, or [] when not requested"""
+    return {name: getattr(instance, relation) if name in names else [] for name, relation in relations.items()}
@@ -0,0 +1,130 @@
+"""
+List pagination helpers.
+
+List endpoints are ordered by (created_at desc, id desc) and support two modes:
+- page mode: `page` / `page_size` with OFFSET (the original behaviour);
+- cursor mode: pass the `next_cursor` from the previous response as `cursor`;
+  the page is then fetched with a keyset condition on (created_at, id), so
+  deep pages cost the same as the first one.
+
+`next_cursor` is returned in both modes (None on the last page), so a client
+can start with page 1 and continue with cursors. Ranked results (e.g. a
+search ordered by relevance) pass `order_by` and are page mode only.
+
+The total is controlled with `count`:
+- exact: COUNT(*) over the filtered query on every request (default);
+- estimated: planner estimate from pg_class.reltuples for unfiltered lists on
+  PostgreSQL, otherwise an exact count cached for LIST_COUNT_CACHE_TTL_SECONDS;
+- none: no count; `total` and `total_pages` are null.
+"""
+import base64
+import binascii
+import enum
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class CountMode(str, enum.Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+count_cache = TTLCache(settings.LIST_COUNT_CACHE_SIZE, settings.LIST_COUNT_CACHE_TTL_SECONDS)
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def estimate_table_rows(query: Query, model) -> Optional[int]:
+    """Row estimate from the PostgreSQL planner statistics, if available"""
+    session = query.session
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": model.__tablename__},
+    ).scalar()
+    # reltuples is -1 (or 0 on older servers) until the table is first analyzed
+    return estimate if estimate and estimate > 0 else None
+
+
+def cached_count(query: Query) -> int:
+    compiled = query.statement.compile()
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    total = count_cache.get(key)
+    if total is None:
+        total = query.count()
+        count_cache.set(key, total)
+    return total
+
+
+def count_query(query: Query, model, mode: CountMode) -> Optional[int]:
+    if mode == CountMode.NONE:
+        return None
+    if mode == CountMode.ESTIMATED:
+        if query.whereclause is None:
+            estimate = estimate_table_rows(query, model)
+            if estimate is not None:
+                return estimate
+        return cached_count(query)
+    return query.count()
+
+
+def paginate(query: Query, model, page: int, page_size: int,
+             cursor: Optional[str] = None, count: CountMode = CountMode.EXACT,
+             order_by: Optional[list] = None) -> dict:
+    """
+    Apply ordering, pagination and counting to a filtered query.
+
+    `order_by` clauses are applied ahead of (created_at, id). Returns the
+    keyword arguments for the endpoint's *ListResponse schema.
+    """
+    if order_by and cursor:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not available for ranked results")
+
+    total = count_query(query, model, count)
+
+    query = query.order_by(*(order_by or []), model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, last_id))
+        page = None
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    # One extra row tells whether there is a next page
+    items = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        if not order_by:
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+        "next_cursor": next_cursor,
+    }
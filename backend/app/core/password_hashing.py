@@ -0,0 +1,149 @@
+"""
+Password hashing off the request workers.
+
+bcrypt costs ~250 ms of CPU per hash/check at 12 rounds. Running it inline
+ties up a threadpool slot (sync endpoints) or the event loop (async ones), so
+a login burst starves every other endpoint. `password_hasher` runs the work
+on its own bounded executor instead:
+
+- PASSWORD_HASH_WORKERS threads (bcrypt releases the GIL while hashing) or,
+  with PASSWORD_HASH_EXECUTOR=process, worker processes started from a
+  fork server.
+- At most PASSWORD_HASH_MAX_PENDING calls queued or running per worker
+  process; beyond that callers get 503 with Retry-After instead of piling up.
+- `stats()` reports queue depth and queue wait times for /system.
+
+Hashes are created with PASSWORD_HASH_ROUNDS; `needs_rehash()` tells login
+to upgrade a hash made with a different cost factor.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash ($2b$<rounds>$...), None if unrecognised"""
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    return hash_rounds(hashed_password) != settings.PASSWORD_HASH_ROUNDS
+
+
+class PasswordHasher:
+    """Bounded executor for bcrypt with queue-depth accounting"""
+
+    def __init__(self, workers: int, max_pending: int, use_processes: bool = False):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_pending_seen = 0
+        self._wait_ms_total = 0.0
+        self._max_wait_ms = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.use_processes:
+                        # Not fork: children of the threaded API process would
+                        # inherit locks held by other threads
+                        context = multiprocessing.get_context("forkserver")
+                        context.set_forkserver_preload([__name__])
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="password-hasher"
+                        )
+        return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func: Callable, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-in requests in progress, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+            self._max_pending_seen = max(self._max_pending_seen, self._pending)
+
+        queued_at = time.perf_counter()
+
+        def timed():
+            wait_ms = (time.perf_counter() - queued_at) * 1000
+            with self._lock:
+                self._wait_ms_total += wait_ms
+                self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+            return func(*args)
+
+        try:
+            loop = asyncio.get_running_loop()
+            if self.use_processes:
+                # Queue wait is not observable from another process
+                return await loop.run_in_executor(self._get_executor(), func, *args)
+            return await loop.run_in_executor(self._get_executor(), timed)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, settings.PASSWORD_HASH_ROUNDS)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(check_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executor": "process" if self.use_processes else "thread",
+                "workers": self.workers,
+                "rounds": settings.PASSWORD_HASH_ROUNDS,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "queued": max(self._pending - self.workers, 0),
+                "max_pending_seen": self._max_pending_seen,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_ms_total / self._completed, 1) if self._completed else 0.0,
+                "max_wait_ms": round(self._max_wait_ms, 1),
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    use_processes=settings.PASSWORD_HASH_EXECUTOR == "process",
+)
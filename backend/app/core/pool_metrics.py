@@ -0,0 +1,174 @@
+"""
+Connection pool instrumentation.
+
+Collects per-process pool statistics through SQLAlchemy pool events so pool
+sizes can be tuned against PgBouncer limits:
+- wait time to obtain a connection (time spent in Pool.connect())
+- checkout duration (checkout -> checkin)
+- live size / checked-out / overflow counts from the pool itself
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as SATimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Histogram bucket upper bounds in milliseconds (cumulative, Prometheus-style)
+HISTOGRAM_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class Histogram:
+    """Thread-safe cumulative histogram of durations in milliseconds"""
+
+    def __init__(self, buckets: List[float] = HISTOGRAM_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * len(self.buckets)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        with self._lock:
+            self._count += 1
+            self._sum += value_ms
+            self._max = max(self._max, value_ms)
+            for i, bound in enumerate(self.buckets):
+                if value_ms <= bound:
+                    self._counts[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {f"le_{bound}": count for bound, count in zip(self.buckets, self._counts)}
+            buckets["le_inf"] = self._count
+            return {
+                "count": self._count,
+                "sum_ms": round(self._sum, 3),
+                "avg_ms": round(self._sum / self._count, 3) if self._count else 0.0,
+                "max_ms": round(self._max, 3),
+                "buckets": buckets,
+            }
+
+
+class PoolMetrics:
+    """Wait/checkout metrics for one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wait_time = Histogram()
+        self.checkout_duration = Histogram()
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def reset(self) -> None:
+        self.wait_time.reset()
+        self.checkout_duration.reset()
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+
+_registry: Dict[str, PoolMetrics] = {}
+_engines: Dict[str, object] = {}
+
+
+class _WaitTimingMixin:
+    """Times Pool.connect() for pools created with an attached PoolMetrics"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except SATimeoutError:
+            if self.metrics:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.wait_time.observe((time.perf_counter() - started) * 1000)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """QueuePool that records how long callers wait for a connection"""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long callers wait for a connection"""
+
+
+def instrument_engine(engine, name: str) -> PoolMetrics:
+    """Attach pool event listeners to a (sync or async) engine"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    metrics = PoolMetrics(name)
+    if isinstance(pool, _WaitTimingMixin):
+        pool.metrics = metrics
+    _registry[name] = metrics
+    _engines[name] = sync_engine
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checkout_started"] = time.perf_counter()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checkout_started", None)
+        if started is not None:
+            metrics.checkout_duration.observe((time.perf_counter() - started) * 1000)
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    return metrics
+
+
+def get_pool_stats() -> dict:
+    """Live and cumulative statistics for every instrumented pool in this process"""
+    pools = {}
+    for name, metrics in _registry.items():
+        pool = _engines[name].pool
+        live = {"status": pool.status()}
+        if isinstance(pool, QueuePool):
+            live.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            })
+        pools[name] = {
+            **live,
+            "connects": metrics.connects,
+            "invalidations": metrics.invalidations,
+            "timeouts": metrics.timeouts,
+            "wait_time": metrics.wait_time.snapshot(),
+            "checkout_duration": metrics.checkout_duration.snapshot(),
+        }
+    return {"pid": os.getpid(), "pools": pools}
+
+
+def reset_pool_metrics() -> None:
+    for metrics in _registry.values():
+        metrics.reset()
@@ -0,0 +1,40 @@
+"""
+Request size limit for file uploads.
+
+`store_upload()` enforces UPLOAD_MAX_BYTES while copying a file, but by then
+Starlette has already received the whole multipart body (spooled to a
+temporary file). `UploadSizeLimitMiddleware` rejects multipart requests whose
+Content-Length is over the limit with 413 before any of the body is read.
+"""
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Allowance for the other form fields and multipart boundaries
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """413 for multipart requests declaring a body larger than max_bytes"""
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] in ("POST", "PUT", "PATCH"):
+            headers = Headers(scope=scope)
+            length = headers.get("content-length", "")
+            if (
+                headers.get("content-type", "").startswith("multipart/form-data")
+                and length.isdigit()
+                and int(length) > self.max_bytes
+            ):
+                response = JSONResponse(
+                    {"detail": f"Upload exceeds the maximum size of "
+                               f"{(self.max_bytes - FORM_OVERHEAD_BYTES) // (1024 * 1024)} MB"},
+                    status_code=413,
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
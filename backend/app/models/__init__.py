@@ -5,7 +5,7 @@ from app.models.customer import Customer
 from app.models.contact import Contact, ContactType
 from app.models.activity import Activity, ActivityType
 from app.models.sales_target import SalesTarget
-from app.models.webhook import WebhookConfig, WebhookLog
+from app.models.webhook import WebhookConfig, WebhookLog, WebhookOutbox, WebhookIdempotencyKey
 from app.models.pre_lead_contact import PreLeadContact
 from app.models.pre_lead_activity import PreLeadActivity
 from app.models.pre_lead_memo import PreLeadMemo
@@ -33,6 +33,12 @@ from app.models.whatsapp_message import (
     MessageDirection, MessageStatus
 )
 from app.models.webhook_setting import MenuWebhookSetting, MenuWebhookConfig
+from app.models.dashboard_snapshot import DashboardSnapshot
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.models.email_campaign import (
+    EmailCampaign, EmailCampaignRecipient, EmailCampaignStatus, EmailRecipientStatus
+)
+from app.models.stored_file import StoredFile
 
 __all__ = [
     "User",
@@ -47,6 +53,8 @@ __all__ = [
     "SalesTarget",
     "WebhookConfig",
     "WebhookLog",
+    "WebhookOutbox",
+    "WebhookIdempotencyKey",
     "PreLeadContact",
     "PreLeadActivity",
     "PreLeadMemo",
@@ -97,4 +105,12 @@ __all__ = [
     "MessageStatus",
     "MenuWebhookSetting",
     "MenuWebhookConfig",
+    "DashboardSnapshot",
+    "ImportJob",
+    "ImportJobStatus",
+    "EmailCampaign",
+    "EmailCampaignRecipient",
+    "EmailCampaignStatus",
+    "EmailRecipientStatus",
+    "StoredFile",
 ]
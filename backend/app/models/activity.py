@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -31,6 +31,16 @@ class ActivityOutcome(str, enum.Enum):
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_created_at_id", "created_at", "id"),
+        Index("ix_activities_lead_id_created_at", "lead_id", "created_at"),
+        Index("ix_activities_customer_id_created_at", "customer_id", "created_at"),
+        # Pending/overdue lists and the quick-stats overdue count only look at open activities
+        Index("ix_activities_open_performed_by_scheduled", "performed_by", "scheduled_date",
+              postgresql_where=text("is_completed = false")),
+        Index("ix_activities_open_scheduled_date", "scheduled_date",
+              postgresql_where=text("is_completed = false")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -81,6 +81,16 @@ class CustomerRequirement(Base):
     # Relationship
     lead = relationship("Lead", backref="customer_requirements")
 
+    # Tab rows, read-only (written through their own endpoints); used by the PDF export
+    introductions = relationship("CRIntroduction", viewonly=True, order_by="CRIntroduction.id")
+    requirements = relationship("CRRequirement", viewonly=True, order_by="CRRequirement.id")
+    presentations = relationship("CRPresentation", viewonly=True, order_by="CRPresentation.id")
+    demos = relationship("CRDemo", viewonly=True, order_by="CRDemo.id")
+    proposals = relationship("CRProposal", viewonly=True, order_by="CRProposal.id")
+    agreements = relationship("CRAgreement", viewonly=True, order_by="CRAgreement.id")
+    diligence_short_forms = relationship("CRDiligenceShortForm", viewonly=True, order_by="CRDiligenceShortForm.id")
+    meeting_calendars = relationship("CRMeetingCalendar", viewonly=True, order_by="CRMeetingCalendar.id")
+
 
 class CRIntroduction(Base):
     """Introduction tab data"""
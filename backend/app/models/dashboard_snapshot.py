@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DashboardSnapshot(Base):
+    """Precomputed dashboard payloads served by /dashboard/stats and /dashboard/quick-stats"""
+    __tablename__ = "dashboard_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    snapshot_key = Column(String(50), unique=True, nullable=False, index=True)  # stats, quick_stats
+    payload = Column(JSON, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+    refresh_duration_ms = Column(Integer, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DashboardSnapshot {self.snapshot_key} @ {self.refreshed_at}>"
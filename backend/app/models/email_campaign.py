@@ -0,0 +1,78 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+
+class EmailCampaignStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class EmailRecipientStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class EmailCampaign(Base):
+    """Bulk email job; sent in batches by the email campaign worker"""
+    __tablename__ = "email_campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    cc = Column(JSON, nullable=True)  # ["a@example.com", ...]
+    bcc = Column(JSON, nullable=True)
+    attachments = Column(JSON, nullable=True)  # [{"name": "...", "path": "uploads/..."}]
+    recipient_type = Column(String(20), nullable=False)  # lead, customer
+    status = Column(String(20), default=EmailCampaignStatus.QUEUED.value, nullable=False, index=True)
+
+    # Progress
+    total_recipients = Column(Integer, default=0, nullable=False)
+    sent_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)
+    error_message = Column(Text, nullable=True)  # campaign-level failure
+
+    # Worker lease: the campaign is resumed by another worker once locked_until passes
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<EmailCampaign {self.id} {self.status}>"
+
+
+class EmailCampaignRecipient(Base):
+    """One message of an email campaign"""
+    __tablename__ = "email_campaign_recipients"
+    __table_args__ = (
+        # Worker: next pending recipients of a campaign
+        Index("ix_email_campaign_recipients_campaign_status", "campaign_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    campaign_id = Column(Integer, ForeignKey("email_campaigns.id", ondelete="CASCADE"), nullable=False)
+    email = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=True)
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="SET NULL"), nullable=True)
+    customer_id = Column(Integer, ForeignKey("customers.id", ondelete="SET NULL"), nullable=True)
+
+    status = Column(String(20), default=EmailRecipientStatus.PENDING.value, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # retry / rate-limit deferral
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<EmailCampaignRecipient {self.id} {self.email} {self.status}>"
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+
+class ImportJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJob(Base):
+    """Background bulk import of an uploaded CSV/XLSX file (leads or pre-leads)"""
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String(20), nullable=False)  # lead, pre_lead
+    filename = Column(String(255), nullable=True)
+    status = Column(String(20), default=ImportJobStatus.PENDING.value, nullable=False)
+
+    # Progress
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, default=0, nullable=False)
+    inserted_rows = Column(Integer, default=0, nullable=False)
+    failed_rows = Column(Integer, default=0, nullable=False)
+    errors = Column(JSON, nullable=True)  # [{"row": n, "error": "..."}], capped at IMPORT_MAX_ERRORS
+    error_message = Column(Text, nullable=True)  # job-level failure
+
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ImportJob {self.id} {self.entity_type} {self.status}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, Numeric, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -28,6 +28,18 @@ class LeadPriority(str, enum.Enum):
 
 class Lead(Base):
     __tablename__ = "leads"
+    __table_args__ = (
+        # Indexes follow the list/dashboard filters; "active" = status 0
+        Index("ix_leads_created_at_id", "created_at", "id"),
+        Index("ix_leads_active_created_at", "created_at", "id", postgresql_where=text("status = 0")),
+        Index("ix_leads_active_lead_status_created_at", "lead_status", "created_at",
+              postgresql_where=text("status = 0")),
+        Index("ix_leads_assigned_to_created_at", "assigned_to", "created_at"),
+        Index("ix_leads_source_created_at", "source", "created_at"),
+        Index("ix_leads_pipeline_stage_created_at", "pipeline_stage", "created_at"),
+        Index("ix_leads_company_id_created_at", "company_id", "created_at"),
+        Index("ix_leads_active_next_follow_up", "next_follow_up", postgresql_where=text("status = 0")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Date
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -39,7 +39,7 @@ class LeadActivity(Base):
     performed_by = Column(Integer, nullable=True)
 
     # Relationship
-    lead = relationship("Lead", backref="lead_activities")
+    lead = relationship("Lead", backref=backref("lead_activities", order_by="desc(LeadActivity.created_at)"))
 
     def __repr__(self):
         return f"<LeadActivity {self.activity_type}: {self.subject}>"
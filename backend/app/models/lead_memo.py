@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -26,7 +26,7 @@ class LeadMemo(Base):
     updated_by = Column(Integer, nullable=True)
 
     # Relationship
-    lead = relationship("Lead", backref="lead_memos")
+    lead = relationship("Lead", backref=backref("lead_memos", order_by="desc(LeadMemo.created_at)"))
 
     def __repr__(self):
         return f"<LeadMemo {self.title}>"
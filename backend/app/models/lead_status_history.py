@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Date
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -20,7 +20,7 @@ class LeadStatusHistory(Base):
     updated_by = Column(Integer, nullable=True)
 
     # Relationship
-    lead = relationship("Lead", backref="status_history")
+    lead = relationship("Lead", backref=backref("status_history", order_by="desc(LeadStatusHistory.created_at)"))
 
     def __repr__(self):
         return f"<LeadStatusHistory {self.status}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, Date
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -19,6 +19,14 @@ class PreLeadSource(str, enum.Enum):
 
 class PreLead(Base):
     __tablename__ = "pre_leads"
+    __table_args__ = (
+        # Indexes follow the list/dashboard filters; "active" = status 0
+        Index("ix_pre_leads_created_at_id", "created_at", "id"),
+        Index("ix_pre_leads_active_created_at", "created_at", "id", postgresql_where=text("status = 0")),
+        Index("ix_pre_leads_assigned_to_created_at", "assigned_to", "created_at"),
+        Index("ix_pre_leads_source_created_at", "source", "created_at"),
+        Index("ix_pre_leads_company_id_created_at", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
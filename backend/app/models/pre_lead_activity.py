@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Date, Time
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -48,7 +48,7 @@ class PreLeadActivity(Base):
     updated_by = Column(Integer, nullable=True)
 
     # Relationships
-    pre_lead = relationship("PreLead", backref="activities")
+    pre_lead = relationship("PreLead", backref=backref("activities", order_by="desc(PreLeadActivity.created_at)"))
     contact = relationship("PreLeadContact", backref="activities")
     assigned_user = relationship("User", foreign_keys=[assigned_to])
 
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -24,7 +24,7 @@ class PreLeadMemo(Base):
     updated_by = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     # Relationships
-    pre_lead = relationship("PreLead", backref="memos")
+    pre_lead = relationship("PreLead", backref=backref("memos", order_by="desc(PreLeadMemo.created_at)"))
     creator = relationship("User", foreign_keys=[created_by])
     updater = relationship("User", foreign_keys=[updated_by])
 
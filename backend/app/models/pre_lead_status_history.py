@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Date
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -20,7 +20,7 @@ class PreLeadStatusHistory(Base):
     updated_by = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     # Relationships
-    pre_lead = relationship("PreLead", backref="status_history")
+    pre_lead = relationship("PreLead", backref=backref("status_history", order_by="desc(PreLeadStatusHistory.created_at)"))
     updater = relationship("User", foreign_keys=[updated_by])
 
     def __repr__(self):
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class StoredFile(Base):
+    """
+    Content-addressed blob in file storage, shared by every document with
+    the same content (see app.services.file_storage)
+    """
+    __tablename__ = "stored_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, nullable=False, index=True)
+    storage_key = Column(String(500), nullable=False)  # files/ab/<sha256>.pdf
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=True)
+    ref_count = Column(Integer, default=1, nullable=False)  # document rows using the blob
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<StoredFile {self.storage_key} refs={self.ref_count}>"
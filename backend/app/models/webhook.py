@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Boolean, JSON, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 import enum
@@ -132,3 +132,63 @@ class WebhookLog(Base):
 
     def __repr__(self):
         return f"<WebhookLog {self.direction} - {self.event}>"
+
+
+class WebhookOutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    DEAD = "dead"          # retries exhausted, copied to webhook_logs
+    SKIPPED = "skipped"    # no active outgoing config for the event
+
+
+class WebhookOutbox(Base):
+    """
+    Outgoing webhook events awaiting delivery.
+
+    Rows are written in the same transaction as the change that raised the
+    event. Rows without a webhook_config_id are fanned out by the dispatcher
+    into one row per active outgoing WebhookConfig for the event.
+    """
+    __tablename__ = "webhook_outbox"
+    __table_args__ = (
+        Index("ix_webhook_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    event = Column(String(50), nullable=False)
+    webhook_config_id = Column(Integer, nullable=True)
+    payload = Column(JSON, nullable=False)
+
+    # Related entity
+    entity_type = Column(String(50), nullable=True)
+    entity_id = Column(Integer, nullable=True)
+
+    # Delivery state
+    status = Column(String(20), nullable=False, default=WebhookOutboxStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<WebhookOutbox {self.event} #{self.id} - {self.status}>"
+
+
+class WebhookIdempotencyKey(Base):
+    """Response of an incoming webhook delivery, keyed by its idempotency key"""
+    __tablename__ = "webhook_idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(255), unique=True, nullable=False, index=True)
+    event = Column(String(50), nullable=False)
+    response = Column(JSON, nullable=True)
+
+    # Timestamps (indexed for the retention prune)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<WebhookIdempotencyKey {self.idempotency_key} - {self.event}>"
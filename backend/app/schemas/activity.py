@@ -60,7 +60,8 @@ class ActivityResponse(ActivityBase):
 
 class ActivityListResponse(BaseModel):
     items: list[ActivityResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
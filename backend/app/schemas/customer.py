@@ -94,7 +94,8 @@ class CustomerResponse(CustomerBase):
 
 class CustomerListResponse(BaseModel):
     items: list[CustomerResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
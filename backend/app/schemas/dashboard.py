@@ -94,6 +94,10 @@ class DashboardStats(BaseModel):
     # Top performers
     top_performers: List[TopPerformer]
 
+    # Snapshot freshness
+    snapshot_at: Optional[datetime] = None
+    stale_seconds: Optional[float] = None
+
 
 class QuickStats(BaseModel):
     """Lightweight stats for quick dashboard refresh"""
@@ -102,3 +106,7 @@ class QuickStats(BaseModel):
     total_customers: int
     pending_follow_ups: int
     overdue_tasks: int
+
+    # Snapshot freshness
+    snapshot_at: Optional[datetime] = None
+    stale_seconds: Optional[float] = None
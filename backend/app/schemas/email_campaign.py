@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+
+class EmailCampaignResponse(BaseModel):
+    id: int
+    subject: str
+    recipient_type: str
+    status: str
+    total_recipients: int = 0
+    sent_count: int = 0
+    failed_count: int = 0
+    cc: Optional[List[str]] = None
+    bcc: Optional[List[str]] = None
+    error_message: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class EmailCampaignRecipientResponse(BaseModel):
+    id: int
+    email: str
+    name: Optional[str] = None
+    lead_id: Optional[int] = None
+    customer_id: Optional[int] = None
+    status: str
+    attempts: int = 0
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
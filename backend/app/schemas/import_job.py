@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportJobResponse(BaseModel):
+    id: int
+    entity_type: str
+    filename: Optional[str] = None
+    status: str
+    total_rows: Optional[int] = None
+    processed_rows: int = 0
+    inserted_rows: int = 0
+    failed_rows: int = 0
+    errors: Optional[list[ImportRowError]] = None
+    error_message: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -175,7 +175,8 @@ class LeadResponse(LeadBase):
 
 class LeadListResponse(BaseModel):
     items: list[LeadResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
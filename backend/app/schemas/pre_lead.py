@@ -185,7 +185,8 @@ class PreLeadResponse(BaseModel):
 
 class PreLeadListResponse(BaseModel):
     items: list[PreLeadResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -77,6 +77,7 @@ class IncomingWebhookPayload(BaseModel):
     data: Dict[str, Any]
     timestamp: Optional[datetime] = None
     signature: Optional[str] = None  # HMAC signature for verification
+    idempotency_key: Optional[str] = None  # Or Idempotency-Key header; repeats replay the first response
 
 
 class WebhookConfigListResponse(BaseModel):
@@ -0,0 +1,372 @@
+"""
+Bulk lead / pre-lead import.
+
+POST /leads/import and /pre-leads/import save the upload to a temporary file,
+create an ImportJob and run `run_import_job()` as a background task. The file
+is read row by row (csv module, or openpyxl in read-only mode for .xlsx), each
+row is validated with LeadCreate / PreLeadCreate and mapped like create_lead /
+create_pre_lead, and valid rows are inserted IMPORT_CHUNK_SIZE at a time with
+a multi-row INSERT per chunk. Counters are committed with every chunk, so
+GET .../import/{job_id} reports live progress.
+
+Location names/ids and sales reps (id, email or full name) are resolved from
+in-memory maps loaded once per job instead of per-row queries. Rows are
+inserted directly, so imported rows do not raise outgoing webhook events.
+"""
+import csv
+import logging
+import os
+import shutil
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.permissions import UserRole
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.models.lead import Lead
+from app.models.location import Country, State, City
+from app.models.pre_lead import PreLead
+from app.models.user import User
+from app.schemas.lead import LeadCreate
+from app.schemas.pre_lead import PreLeadCreate
+
+try:
+    import openpyxl
+except ImportError:  # optional: only needed for .xlsx imports
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+IMPORT_EXTENSIONS = (".csv", ".xlsx")
+
+
+# ================== FIELD MAPPING ==================
+
+def combine_office_timings(from_timings: Optional[str], to_timings: Optional[str]) -> Optional[str]:
+    if from_timings and to_timings:
+        return f"{from_timings} - {to_timings}"
+    return from_timings or to_timings
+
+
+def lead_create_data(lead_data: LeadCreate, user_id: int) -> dict:
+    """Column values for a new Lead (frontend field mappings + system fields)"""
+    data = lead_data.model_dump(exclude={'from_timings', 'to_timings', 'customer_name', 'contact_phone', 'customer_email'})
+
+    # Field mappings: frontend field -> database field
+    if lead_data.customer_name and not data.get('company_name'):
+        data['company_name'] = lead_data.customer_name
+    if lead_data.contact_phone and not data.get('phone'):
+        data['phone'] = lead_data.contact_phone
+    if lead_data.customer_email and not data.get('email'):
+        data['email'] = lead_data.customer_email
+
+    office_timings = combine_office_timings(lead_data.from_timings, lead_data.to_timings)
+    if office_timings:
+        data['office_timings'] = office_timings
+
+    data['createdby'] = user_id
+    data['updatedby'] = user_id
+    if not data.get('company_id'):
+        data['company_id'] = 1  # Default company
+    return data
+
+
+def pre_lead_create_data(pre_lead_data: PreLeadCreate, user_id: int) -> dict:
+    """Column values for a new PreLead (timings + system fields)"""
+    data = pre_lead_data.model_dump(exclude={'from_timings', 'to_timings'})
+
+    office_timings = combine_office_timings(pre_lead_data.from_timings, pre_lead_data.to_timings)
+    if office_timings:
+        data['office_timings'] = office_timings
+
+    data['createdby'] = user_id
+    data['updatedby'] = user_id
+    if not data.get('company_id'):
+        data['company_id'] = 1  # Default company
+    return data
+
+
+class ImportTarget(NamedTuple):
+    model: type
+    schema: Type[BaseModel]
+    build: Callable[[BaseModel, int], dict]
+    sales_rep_name: bool  # Lead.sales_rep holds the rep's name, PreLead.sales_rep a user id
+
+
+IMPORT_TARGETS: Dict[str, ImportTarget] = {
+    "lead": ImportTarget(Lead, LeadCreate, lead_create_data, True),
+    "pre_lead": ImportTarget(PreLead, PreLeadCreate, pre_lead_create_data, False),
+}
+
+
+# ================== LOOKUPS ==================
+
+class ReferenceLookup:
+    """Countries, states, cities and users loaded once per import job"""
+
+    def __init__(self, db: Session):
+        self.country_names: Dict[int, str] = {}
+        self.country_ids: Dict[str, int] = {}
+        for id, name in db.query(Country.id, Country.name):
+            self.country_names[id] = name
+            self.country_ids.setdefault(name.lower(), id)
+
+        # (parent id, name) -> id, plus (None, name) -> first match for rows without a parent
+        self.state_names: Dict[int, str] = {}
+        self.state_ids: Dict[tuple, int] = {}
+        for id, name, country_id in db.query(State.id, State.name, State.country_id):
+            self.state_names[id] = name
+            self.state_ids.setdefault((country_id, name.lower()), id)
+            self.state_ids.setdefault((None, name.lower()), id)
+
+        self.city_names: Dict[int, str] = {}
+        self.city_ids: Dict[tuple, int] = {}
+        for id, name, state_id in db.query(City.id, City.name, City.state_id):
+            self.city_names[id] = name
+            self.city_ids.setdefault((state_id, name.lower()), id)
+            self.city_ids.setdefault((None, name.lower()), id)
+
+        self.user_names: Dict[int, str] = {}
+        self.user_ids: Dict[str, int] = {}
+        for id, email, full_name in db.query(User.id, User.email, User.full_name):
+            self.user_names[id] = full_name or email
+            self.user_ids.setdefault(email.lower(), id)
+            if full_name:
+                self.user_ids.setdefault(full_name.lower(), id)
+
+    def resolve(self, values: dict) -> None:
+        """Turn names in a raw row into ids (assigned_to, country/state/city)"""
+        assigned_to = values.get('assigned_to')
+        if assigned_to and not assigned_to.isdigit():
+            user_id = self.user_ids.get(assigned_to.lower())
+            if user_id is None:
+                raise ValueError(f"assigned_to: unknown user '{assigned_to}'")
+            values['assigned_to'] = str(user_id)
+
+        country_id = _int_or_none(values.get('country_id'))
+        if country_id is None and values.get('country'):
+            country_id = self.country_ids.get(values['country'].lower())
+            values['country_id'] = country_id
+
+        state_id = _int_or_none(values.get('state_id'))
+        if state_id is None and values.get('state'):
+            name = values['state'].lower()
+            state_id = self.state_ids.get((country_id, name)) or self.state_ids.get((None, name))
+            values['state_id'] = state_id
+
+        if _int_or_none(values.get('city_id')) is None and values.get('city'):
+            name = values['city'].lower()
+            values['city_id'] = self.city_ids.get((state_id, name)) or self.city_ids.get((None, name))
+
+    def fill_names(self, data: dict, sales_rep_name: bool) -> None:
+        """Denormalised location / sales rep names, as create_lead sets them"""
+        if data.get('country_id') in self.country_names:
+            data['country'] = self.country_names[data['country_id']]
+        if data.get('state_id') in self.state_names:
+            data['state'] = self.state_names[data['state_id']]
+        if data.get('city_id') in self.city_names:
+            data['city'] = self.city_names[data['city_id']]
+        if sales_rep_name and data.get('assigned_to') in self.user_names:
+            data['sales_rep'] = self.user_names[data['assigned_to']]
+
+
+def _int_or_none(value) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ================== FILE READING ==================
+
+def clean_cell(value) -> Optional[str]:
+    """Normalise a CSV/XLSX cell to the string form the schemas parse"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def read_rows(path: str, filename: str) -> Tuple[Optional[int], Iterator[dict]]:
+    """(row count if known, iterator of {header: value} dicts)"""
+    if filename.lower().endswith(".xlsx"):
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row - 1 if sheet.max_row else None
+
+        def xlsx_rows():
+            try:
+                rows = sheet.iter_rows(values_only=True)
+                header = [clean_cell(cell) for cell in next(rows, [])]
+                for row in rows:
+                    yield dict(zip(header, row))
+            finally:
+                workbook.close()
+        return total, xlsx_rows()
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        total = max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+    def csv_rows():
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    return total, csv_rows()
+
+
+def build_row(target: ImportTarget, raw: dict, lookup: ReferenceLookup, user_id: int) -> dict:
+    values = {}
+    for key, value in raw.items():
+        key = clean_cell(key)
+        value = clean_cell(value)
+        if key and value is not None:
+            values[key] = value
+
+    lookup.resolve(values)
+    data = target.build(target.schema(**values), user_id)
+    lookup.fill_names(data, target.sales_rep_name)
+    return data
+
+
+def validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+    )
+
+
+# ================== INSERTING ==================
+
+def insert_chunk(db: Session, model, rows: List[Tuple[int, dict]]) -> Tuple[int, List[dict]]:
+    """
+    Insert a chunk with one multi-row INSERT per column set. If the chunk
+    fails, retry row by row in savepoints so one bad row only fails itself.
+    """
+    groups = defaultdict(list)
+    for _, data in rows:
+        groups[frozenset(data)].append(data)
+    try:
+        with db.begin_nested():
+            for group in groups.values():
+                db.execute(insert(model), group)
+        return len(rows), []
+    except SQLAlchemyError:
+        pass
+
+    inserted, errors = 0, []
+    for row_number, data in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model), [data])
+            inserted += 1
+        except SQLAlchemyError as e:
+            errors.append({"row": row_number, "error": str(getattr(e, "orig", e))[:500]})
+    return inserted, errors
+
+
+def record_errors(job: ImportJob, errors: List[dict]) -> None:
+    job.failed_rows += len(errors)
+    stored = list(job.errors or [])
+    room = settings.IMPORT_MAX_ERRORS - len(stored)
+    if room > 0 and errors:
+        job.errors = stored + errors[:room]  # reassign so the JSON change is flushed
+
+
+def run_import_job(job_id: int, path: str) -> None:
+    """Background task: import the saved file into the job's entity table"""
+    db = SessionLocal()
+    try:
+        job = db.get(ImportJob, job_id)
+        target = IMPORT_TARGETS[job.entity_type]
+        job.status = ImportJobStatus.RUNNING.value
+        job.started_at = datetime.now(timezone.utc)
+        db.commit()
+
+        try:
+            lookup = ReferenceLookup(db)
+            job.total_rows, rows = read_rows(path, job.filename)
+            db.commit()
+
+            chunk, errors = [], []
+            for row_number, raw in enumerate(rows, start=2):  # row 1 is the header
+                try:
+                    chunk.append((row_number, build_row(target, raw, lookup, job.created_by)))
+                except ValidationError as e:
+                    errors.append({"row": row_number, "error": validation_message(e)})
+                except ValueError as e:
+                    errors.append({"row": row_number, "error": str(e)})
+
+                if len(chunk) + len(errors) >= settings.IMPORT_CHUNK_SIZE:
+                    _flush_chunk(db, job, target, chunk, errors)
+                    chunk, errors = [], []
+            _flush_chunk(db, job, target, chunk, errors)
+
+            job.status = ImportJobStatus.COMPLETED.value
+        except Exception as e:
+            logger.exception("Import job %s failed", job_id)
+            db.rollback()
+            job.status = ImportJobStatus.FAILED.value
+            job.error_message = str(e)
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    finally:
+        db.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _flush_chunk(db: Session, job: ImportJob, target: ImportTarget,
+                 chunk: List[Tuple[int, dict]], errors: List[dict]) -> None:
+    inserted, insert_errors = insert_chunk(db, target.model, chunk) if chunk else (0, [])
+    job.processed_rows += len(chunk) + len(errors)
+    job.inserted_rows += inserted
+    record_errors(job, sorted(errors + insert_errors, key=lambda error: error["row"]))
+    db.commit()
+
+
+# ================== ENDPOINT HELPERS ==================
+
+def start_import(db: Session, upload: UploadFile, entity_type: str, user: User,
+                 background_tasks: BackgroundTasks) -> ImportJob:
+    """Save the upload to a temporary file, create the job and schedule it"""
+    filename = os.path.basename(upload.filename or "")
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in IMPORT_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .xlsx file")
+    if extension == ".xlsx" and openpyxl is None:
+        raise HTTPException(status_code=400, detail="XLSX import requires openpyxl; upload a CSV file instead")
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=extension, prefix="import-") as tmp:
+        shutil.copyfileobj(upload.file, tmp, 1024 * 1024)
+
+    job = ImportJob(entity_type=entity_type, filename=filename[:255], created_by=user.id)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    background_tasks.add_task(run_import_job, job.id, tmp.name)
+    return job
+
+
+def get_import_job(db: Session, job_id: int, entity_type: str, user: User) -> ImportJob:
+    job = db.get(ImportJob, job_id)
+    if not job or job.entity_type != entity_type:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.created_by != user.id and user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return job
@@ -0,0 +1,341 @@
+"""
+PDF export of customer requirement tabs.
+
+Each tab is described by a `TabSpec` (CR relationship, fields and how to
+print them) and turned into a `PdfSection` from its rows; rendering and
+caching are in app.services.pdf_rendering. Rendered tabs are cached per
+(CR, tab) and checked against the content hash, and the CR's update
+endpoints call `invalidate_cr_pdfs()`.
+
+The review pack (`pdf_pack_response()`) has every tab of a CR: the CR and
+all tab rows are loaded together by `load_cr_for_pack()`, and it is either
+one combined PDF or a ZIP with a PDF per tab, whose tabs are rendered in
+parallel and streamed into the archive.
+"""
+import enum
+import json
+import zipfile
+from datetime import datetime
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core.http_cache import CACHE_CONTROL, etag_matches
+from app.models.customer_requirement import CustomerRequirement
+from app.services.document_download import content_disposition
+from app.services.pdf_rendering import (
+    Block, PdfSection, content_hash, html_to_text, pdf_renderer, text_blocks
+)
+
+# Field kinds: "field" (Label: value), "bool" (Yes/No), "money" (with the
+# row's currency), "list" (JSON array), "rich" (HTML text under a heading),
+# "choices" (labels of the set checkboxes; the attribute is a tuple of
+# (attribute, label) pairs, and text attributes print their value)
+Field = Tuple[str, str, object]  # kind, label, attribute
+
+PACK_KEY = "pack"
+
+
+class PdfPackFormat(str, enum.Enum):
+    PDF = "pdf"
+    ZIP = "zip"
+
+
+class TabSpec(NamedTuple):
+    title: str
+    relation: str  # CustomerRequirement relationship holding the rows
+    fields: Tuple[Field, ...]
+    many: bool = False  # several rows per CR, printed in id order
+    number_attr: Optional[str] = None  # heading suffix for each row
+
+
+PDF_TABS = {
+    "introduction": TabSpec("Introduction", "introductions", (
+        ("field", "Email Format", "email_format"),
+        ("rich", "Email Content", "email_content"),
+        ("rich", "Notes", "notes"),
+    )),
+    "requirement": TabSpec("Requirement", "requirements", (
+        ("field", "Software Type", "software_type"),
+        ("list", "Modules Required", "modules_required"),
+        ("bool", "E-commerce Required", "ecommerce_required"),
+        ("list", "E-commerce Modules", "ecommerce_modules"),
+        ("field", "Status", "status"),
+        ("rich", "Business Analysis", "business_analysis"),
+        ("rich", "Functional Analysis", "functional_analysis"),
+        ("rich", "Software Analysis", "software_analysis"),
+        ("rich", "Process Flow Notes", "process_flow_notes"),
+    )),
+    "presentation": TabSpec("Presentation", "presentations", (
+        ("field", "Date", "presentation_date"),
+        ("field", "Time", "presentation_time"),
+        ("field", "Location", "location"),
+        ("field", "Meeting Link", "meeting_link"),
+        ("field", "Status", "status"),
+        ("rich", "Notes", "notes"),
+    ), many=True),
+    "demo": TabSpec("Demo", "demos", (
+        ("field", "Demo Date", "demo_date"),
+        ("field", "Time", "demo_time"),
+        ("field", "Demo Type", "demo_type"),
+        ("field", "Location", "location"),
+        ("field", "Meeting Link", "meeting_link"),
+        ("list", "Modules", "modules_to_demo"),
+        ("field", "Status", "status"),
+        ("rich", "Notes", "notes"),
+        ("rich", "Feedback", "feedback"),
+    ), many=True),
+    "proposal": TabSpec("Proposal", "proposals", (
+        ("field", "Proposal Date", "proposal_date"),
+        ("field", "Valid Until", "valid_until"),
+        ("field", "Status", "status"),
+        ("money", "Subtotal", "subtotal"),
+        ("money", "Discount", "discount"),
+        ("money", "Tax", "tax"),
+        ("money", "Total", "total"),
+        ("rich", "Purpose", "purpose"),
+        ("rich", "Scope", "scope"),
+        ("rich", "Deliverables", "deliverables"),
+        ("rich", "Terms & Conditions", "terms_conditions"),
+    ), many=True, number_attr="proposal_number"),
+    "agreement": TabSpec("Agreement", "agreements", (
+        ("field", "Agreement Type", "agreement_type"),
+        ("field", "Agreement Date", "agreement_date"),
+        ("field", "Start Date", "start_date"),
+        ("field", "End Date", "end_date"),
+        ("money", "Agreement Value", "agreement_value"),
+        ("field", "Status", "status"),
+        ("bool", "Signed by Customer", "signed_by_customer"),
+        ("field", "Customer Signatory", "customer_signatory"),
+        ("bool", "Signed by Company", "signed_by_company"),
+        ("field", "Company Signatory", "company_signatory"),
+        ("rich", "Terms", "terms"),
+        ("rich", "Special Conditions", "special_conditions"),
+    ), many=True, number_attr="agreement_number"),
+    "diligence_short_form": TabSpec("Diligence Short Form", "diligence_short_forms", (
+        ("field", "Company Name", "company_name"),
+        ("field", "Key Person", "key_person"),
+        ("field", "Designation", "designation"),
+        ("field", "Email", "email"),
+        ("field", "Phone", "phone"),
+        ("field", "Website", "website"),
+        ("field", "Address", "address"),
+        ("field", "Postal Code", "postal_code"),
+        ("field", "Years of Operation", "years_operation"),
+        ("field", "Branch Address", "branch_address"),
+        ("choices", "Years in Business", (
+            ("years_1_5", "1-5 years"), ("years_6_10", "6-10 years"),
+            ("years_11_50", "11-50 years"), ("years_51_100", "51-100 years"),
+        )),
+        ("choices", "Company Size (Employees)", (
+            ("size_1_5", "1-5"), ("size_6_10", "6-10"), ("size_11_50", "11-50"),
+            ("size_51_100", "51-100"), ("size_100_plus", "100+"),
+        )),
+        ("choices", "Annual Revenue", (
+            ("rev_100k", "Up to US$ 100,000"), ("rev_250k", "US$ 100,000 - 250,000"),
+            ("rev_1m", "US$ 250,000 - 1,000,000"), ("rev_5m", "US$ 1,000,000 - 5,000,000"),
+            ("rev_10m", "US$ 5,000,000 - 10,000,000"), ("rev_above_10m", "Above US$ 10,000,000"),
+        )),
+        ("choices", "Industry Type", (
+            ("industry_trading", "Trading"), ("industry_manufacturing", "Manufacturing"),
+            ("industry_services", "Services"), ("industry_distribution", "Distribution / Wholesale"),
+            ("industry_retail", "Retail / POS"), ("industry_projects", "Projects / EPC"),
+            ("industry_consulting", "Consulting / Advisory"), ("industry_other", "Other"),
+        )),
+        ("choices", "Markets Served", (
+            ("market_local", "Local"), ("market_national", "National"), ("market_international", "International"),
+        )),
+        ("choices", "Legal Structure", (
+            ("legal_sole", "Sole Proprietorship"), ("legal_partnership", "Partnership"), ("legal_llc", "LLC"),
+        )),
+        ("choices", "Current Systems", (
+            ("sys_paper", "Paper / Excel Sheets"), ("sys_account", "Accounting Software"),
+            ("sys_crm", "CRM Software"), ("sys_hrm", "HRM Software"),
+            ("sys_inv", "Inventory / Stock System"), ("sys_erp", "ERP System"), ("sys_other", "Other"),
+        )),
+        ("choices", "Key Business Priorities", (
+            ("key_cust", "Getting More Customers"), ("key_suppliers", "Managing Suppliers & Vendors"),
+            ("key_proposal", "Faster Proposals / Quotations"), ("key_inventory", "Tracking Inventory & Stock"),
+            ("key_financial", "Better Financial Control"), ("key_projects", "Tracking Projects & Timesheets"),
+            ("key_employees", "Managing Employees"), ("key_dms", "Access to Documents"),
+            ("key_reports", "Business Reports"), ("key_integration", "Integration Across Departments"),
+            ("key_multicurrency", "Multi-Currency Support"), ("key_errors", "Reduce Manual Errors"),
+            ("key_costs", "Reduce Operational Costs"), ("key_other", "Other"),
+        )),
+        ("choices", "Main Business Challenges", (
+            ("main_manual", "Manual work in Excel / Paper"), ("main_tracking", "Tracking orders, stock or shipments"),
+            ("main_delay", "Delays in Quotations / Invoices"), ("main_payments", "No view of payments & collections"),
+            ("main_inventory", "Inventory or supply chain issues"), ("main_suppliers", "Managing suppliers / vendors"),
+            ("main_hr", "Leave, payroll or performance issues"), ("main_emp", "Leave, payroll or performance issues"),
+            ("main_reports", "Lack of reports"), ("main_lack", "Lack of reports"),
+            ("main_currency", "Multiple currencies"), ("main_diff", "Multiple currencies"),
+            ("main_branches", "Multiple branches / locations"), ("main_branch", "Multiple branches / locations"),
+            ("main_other", "Other"),
+        )),
+        ("rich", "Other Requirements / Notes", "other_notes"),
+    )),
+    "meeting_calendar": TabSpec("Meeting Calendar", "meeting_calendars", (
+        ("field", "Presentation Date", "prefered_date"),
+        ("field", "Presentation Time", "prefered_time"),
+        ("rich", "Presentation Remark", "gi_remark"),
+        ("field", "Demo Date", "prefered_date2"),
+        ("field", "Demo Time", "prefered_time2"),
+        ("rich", "Demo Remark", "gi_remark2"),
+        ("field", "Branch Address", "gi_branch_address"),
+    )),
+}
+
+
+def _json_list(value) -> str:
+    if not value:
+        return ""
+    try:
+        items = json.loads(value) if isinstance(value, str) else value
+    except ValueError:
+        return str(value)
+    if isinstance(items, list):
+        return ", ".join(
+            str(item.get("title", item.get("name", item))) if isinstance(item, dict) else str(item)
+            for item in items
+        )
+    return str(items)
+
+
+def _record_blocks(spec: TabSpec, record) -> List[Block]:
+    blocks: List[Block] = []
+    for kind, label, attr in spec.fields:
+        value = getattr(record, attr, None) if isinstance(attr, str) else None
+        if kind == "rich":
+            text = html_to_text(value)
+            if text:
+                blocks.append(("spacer", 10))
+                blocks.append(("heading", label))
+                blocks.extend(text_blocks(text))
+        elif kind == "bool":
+            blocks.append(("text", f"{label}: {'Yes' if value else 'No'}"))
+        elif kind == "money":
+            blocks.append(("text", f"{label}: {value or 0:,.2f} {getattr(record, 'currency', None) or ''}".rstrip()))
+        elif kind == "choices":
+            chosen = []
+            for choice_attr, choice_label in attr:
+                choice = getattr(record, choice_attr, None)
+                if isinstance(choice, str):
+                    choice = choice.strip() and f"{choice_label}: {choice.strip()}"
+                elif choice:
+                    choice = choice_label
+                if choice and choice not in chosen:
+                    chosen.append(choice)
+            blocks.append(("text", f"{label}: {', '.join(chosen) or 'N/A'}"))
+        elif kind == "list":
+            blocks.append(("text", f"{label}: {_json_list(value) or 'N/A'}"))
+        else:
+            blocks.append(("text", f"{label}: {value if value not in (None, '') else 'N/A'}"))
+    return blocks
+
+
+def tab_section(cr: CustomerRequirement, tab_name: str, records: Sequence) -> PdfSection:
+    """Section for one tab from its rows (any order)"""
+    company_name = cr.company_name or (cr.lead.company_name if cr.lead else None) or "N/A"
+    title = f"Customer Requirement - {tab_name.replace('_', ' ').title()}"
+    spec = PDF_TABS.get(tab_name)
+    if spec is None:
+        return PdfSection(title, (f"Company: {company_name}",), (("text", f"PDF generation for '{tab_name}' tab"),))
+
+    records = sorted(records, key=lambda record: record.id)
+    if not spec.many:
+        records = records[:1]
+    blocks: List[Block] = []
+    for index, record in enumerate(records, 1):
+        heading = f"{spec.title} Details"
+        if spec.many and len(records) > 1:
+            number = getattr(record, spec.number_attr, None) if spec.number_attr else None
+            heading = f"{spec.title} {number or index}"
+        if blocks:
+            blocks.append(("spacer", 20))
+        blocks.append(("heading", heading))
+        blocks.extend(_record_blocks(spec, record))
+    if not blocks:
+        blocks.append(("text", f"No {spec.title.lower()} details recorded."))
+    return PdfSection(title, (f"Company: {company_name}",), tuple(blocks))
+
+
+def load_tab_section(cr: CustomerRequirement, tab_name: str) -> PdfSection:
+    """Section for one tab (lazy-loads its rows unless already loaded)"""
+    spec = PDF_TABS.get(tab_name)
+    return tab_section(cr, tab_name, getattr(cr, spec.relation) if spec else [])
+
+
+def load_cr_for_pack(db: Session, cr_id: int) -> Optional[CustomerRequirement]:
+    """The CR with its lead and every tab's rows, loaded up front (no lazy loads)"""
+    return db.query(CustomerRequirement).options(
+        joinedload(CustomerRequirement.lead),
+        *[selectinload(getattr(CustomerRequirement, spec.relation)) for spec in PDF_TABS.values()],
+    ).filter(CustomerRequirement.id == cr_id).first()
+
+
+def invalidate_cr_pdfs(cr_id: int) -> None:
+    pdf_renderer.invalidate(*[(cr_id, tab_name) for tab_name in (*PDF_TABS, PACK_KEY)])
+
+
+def pdf_response(request: Request, cache_key, sections: List[PdfSection], filename: str) -> Response:
+    """PDF download, or 304 when the client has this content (no rendering)"""
+    etag = f'"{content_hash(sections)}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    pdf, _ = pdf_renderer.get(cache_key, sections, datetime.now().strftime('%Y-%m-%d %H:%M'))
+    headers["Content-Disposition"] = content_disposition(filename)
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+
+class _ChunkWriter:
+    """Write-only stream for zipfile; the archive is handed out chunk by chunk"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_zip(files: Sequence[Tuple[str, bytes]]) -> Iterator[bytes]:
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield writer.take()
+    yield writer.take()
+
+
+def pdf_pack_response(request: Request, cr: CustomerRequirement, format: PdfPackFormat, name: str) -> Response:
+    """
+    Every tab of a CR (loaded by load_cr_for_pack) as one PDF or a ZIP of
+    per-tab PDFs, or 304 when the client has this content
+    """
+    tabs = [(tab_name, tab_section(cr, tab_name, getattr(cr, spec.relation))) for tab_name, spec in PDF_TABS.items()]
+    sections = [section for _, section in tabs]
+    etag = f'"{content_hash(sections)}-{format.value}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+    headers["Content-Disposition"] = content_disposition(f"{name}.{format.value}")
+    if format == PdfPackFormat.PDF:
+        pdf, _ = pdf_renderer.get((cr.id, PACK_KEY), sections, generated)
+        return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+    rendered = pdf_renderer.get_many([((cr.id, tab_name), [section]) for tab_name, section in tabs], generated)
+    files = [(f"{name}_{tab_name}.pdf", pdf) for (tab_name, _), (pdf, _) in zip(tabs, rendered)]
+    return StreamingResponse(_iter_zip(files), media_type="application/zip", headers=headers)
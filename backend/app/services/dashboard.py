@@ -0,0 +1,274 @@
+"""
+Dashboard aggregation layer.
+
+Every table is read once: the time buckets (today, this week, this month,
+last month) are computed as conditional aggregates (COUNT ... FILTER) in the
+same statement, and the lead funnel is grouped by lead_status so the per-stage
+count and value come back with the totals.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, select
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict
+
+from app.models.pre_lead import PreLead
+from app.models.lead import Lead
+from app.models.customer import Customer, CustomerStatus
+from app.models.activity import Activity
+from app.models.sales_target import SalesTarget
+from app.schemas.dashboard import (
+    DashboardStats, QuickStats, CountStats, ConversionStats,
+    FunnelData, FunnelStage, RecentActivity, LeadsBySource,
+    LeadsByStatus, SalesTargetProgress
+)
+from app.services.name_lookup import get_person_names, get_user_names
+
+# Workflow values of Lead.lead_status, in funnel order
+LEAD_STATUS_VALUES = ["new", "contacted", "qualified", "proposal_sent", "negotiation", "won", "lost"]
+
+
+def get_period_bounds(now: datetime) -> Dict[str, datetime]:
+    """Start of today, this week, this month and last month"""
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    month_start = today_start.replace(day=1)
+    return {
+        "today": today_start,
+        "week": today_start - timedelta(days=now.weekday()),
+        "month": month_start,
+        "last_month": (month_start - timedelta(days=1)).replace(day=1),
+    }
+
+
+def bucket_columns(model, bounds: Dict[str, datetime], date_field: str = "created_at") -> list:
+    """Conditional COUNT columns for the dashboard time buckets"""
+    date_col = getattr(model, date_field)
+    return [
+        func.count(model.id).label("total"),
+        func.count(model.id).filter(date_col >= bounds["today"]).label("today"),
+        func.count(model.id).filter(date_col >= bounds["week"]).label("this_week"),
+        func.count(model.id).filter(date_col >= bounds["month"]).label("this_month"),
+        func.count(model.id).filter(
+            and_(date_col >= bounds["last_month"], date_col < bounds["month"])
+        ).label("last_month"),
+    ]
+
+
+def make_count_stats(total: int, today: int, this_week: int, this_month: int, last_month: int) -> CountStats:
+    """Build CountStats from bucket counts"""
+    change_percentage = 0.0
+    if last_month > 0:
+        change_percentage = ((this_month - last_month) / last_month) * 100
+
+    return CountStats(
+        total=total,
+        today=today,
+        this_week=this_week,
+        this_month=this_month,
+        change_percentage=round(change_percentage, 2)
+    )
+
+
+def get_pre_lead_aggregates(db: Session, bounds: Dict[str, datetime]) -> dict:
+    """Time buckets and conversions for active pre-leads in one query"""
+    row = db.query(
+        *bucket_columns(PreLead, bounds),
+        func.count(PreLead.id).filter(PreLead.is_converted == True).label("converted")
+    ).filter(PreLead.status == 0).one()
+
+    return {
+        "stats": make_count_stats(row.total, row.today, row.this_week, row.this_month, row.last_month),
+        "converted": row.converted or 0,
+    }
+
+
+def get_lead_aggregates(db: Session, bounds: Dict[str, datetime]) -> dict:
+    """Time buckets, conversions and funnel stages for active leads in one query"""
+    rows = db.query(
+        Lead.lead_status,
+        *bucket_columns(Lead, bounds),
+        func.count(Lead.id).filter(Lead.is_converted == True).label("converted"),
+        func.sum(Lead.expected_value).label("value")
+    ).filter(Lead.status == 0).group_by(Lead.lead_status).all()
+
+    totals = {key: 0 for key in ("total", "today", "this_week", "this_month", "last_month", "converted")}
+    stages = {}
+    for row in rows:
+        for key in totals:
+            totals[key] += getattr(row, key) or 0
+        stages[row.lead_status] = (row.total, row.value or Decimal(0))
+
+    return {
+        "stats": make_count_stats(
+            totals["total"], totals["today"], totals["this_week"],
+            totals["this_month"], totals["last_month"]
+        ),
+        "converted": totals["converted"],
+        "stages": stages,
+    }
+
+
+def get_customer_aggregates(db: Session, bounds: Dict[str, datetime]) -> dict:
+    """Time buckets for active customers in one query"""
+    row = db.query(*bucket_columns(Customer, bounds)).filter(
+        Customer.status == CustomerStatus.ACTIVE
+    ).one()
+
+    return {
+        "stats": make_count_stats(row.total, row.today, row.this_week, row.this_month, row.last_month),
+    }
+
+
+def get_recent_activities(db: Session, limit: int = 10) -> list:
+    """Latest activities with their lead/customer and performer names (batch-resolved)"""
+    recent_activities_raw = db.query(Activity).order_by(
+        Activity.created_at.desc()
+    ).limit(limit).all()
+
+    lead_names = get_person_names(db, Lead, (a.lead_id for a in recent_activities_raw))
+    customer_names = get_person_names(db, Customer, (a.customer_id for a in recent_activities_raw))
+    performer_names = get_user_names(db, (a.performed_by for a in recent_activities_raw))
+
+    recent_activities = []
+    for activity in recent_activities_raw:
+        entity_type = "lead" if activity.lead_id else "customer"
+        entity_id = activity.lead_id or activity.customer_id
+
+        if activity.lead_id:
+            entity_name = lead_names.get(activity.lead_id, "Unknown")
+        else:
+            entity_name = customer_names.get(activity.customer_id, "Unknown")
+
+        recent_activities.append(RecentActivity(
+            id=activity.id,
+            activity_type=activity.activity_type.value,
+            subject=activity.subject,
+            description=activity.description,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            entity_name=entity_name,
+            performed_by_name=performer_names.get(activity.performed_by),
+            created_at=activity.created_at
+        ))
+
+    return recent_activities
+
+
+def build_dashboard_stats(db: Session) -> DashboardStats:
+    """Compute the full dashboard payload"""
+    now = datetime.utcnow()
+    bounds = get_period_bounds(now)
+
+    pre_lead_agg = get_pre_lead_aggregates(db, bounds)
+    lead_agg = get_lead_aggregates(db, bounds)
+    customer_agg = get_customer_aggregates(db, bounds)
+
+    pre_lead_stats = pre_lead_agg["stats"]
+    lead_stats = lead_agg["stats"]
+    customer_stats = customer_agg["stats"]
+
+    # Conversion stats (only active records with status=0)
+    total_pre_leads = pre_lead_stats.total or 1
+    total_leads = lead_stats.total or 1
+
+    conversions = ConversionStats(
+        pre_lead_to_lead=round((pre_lead_agg["converted"] / total_pre_leads) * 100, 2),
+        lead_to_customer=round((lead_agg["converted"] / total_leads) * 100, 2),
+        overall=round((customer_stats.total / total_pre_leads) * 100, 2)
+    )
+
+    # Funnel data - using lead_status workflow field
+    funnel_stages = []
+    leads_by_status = []
+    for status_val in LEAD_STATUS_VALUES:
+        count, value = lead_agg["stages"].get(status_val, (0, Decimal(0)))
+        funnel_stages.append(FunnelStage(stage=status_val, count=count, value=value))
+        leads_by_status.append(LeadsByStatus(status=status_val, count=count))
+
+    funnel = FunnelData(
+        pre_leads=pre_lead_stats.total,
+        leads=lead_stats.total,
+        customers=customer_stats.total,
+        stages=funnel_stages
+    )
+
+    # Leads by source (only active leads with status=0)
+    leads_by_source_raw = db.query(
+        Lead.source,
+        func.count(Lead.id).label('count')
+    ).filter(Lead.status == 0).group_by(Lead.source).all()
+
+    total_leads_count = sum(item.count for item in leads_by_source_raw) or 1
+    leads_by_source = [
+        LeadsBySource(
+            source=item.source.value if item.source else "unknown",
+            count=item.count,
+            percentage=round((item.count / total_leads_count) * 100, 2)
+        )
+        for item in leads_by_source_raw
+        if item.source is not None
+    ]
+
+    # Sales targets
+    active_targets = db.query(SalesTarget).filter(
+        and_(
+            SalesTarget.start_date <= now,
+            SalesTarget.end_date >= now
+        )
+    ).all()
+
+    sales_targets = [
+        SalesTargetProgress(
+            target_name=target.name,
+            target_value=target.target_value,
+            achieved_value=target.achieved_value,
+            progress_percentage=round(
+                (float(target.achieved_value) / float(target.target_value)) * 100, 2
+            ) if target.target_value else 0,
+            currency=target.currency
+        )
+        for target in active_targets
+    ]
+
+    return DashboardStats(
+        pre_leads=pre_lead_stats,
+        leads=lead_stats,
+        customers=customer_stats,
+        conversions=conversions,
+        funnel=funnel,
+        recent_activities=get_recent_activities(db),
+        leads_by_source=leads_by_source,
+        leads_by_status=leads_by_status,
+        sales_targets=sales_targets,
+        top_performers=[]
+    )
+
+
+def build_quick_stats(db: Session) -> QuickStats:
+    """Compute the quick stats in a single round trip (one scalar subquery per figure)"""
+    now = datetime.utcnow()
+
+    row = db.query(
+        select(func.count(PreLead.id)).where(PreLead.status == 0).scalar_subquery().label("total_pre_leads"),
+        select(func.count(Lead.id)).where(Lead.status == 0).scalar_subquery().label("total_leads"),
+        select(func.count(Customer.id)).where(
+            Customer.status == CustomerStatus.ACTIVE
+        ).scalar_subquery().label("total_customers"),
+        select(func.count(Lead.id)).where(
+            Lead.status == 0,
+            Lead.next_follow_up.isnot(None),
+            Lead.next_follow_up <= now + timedelta(days=1)
+        ).scalar_subquery().label("pending_follow_ups"),
+        select(func.count(Activity.id)).where(
+            Activity.is_completed == False,
+            Activity.scheduled_date < now
+        ).scalar_subquery().label("overdue_tasks"),
+    ).one()
+
+    return QuickStats(
+        total_pre_leads=row.total_pre_leads or 0,
+        total_leads=row.total_leads or 0,
+        total_customers=row.total_customers or 0,
+        pending_follow_ups=row.pending_follow_ups or 0,
+        overdue_tasks=row.overdue_tasks or 0
+    )
@@ -0,0 +1,199 @@
+"""
+Dashboard snapshots.
+
+The dashboard payloads are computed by a background refresher and stored in
+the dashboard_snapshots table, so page loads read one row instead of counting
+the lead/pre-lead/customer/activity tables. Commits that touch those tables
+wake the refresher; otherwise it runs every DASHBOARD_SNAPSHOT_REFRESH_SECONDS.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Callable, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.http_cache import invalidate
+from app.models.pre_lead import PreLead
+from app.models.lead import Lead
+from app.models.customer import Customer
+from app.models.activity import Activity
+from app.models.sales_target import SalesTarget
+from app.models.dashboard_snapshot import DashboardSnapshot
+from app.services.dashboard import build_dashboard_stats, build_quick_stats
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "stats"
+QUICK_STATS_KEY = "quick_stats"
+
+# app.core.http_cache namespace of the /dashboard responses
+DASHBOARD_CACHE = "dashboard"
+
+# Writes to these tables make the snapshots stale
+WATCHED_MODELS = (PreLead, Lead, Customer, Activity, SalesTarget)
+
+SNAPSHOT_BUILDERS = {
+    STATS_KEY: build_dashboard_stats,
+    QUICK_STATS_KEY: build_quick_stats,
+}
+
+
+def _as_utc(value: datetime) -> datetime:
+    """SQLite drops tzinfo; stored values are always UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def save_snapshot(db: Session, key: str, payload: BaseModel, duration_ms: Optional[int] = None) -> DashboardSnapshot:
+    """Insert or update the snapshot row for a key (caller commits)"""
+    snapshot = db.query(DashboardSnapshot).filter(DashboardSnapshot.snapshot_key == key).first()
+    if not snapshot:
+        snapshot = DashboardSnapshot(snapshot_key=key)
+        db.add(snapshot)
+
+    snapshot.payload = payload.model_dump(mode="json")
+    snapshot.refreshed_at = datetime.now(timezone.utc)
+    snapshot.refresh_duration_ms = duration_ms
+    return snapshot
+
+
+def refresh_snapshots(db: Session, min_age_seconds: int = 0) -> bool:
+    """
+    Recompute all dashboard snapshots.
+
+    Skips the refresh (returns False) when the newest snapshot is younger than
+    min_age_seconds, so several workers sharing the table do not repeat work.
+    """
+    if min_age_seconds:
+        last_refresh = db.query(DashboardSnapshot.refreshed_at).order_by(
+            DashboardSnapshot.refreshed_at.desc()
+        ).limit(1).scalar()
+        if last_refresh:
+            age = (datetime.now(timezone.utc) - _as_utc(last_refresh)).total_seconds()
+            if age < min_age_seconds:
+                return False
+
+    for key, builder in SNAPSHOT_BUILDERS.items():
+        started = time.perf_counter()
+        payload = builder(db)
+        save_snapshot(db, key, payload, int((time.perf_counter() - started) * 1000))
+
+    db.commit()
+    invalidate(DASHBOARD_CACHE)
+    return True
+
+
+def get_snapshot_payload(db: Session, key: str, schema: Type[BaseModel]) -> BaseModel:
+    """
+    Return the stored payload for a key with its staleness filled in.
+
+    Falls back to a live computation when snapshots are disabled, and seeds
+    the snapshot when none has been stored yet.
+    """
+    builder: Callable[[Session], BaseModel] = SNAPSHOT_BUILDERS[key]
+    now = datetime.now(timezone.utc)
+
+    if not settings.DASHBOARD_SNAPSHOT_ENABLED:
+        return builder(db).model_copy(update={"snapshot_at": now, "stale_seconds": 0.0})
+
+    snapshot = db.query(DashboardSnapshot).filter(DashboardSnapshot.snapshot_key == key).first()
+    if snapshot is None:
+        payload = builder(db)
+        try:
+            snapshot = save_snapshot(db, key, payload)
+            db.commit()
+        except IntegrityError:
+            # Another worker seeded the same key first
+            db.rollback()
+            return payload.model_copy(update={"snapshot_at": now, "stale_seconds": 0.0})
+
+    refreshed_at = _as_utc(snapshot.refreshed_at)
+    result = schema.model_validate(snapshot.payload)
+    return result.model_copy(update={
+        "snapshot_at": refreshed_at,
+        "stale_seconds": round(max((now - refreshed_at).total_seconds(), 0.0), 3),
+    })
+
+
+class SnapshotRefresher:
+    """Background thread that keeps the dashboard snapshots up to date"""
+
+    def __init__(self, interval_seconds: int, min_interval_seconds: int):
+        self.interval_seconds = interval_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._wake.set()  # refresh once on startup
+        self._thread = threading.Thread(target=self._run, name="dashboard-snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def mark_dirty(self) -> None:
+        """Request a refresh after a tracked table changed"""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            woken = self._wake.wait(timeout=self.interval_seconds)
+            if self._stopping.is_set():
+                break
+            self._wake.clear()
+
+            # Timed refreshes defer to a recent refresh by another worker;
+            # refreshes requested after a local write always run.
+            min_age = 0 if woken else self.min_interval_seconds
+            db = SessionLocal()
+            try:
+                refresh_snapshots(db, min_age_seconds=min_age)
+            except Exception:
+                db.rollback()
+                logger.exception("Dashboard snapshot refresh failed")
+            finally:
+                db.close()
+
+            # Coalesce bursts of writes into one refresh per min interval
+            self._stopping.wait(self.min_interval_seconds)
+
+
+snapshot_refresher = SnapshotRefresher(
+    interval_seconds=settings.DASHBOARD_SNAPSHOT_REFRESH_SECONDS,
+    min_interval_seconds=settings.DASHBOARD_SNAPSHOT_MIN_REFRESH_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_dashboard_writes(session, flush_context):
+    if any(isinstance(obj, WATCHED_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["dashboard_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_dashboard_refresher(session):
+    if session.info.pop("dashboard_dirty", False):
+        snapshot_refresher.mark_dirty()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dashboard_writes(session):
+    session.info.pop("dashboard_dirty", None)
@@ -0,0 +1,166 @@
+"""
+Authenticated document downloads.
+
+`document_response()` serves a stored document (see app.services.file_storage)
+for the per-entity download endpoints, which check access first:
+
+- Validators: the ETag is the content hash for content-addressed files (size
+  and mtime for older ones); Last-Modified is the upload time. Matching
+  If-None-Match / If-Modified-Since gets 304.
+- Range: a single byte range ("bytes=500-", "bytes=-500") gets 206 and
+  honours If-Range, so interrupted downloads resume where they stopped.
+  Multi-range requests get the whole file.
+- Full local files go out through FileResponse, which hands the path to the
+  server when it supports the ASGI pathsend extension (zero-copy sendfile);
+  ranges and other backends are streamed in DOCUMENT_DOWNLOAD_CHUNK_BYTES
+  chunks from the threadpool.
+- Cache-Control is private (the download is access checked) with
+  DOCUMENT_CACHE_MAX_AGE, as a document's file never changes.
+"""
+from contextlib import closing
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.services.file_storage import get_storage, key_from_path, sha256_from_key
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single-range Range header; None when the
+    header should be ignored (not bytes, malformed or several ranges)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _http_date(value: datetime) -> str:
+    return formatdate(value.timestamp(), usegmt=True)
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    since = _parse_http_date(if_modified_since)
+    if since is None or since.tzinfo is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _iter_stream(stream, length: int) -> Iterator[bytes]:
+    with closing(stream):
+        remaining = length
+        while remaining > 0:
+            chunk = stream.read(min(settings.DOCUMENT_DOWNLOAD_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def document_response(
+    request: Request,
+    path: str,
+    filename: str,
+    content_type: Optional[str] = None,
+    uploaded_at: Optional[datetime] = None,
+    inline: bool = False,
+) -> Response:
+    """Download response for a document's stored file (access already checked)"""
+    storage = get_storage()
+    key = key_from_path(path)
+    try:
+        size, modified_at = storage.stat(key)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    last_modified = uploaded_at or modified_at or datetime.now(timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    sha256 = sha256_from_key(key)
+    if sha256:
+        etag = f'"{sha256}"'
+    else:
+        etag = f'"{size:x}-{int((modified_at or last_modified).timestamp()):x}"'
+
+    media_type = content_type or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": _http_date(last_modified),
+        "Cache-Control": f"private, max-age={settings.DOCUMENT_CACHE_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or (
+        if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    ):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = content_disposition(filename, "inline" if inline else "attachment")
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag or if_range == headers["Last-Modified"]):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(length)
+        return StreamingResponse(
+            _iter_stream(storage.open(key, start), length),
+            status_code=206, media_type=media_type, headers=headers,
+        )
+
+    local_path = storage.local_path(key)
+    if local_path:
+        return FileResponse(local_path, media_type=media_type, headers=headers)
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(_iter_stream(storage.open(key), size), media_type=media_type, headers=headers)
@@ -0,0 +1,457 @@
+"""
+Bulk email campaigns (persistent job queue).
+
+The bulk-email endpoints store an email_campaigns row plus one
+email_campaign_recipients row per message and return at once.
+EmailCampaignWorker then:
+
+1. claims a queued/running campaign whose lease has expired (SELECT ... FOR
+   UPDATE SKIP LOCKED on PostgreSQL) and leases it for
+   EMAIL_CAMPAIGN_LEASE_SECONDS;
+2. sends the next EMAIL_CAMPAIGN_BATCH_SIZE due recipients concurrently over
+   the pooled SMTP sender, within the per-domain rate limits (throttled
+   recipients are deferred, not failed);
+3. in one transaction marks the batch sent / failed / retried, inserts an
+   Activity per sent message, updates the campaign counters and renews the
+   lease.
+
+Progress is committed per batch, so campaigns survive restarts: a campaign
+whose worker died is resumed by any worker once the lease expires. Messages
+of the batch in flight at that moment may be sent twice.
+
+The worker runs in the API process (EMAIL_CAMPAIGN_WORKER_ENABLED) and/or
+in dedicated processes (`python email_worker.py`); leases let any number of
+them share the queue.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, func, insert, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.activity import Activity, ActivityType
+from app.models.email_campaign import (
+    EmailCampaign, EmailCampaignRecipient, EmailCampaignStatus, EmailRecipientStatus
+)
+from app.services.email_sender import DomainRateLimiter, build_message, create_sender
+from app.services.file_storage import get_storage, key_from_path
+
+logger = logging.getLogger(__name__)
+
+RECIPIENT_INSERT_CHUNK_SIZE = 1000
+# Throttled sends wait in the worker up to this long before being deferred
+MAX_RATE_LIMIT_WAIT_SECONDS = 1.0
+
+_QUEUED_FLAG = "email_campaign_queued"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ================== ENDPOINT HELPERS ==================
+
+async def create_campaign(db: AsyncSession, subject: str, body: str, recipient_type: str,
+                          created_by: Optional[int], cc: Optional[List[str]] = None,
+                          bcc: Optional[List[str]] = None,
+                          attachments: Optional[List[dict]] = None) -> EmailCampaign:
+    """Add a queued campaign (caller adds recipients and commits)"""
+    campaign = EmailCampaign(
+        subject=subject,
+        body=body,
+        cc=cc or None,
+        bcc=bcc or None,
+        attachments=attachments or None,
+        recipient_type=recipient_type,
+        status=EmailCampaignStatus.QUEUED.value,
+        total_recipients=0,
+        sent_count=0,
+        failed_count=0,
+        created_by=created_by,
+    )
+    db.add(campaign)
+    await db.flush()
+    db.info[_QUEUED_FLAG] = True
+    return campaign
+
+
+async def add_recipients(db: AsyncSession, campaign: EmailCampaign, rows: List[dict]) -> int:
+    """Insert recipients given as dicts (email, name, lead_id / customer_id)"""
+    for start in range(0, len(rows), RECIPIENT_INSERT_CHUNK_SIZE):
+        await db.execute(insert(EmailCampaignRecipient), [
+            {
+                "campaign_id": campaign.id,
+                "email": row["email"],
+                "name": row.get("name"),
+                "lead_id": row.get("lead_id"),
+                "customer_id": row.get("customer_id"),
+                "status": EmailRecipientStatus.PENDING.value,
+                "attempts": 0,
+            }
+            for row in rows[start:start + RECIPIENT_INSERT_CHUNK_SIZE]
+        ])
+    campaign.total_recipients += len(rows)
+    return len(rows)
+
+
+async def add_recipients_from_query(db: AsyncSession, campaign: EmailCampaign, model, query) -> int:
+    """
+    Insert one recipient per row of a lead/customer query with INSERT ... SELECT,
+    so large audiences are never loaded into the API process.
+    """
+    name = func.trim(func.coalesce(model.first_name, "") + " " + func.coalesce(model.last_name, ""))
+    entity_column = "lead_id" if campaign.recipient_type == "lead" else "customer_id"
+    source = query.with_only_columns(
+        literal(campaign.id), model.email, name, model.id,
+        literal(EmailRecipientStatus.PENDING.value), literal(0),
+    ).where(model.email.isnot(None), model.email != "")
+    result = await db.execute(insert(EmailCampaignRecipient).from_select(
+        ["campaign_id", "email", "name", entity_column, "status", "attempts"], source
+    ))
+    campaign.total_recipients += result.rowcount
+    return result.rowcount
+
+
+def cancel_campaign(db: Session, campaign: EmailCampaign) -> None:
+    """Stop a campaign; messages already sent stay sent (caller commits)"""
+    campaign.status = EmailCampaignStatus.CANCELLED.value
+    campaign.finished_at = _utcnow()
+    db.execute(
+        update(EmailCampaignRecipient)
+        .where(
+            EmailCampaignRecipient.campaign_id == campaign.id,
+            EmailCampaignRecipient.status == EmailRecipientStatus.PENDING.value,
+        )
+        .values(status=EmailRecipientStatus.CANCELLED.value)
+    )
+
+
+# ================== WORKER ==================
+
+class SendOutcome(NamedTuple):
+    recipient: EmailCampaignRecipient
+    status: str  # sent, failed, retry, deferred
+    error: Optional[str] = None
+    delay_seconds: float = 0.0
+
+
+class EmailCampaignWorker:
+    """Background thread sending queued email campaigns"""
+
+    def __init__(self, batch_size: int, poll_seconds: float, lease_seconds: int,
+                 max_attempts: int, retry_delay_seconds: int, send_concurrency: int):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.send_concurrency = send_concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sender = None
+        self._limiter = DomainRateLimiter(
+            settings.EMAIL_DOMAIN_RATE_PER_MINUTE, settings.EMAIL_DOMAIN_RATE_LIMITS
+        )
+        self._counts = {"sent": 0, "failed": 0, "retried": 0, "deferred": 0, "batches": 0}
+        self._current_campaign: Optional[int] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._wake.set()  # resume leftover campaigns on startup
+        self._executor = ThreadPoolExecutor(max_workers=self.send_concurrency, thread_name_prefix="email-sender")
+        self._thread = threading.Thread(target=self._run, name="email-campaign-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Finish the batch in flight, release the campaign lease and stop"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._sender:
+            self._sender.close()
+            self._sender = None
+
+    def notify(self) -> None:
+        """Wake the worker after a campaign was queued"""
+        self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "current_campaign": self._current_campaign,
+            **self._counts,
+        }
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                worked = self.process_next()
+            except Exception:
+                logger.exception("Email campaign worker failed")
+                worked = False
+            if not worked:
+                self._wake.wait(timeout=self.poll_seconds)
+                self._wake.clear()
+
+    def process_next(self) -> bool:
+        """Claim one campaign and send it until done or parked; False when idle"""
+        db = SessionLocal()
+        try:
+            campaign_id = self._claim(db)
+            if campaign_id is None:
+                return False
+            self._current_campaign = campaign_id
+            try:
+                self._run_campaign(db, campaign_id)
+            except Exception as e:
+                logger.exception("Email campaign %s failed", campaign_id)
+                db.rollback()
+                self._finish(db, campaign_id, EmailCampaignStatus.FAILED, str(e))
+            return True
+        finally:
+            self._current_campaign = None
+            db.close()
+
+    def _claim(self, db: Session) -> Optional[int]:
+        now = _utcnow()
+        campaign = (
+            db.query(EmailCampaign)
+            .filter(
+                EmailCampaign.status.in_([EmailCampaignStatus.QUEUED.value, EmailCampaignStatus.RUNNING.value]),
+                or_(EmailCampaign.locked_until.is_(None), EmailCampaign.locked_until < now),
+            )
+            .order_by(EmailCampaign.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if campaign is None:
+            db.rollback()
+            return None
+        campaign.status = EmailCampaignStatus.RUNNING.value
+        campaign.locked_by = self.worker_id
+        campaign.locked_until = now + timedelta(seconds=self.lease_seconds)
+        if campaign.started_at is None:
+            campaign.started_at = now
+        db.commit()
+        return campaign.id
+
+    def _run_campaign(self, db: Session, campaign_id: int) -> None:
+        campaign = db.get(EmailCampaign, campaign_id)
+        if self._sender is None:
+            try:
+                self._sender = create_sender()
+            except ValueError as e:
+                self._finish(db, campaign_id, EmailCampaignStatus.FAILED, str(e))
+                return
+        attachments = load_attachments(campaign.attachments or [])
+        # Plain values: the ORM instance expires on every batch commit
+        subject, body = campaign.subject, campaign.body
+        cc, bcc, created_by = campaign.cc or [], campaign.bcc or [], campaign.created_by
+
+        while not self._stopping.is_set():
+            status = db.query(EmailCampaign.status).filter(EmailCampaign.id == campaign_id).scalar()
+            if status != EmailCampaignStatus.RUNNING.value:
+                return  # cancelled
+
+            now = _utcnow()
+            due = (
+                db.query(EmailCampaignRecipient)
+                .filter(
+                    EmailCampaignRecipient.campaign_id == campaign_id,
+                    EmailCampaignRecipient.status == EmailRecipientStatus.PENDING.value,
+                    or_(EmailCampaignRecipient.next_attempt_at.is_(None),
+                        EmailCampaignRecipient.next_attempt_at <= now),
+                )
+                .order_by(EmailCampaignRecipient.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not due:
+                self._park_or_finish(db, campaign_id)
+                return
+
+            outcomes = list(self._executor.map(
+                lambda recipient: self._send(recipient, subject, body, cc, bcc, attachments), due
+            ))
+            if not self._record_batch(db, campaign_id, subject, created_by, outcomes):
+                logger.warning("Lost the lease on email campaign %s", campaign_id)
+                return
+
+        self._release(db, campaign_id)
+
+    def _send(self, recipient: EmailCampaignRecipient, subject: str, body: str,
+              cc: List[str], bcc: List[str], attachments: List[Tuple[str, bytes]]) -> SendOutcome:
+        wait = self._limiter.try_acquire(recipient.email)
+        if 0 < wait <= MAX_RATE_LIMIT_WAIT_SECONDS:
+            time.sleep(wait)
+            wait = self._limiter.try_acquire(recipient.email)
+        if wait > 0:
+            return SendOutcome(recipient, "deferred", delay_seconds=wait)
+
+        message = build_message(
+            recipient.email, recipient.name, subject,
+            body.replace("{{contact_name}}", recipient.name or ""),
+            cc=cc, attachments=attachments,
+        )
+        result = self._sender.send(message, [recipient.email, *cc, *bcc])
+        if result.success:
+            return SendOutcome(recipient, "sent")
+        if result.retryable and recipient.attempts + 1 < self.max_attempts:
+            return SendOutcome(recipient, "retry", result.error,
+                               self.retry_delay_seconds * 2 ** recipient.attempts)
+        return SendOutcome(recipient, "failed", result.error)
+
+    def _record_batch(self, db: Session, campaign_id: int, subject: str,
+                      created_by: Optional[int], outcomes: List[SendOutcome]) -> bool:
+        now = _utcnow()
+        sent = failed = 0
+        activities = []
+        for outcome in outcomes:
+            recipient = outcome.recipient
+            if outcome.status == "deferred":
+                recipient.next_attempt_at = now + timedelta(seconds=outcome.delay_seconds)
+                self._counts["deferred"] += 1
+                continue
+
+            recipient.attempts += 1
+            recipient.last_error = outcome.error
+            if outcome.status == "sent":
+                sent += 1
+                recipient.status = EmailRecipientStatus.SENT.value
+                recipient.sent_at = now
+                activities.append(Activity(
+                    activity_type=ActivityType.EMAIL,
+                    subject=f"Bulk Email: {subject}"[:255],
+                    description=f"Sent bulk email to {recipient.email}",
+                    email_subject=subject[:255],
+                    lead_id=recipient.lead_id,
+                    customer_id=recipient.customer_id,
+                    performed_by=created_by,
+                ))
+            elif outcome.status == "retry":
+                recipient.next_attempt_at = now + timedelta(seconds=outcome.delay_seconds)
+                self._counts["retried"] += 1
+            else:
+                failed += 1
+                recipient.status = EmailRecipientStatus.FAILED.value
+
+        db.add_all(activities)
+        renewed = db.execute(
+            update(EmailCampaign)
+            .where(EmailCampaign.id == campaign_id, EmailCampaign.locked_by == self.worker_id)
+            .values(
+                sent_count=EmailCampaign.sent_count + sent,
+                failed_count=EmailCampaign.failed_count + failed,
+                locked_until=now + timedelta(seconds=self.lease_seconds),
+            )
+        ).rowcount
+        if not renewed:
+            db.rollback()  # another worker owns the campaign now; it re-sends this batch
+            return False
+        db.commit()
+        self._counts["sent"] += sent
+        self._counts["failed"] += failed
+        self._counts["batches"] += 1
+        return True
+
+    def _park_or_finish(self, db: Session, campaign_id: int) -> None:
+        """No recipient is due: finish, or release the lease until the next retry is due"""
+        next_due = db.execute(
+            select(func.min(EmailCampaignRecipient.next_attempt_at)).where(
+                EmailCampaignRecipient.campaign_id == campaign_id,
+                EmailCampaignRecipient.status == EmailRecipientStatus.PENDING.value,
+            )
+        ).scalar()
+        if next_due is None:
+            self._finish(db, campaign_id, EmailCampaignStatus.COMPLETED)
+            return
+        db.execute(
+            update(EmailCampaign)
+            .where(EmailCampaign.id == campaign_id, EmailCampaign.locked_by == self.worker_id)
+            .values(locked_by=None, locked_until=next_due)
+        )
+        db.commit()
+
+    def _release(self, db: Session, campaign_id: int) -> None:
+        """Give the campaign back (shutdown) so another worker resumes it at once"""
+        db.execute(
+            update(EmailCampaign)
+            .where(EmailCampaign.id == campaign_id, EmailCampaign.locked_by == self.worker_id)
+            .values(locked_by=None, locked_until=None)
+        )
+        db.commit()
+
+    def _finish(self, db: Session, campaign_id: int, status: EmailCampaignStatus,
+                error_message: Optional[str] = None) -> None:
+        db.execute(
+            update(EmailCampaign)
+            .where(
+                EmailCampaign.id == campaign_id,
+                EmailCampaign.status == EmailCampaignStatus.RUNNING.value,
+            )
+            .values(
+                status=status.value,
+                error_message=error_message,
+                finished_at=_utcnow(),
+                locked_by=None,
+                locked_until=None,
+            )
+        )
+        db.commit()
+
+
+def load_attachments(attachments: List[dict]) -> List[Tuple[str, bytes]]:
+    """Read a campaign's attachment files once (raises if one is missing)"""
+    storage = get_storage()
+    loaded = []
+    for attachment in attachments:
+        path = attachment["path"]
+        try:
+            with closing(storage.open(key_from_path(path))) as f:
+                content = f.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Attachment not found: {attachment.get('name') or path}")
+        loaded.append((attachment.get("name") or os.path.basename(path), content))
+    return loaded
+
+
+email_campaign_worker = EmailCampaignWorker(
+    batch_size=settings.EMAIL_CAMPAIGN_BATCH_SIZE,
+    poll_seconds=settings.EMAIL_CAMPAIGN_POLL_SECONDS,
+    lease_seconds=settings.EMAIL_CAMPAIGN_LEASE_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_delay_seconds=settings.EMAIL_RETRY_DELAY_SECONDS,
+    send_concurrency=settings.SMTP_POOL_SIZE,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_email_campaign_worker(session):
+    if session.info.pop(_QUEUED_FLAG, False):
+        email_campaign_worker.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_email_campaign_flag(session):
+    session.info.pop(_QUEUED_FLAG, None)
@@ -0,0 +1,205 @@
+"""
+Outgoing email delivery for campaigns.
+
+`SMTPSender` keeps a pool of up to SMTP_POOL_SIZE open SMTP connections
+(reused across messages, reconnected when the server drops them) and is
+safe to call from several threads. `ConsoleSender` (EMAIL_BACKEND=console)
+only logs messages, for development.
+
+`DomainRateLimiter` is a token bucket per recipient domain
+(EMAIL_DOMAIN_RATE_PER_MINUTE, overridden per domain by
+EMAIL_DOMAIN_RATE_LIMITS). Limits apply per worker process.
+
+Any SMTP server works for testing, e.g. a local stub:
+    python -m aiosmtpd -n -l localhost:1025
+with SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false.
+"""
+import logging
+import mimetypes
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SendResult(NamedTuple):
+    success: bool
+    retryable: bool = False
+    error: Optional[str] = None
+
+
+def build_message(to_email: str, to_name: Optional[str], subject: str, body: str,
+                  cc: Sequence[str] = (), attachments: Sequence[Tuple[str, bytes]] = ()) -> EmailMessage:
+    """MIME message; the body is sent as HTML when it contains markup"""
+    message = EmailMessage()
+    message["From"] = formataddr((settings.EMAIL_FROM_NAME or "", settings.EMAIL_FROM_ADDRESS))
+    message["To"] = formataddr((to_name or "", to_email))
+    if cc:
+        message["Cc"] = ", ".join(cc)
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid()
+
+    if "<" in body and ">" in body:
+        message.set_content(body, subtype="html")
+    else:
+        message.set_content(body)
+
+    for filename, content in attachments:
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        maintype, subtype = content_type.split("/", 1)
+        message.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
+    return message
+
+
+class SMTPSender:
+    """Thread-safe pool of SMTP connections"""
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+                 starttls: bool, use_ssl: bool, timeout: float, pool_size: int):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+        if self.username:
+            smtp.login(self.username, self.password or "")
+        return smtp
+
+    @contextmanager
+    def _connection(self):
+        with self._slots:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                smtp = self._connect()
+            try:
+                yield smtp
+            except smtplib.SMTPServerDisconnected:
+                _close(smtp)
+                raise
+            except smtplib.SMTPException:
+                # Before OSError (SMTPException subclasses it): smtplib resets
+                # the session after a refused message, the connection is fine
+                self._idle.put(smtp)
+                raise
+            except OSError:
+                _close(smtp)
+                raise
+            else:
+                self._idle.put(smtp)
+
+    def send(self, message: EmailMessage, recipients: List[str]) -> SendResult:
+        for attempt in range(2):
+            try:
+                with self._connection() as smtp:
+                    smtp.send_message(message, to_addrs=recipients)
+                return SendResult(success=True)
+            except smtplib.SMTPServerDisconnected:
+                if attempt == 0:
+                    continue  # pooled connection went stale; retry on a fresh one
+                return SendResult(success=False, retryable=True, error="SMTP server disconnected")
+            except smtplib.SMTPRecipientsRefused as e:
+                codes = [code for code, _ in e.recipients.values()]
+                return SendResult(success=False, retryable=all(400 <= code < 500 for code in codes),
+                                  error=f"Recipient refused: {e.recipients}")
+            except smtplib.SMTPResponseException as e:
+                return SendResult(success=False, retryable=400 <= e.smtp_code < 500,
+                                  error=f"SMTP {e.smtp_code}: {e.smtp_error!r}")
+            except (smtplib.SMTPException, OSError) as e:
+                return SendResult(success=False, retryable=True, error=f"SMTP error: {e}")
+        return SendResult(success=False, retryable=True, error="SMTP send failed")
+
+    def close(self) -> None:
+        while True:
+            try:
+                _close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class ConsoleSender:
+    """Logs messages instead of sending them (EMAIL_BACKEND=console)"""
+
+    def send(self, message: EmailMessage, recipients: List[str]) -> SendResult:
+        logger.info("Email to %s: %s", ", ".join(recipients), message["Subject"])
+        return SendResult(success=True)
+
+    def close(self) -> None:
+        pass
+
+
+def _close(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+
+
+def create_sender():
+    """Sender for the configured EMAIL_BACKEND; raises ValueError when unusable"""
+    if settings.EMAIL_BACKEND == "console":
+        return ConsoleSender()
+    if settings.EMAIL_BACKEND != "smtp":
+        raise ValueError(f"Unknown EMAIL_BACKEND '{settings.EMAIL_BACKEND}'")
+    if not settings.SMTP_HOST:
+        raise ValueError("SMTP_HOST is not configured")
+    return SMTPSender(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        username=settings.SMTP_USERNAME,
+        password=settings.SMTP_PASSWORD,
+        starttls=settings.SMTP_STARTTLS,
+        use_ssl=settings.SMTP_SSL,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+        pool_size=settings.SMTP_POOL_SIZE,
+    )
+
+
+class DomainRateLimiter:
+    """Token bucket per recipient domain (messages per minute)"""
+
+    def __init__(self, default_per_minute: int, overrides: Dict[str, int]):
+        self.default_per_minute = default_per_minute
+        self.overrides = {domain.lower(): rate for domain, rate in overrides.items()}
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # domain -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def try_acquire(self, email: str) -> float:
+        """Take a token for the address's domain; returns 0, or seconds until one is available"""
+        domain = email.rsplit("@", 1)[-1].lower()
+        rate = self.overrides.get(domain, self.default_per_minute)
+        if rate <= 0:
+            return 0.0
+        per_second = rate / 60.0
+        capacity = max(1.0, per_second)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(domain, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * per_second)
+            if tokens >= 1.0:
+                self._buckets[domain] = (tokens - 1.0, now)
+                return 0.0
+            self._buckets[domain] = (tokens, now)
+            return (1.0 - tokens) / per_second
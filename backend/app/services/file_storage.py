@@ -0,0 +1,359 @@
+"""
+Storage for uploaded documents.
+
+`store_upload()` copies an UploadFile to storage in UPLOAD_CHUNK_BYTES chunks
+(aiofiles, so neither the file nor the disk writes sit on the event loop),
+hashing it on the way and aborting with 413 once it exceeds the size limit.
+Blobs are content-addressed: the key is derived from the SHA-256
+(files/ab/<sha256>.pdf) and a stored_files row counts the documents using
+it, so identical uploads are stored once. `release_file()` drops a
+document's reference; after the commit, `collect_unreferenced_blob()`
+deletes the blob and its row if the count is still zero (an upload of the
+same content may have taken the reference back in between).
+
+Document rows store the path "uploads/<key>"; with the local backend that is
+also the URL served by the /uploads static mount. Backends (STORAGE_BACKEND):
+- "local": LocalStorage under STORAGE_LOCAL_ROOT.
+- "s3": S3Storage on an S3-compatible bucket (AWS, MinIO, ...) through
+  boto3. It only uses upload_file / get_object / head_object /
+  delete_object, so any client with that interface (e.g. a local stand-in)
+  can be passed in.
+
+Backend methods are blocking; async callers run them in the threadpool.
+Downloads go through app.services.document_download.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.stored_file import StoredFile
+
+try:
+    import boto3
+except ImportError:  # optional: only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+PATH_PREFIX = "uploads/"
+CONTENT_PREFIX = "files/"
+
+_PENDING_DELETES = "storage_pending_deletes"
+
+
+# ================== BACKENDS ==================
+
+class LocalStorage:
+    """Blobs in a local directory"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.temp_dir = os.path.join(self.root, ".tmp")  # same filesystem: save() is a rename
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key '{key}'")
+        return path
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def save(self, key: str, source_path: str) -> None:
+        """Move a finished temporary file into place"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def open(self, key: str, start: int = 0) -> BinaryIO:
+        """Binary stream positioned at byte `start`"""
+        f = open(self._path(key), "rb")
+        if start:
+            f.seek(start)
+        return f
+
+    def stat(self, key: str) -> Tuple[int, datetime]:
+        """(size, modification time); raises FileNotFoundError"""
+        result = os.stat(self._path(key))
+        return result.st_size, datetime.fromtimestamp(result.st_mtime, timezone.utc)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage:
+    """Blobs in an S3-compatible bucket"""
+
+    temp_dir = None
+
+    def __init__(self, client, bucket: str, prefix: str = ""):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def save(self, key: str, source_path: str) -> None:
+        """Upload a finished temporary file (multipart for large files) and remove it"""
+        self.client.upload_file(source_path, self.bucket, self.prefix + key)
+        os.remove(source_path)
+
+    def open(self, key: str, start: int = 0) -> BinaryIO:
+        """Binary stream from byte `start` (a ranged GET)"""
+        params = {"Bucket": self.bucket, "Key": self.prefix + key}
+        if start:
+            params["Range"] = f"bytes={start}-"
+        try:
+            return self.client.get_object(**params)["Body"]
+        except Exception as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def stat(self, key: str) -> Tuple[int, Optional[datetime]]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except Exception as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+        return head["ContentLength"], head.get("LastModified")
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+
+def _is_not_found(error: Exception) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+def create_storage():
+    """Backend for the configured STORAGE_BACKEND; raises ValueError when unusable"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_ROOT)
+    if settings.STORAGE_BACKEND != "s3":
+        raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}'")
+    if boto3 is None:
+        raise ValueError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+    if not settings.STORAGE_S3_BUCKET:
+        raise ValueError("STORAGE_S3_BUCKET is not configured")
+    client = boto3.client(
+        "s3",
+        endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+        region_name=settings.STORAGE_S3_REGION,
+        aws_access_key_id=settings.STORAGE_S3_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.STORAGE_S3_SECRET_ACCESS_KEY,
+    )
+    return S3Storage(client, settings.STORAGE_S3_BUCKET, settings.STORAGE_S3_PREFIX)
+
+
+_storage = None
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+
+# ================== UPLOADS ==================
+
+class StoredUpload(NamedTuple):
+    path: str  # uploads/files/ab/<sha256>.pdf, stored on the document row
+    size: int
+    sha256: str
+    content_type: Optional[str]
+
+
+def key_from_path(path: str) -> str:
+    """Storage key of a document path ("/uploads/x" and "uploads/x" -> "x")"""
+    path = path.lstrip("/")
+    return path[len(PATH_PREFIX):] if path.startswith(PATH_PREFIX) else path
+
+
+def sha256_from_key(key: str) -> Optional[str]:
+    """Content hash of a content-addressed key (None for older per-document files)"""
+    if not key.startswith(CONTENT_PREFIX):
+        return None
+    return os.path.splitext(os.path.basename(key))[0]
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the maximum upload size of {max_bytes // (1024 * 1024)} MB",
+    )
+
+
+async def _add_reference(db: AsyncSession, sha256: str) -> Optional[str]:
+    """Count one more document using the blob; its key, or None if not stored yet"""
+    result = await db.execute(
+        update(StoredFile)
+        .where(StoredFile.sha256 == sha256)
+        .values(ref_count=StoredFile.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        return None
+    return await db.scalar(select(StoredFile.storage_key).where(StoredFile.sha256 == sha256))
+
+
+async def store_upload(db: AsyncSession, file: UploadFile, max_bytes: Optional[int] = None) -> StoredUpload:
+    """
+    Stream an upload into storage and reference it (caller commits together
+    with the document row that stores `path`)
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    storage = get_storage()
+    if storage.temp_dir:
+        await aiofiles.os.makedirs(storage.temp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=storage.temp_dir, suffix=".upload")
+    os.close(fd)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            while chunk := await file.read(settings.UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                digest.update(chunk)
+                await out.write(chunk)
+        sha256 = digest.hexdigest()
+
+        key = await _add_reference(db, sha256)
+        if key is None:
+            ext = os.path.splitext(file.filename or "")[1].lower()[:16]
+            key = f"{CONTENT_PREFIX}{sha256[:2]}/{sha256}{ext}"
+            await run_in_threadpool(storage.save, key, temp_path)
+            try:
+                async with db.begin_nested():
+                    db.add(StoredFile(
+                        sha256=sha256,
+                        storage_key=key,
+                        size=size,
+                        content_type=file.content_type,
+                        ref_count=1,
+                    ))
+            except IntegrityError:
+                # Same content uploaded concurrently: share the other blob
+                own_key = key
+                key = await _add_reference(db, sha256)
+                if key != own_key:
+                    await run_in_threadpool(storage.delete, own_key)
+    finally:
+        if await aiofiles.os.path.exists(temp_path):
+            await aiofiles.os.remove(temp_path)
+
+    return StoredUpload(path=PATH_PREFIX + key, size=size, sha256=sha256, content_type=file.content_type)
+
+
+def release_file(db: Session, path: Optional[str]) -> None:
+    """
+    Drop a deleted document's reference to its file (caller commits); the
+    blob is deleted after the commit once no document uses it
+    """
+    if not path:
+        return
+    key = key_from_path(path)
+    sha256 = sha256_from_key(key)
+    if sha256 is None:
+        # Uploaded before content addressing: one file per document
+        db.info.setdefault(_PENDING_DELETES, []).append(("key", key))
+        return
+
+    db.execute(
+        update(StoredFile)
+        .where(StoredFile.sha256 == sha256)
+        .values(ref_count=StoredFile.ref_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    # The row stays (ref_count 0) until collect_unreferenced_blob() removes
+    # it, so an upload of the same content in the meantime reuses it
+    db.info.setdefault(_PENDING_DELETES, []).append(("sha256", sha256))
+
+
+def collect_unreferenced_blob(sha256: str) -> bool:
+    """
+    Delete a blob and its stored_files row if no document references it.
+
+    The row is locked and deleted before the blob and committed after it: a
+    concurrent upload of the same content either re-references the row
+    first (nothing is deleted) or waits for the commit and stores a fresh
+    blob. Returns whether the blob was deleted.
+    """
+    db = SessionLocal()
+    try:
+        stored = (
+            db.query(StoredFile)
+            .filter(StoredFile.sha256 == sha256, StoredFile.ref_count <= 0)
+            .with_for_update()
+            .first()
+        )
+        if stored is None:
+            db.rollback()
+            return False
+        db.delete(stored)
+        db.flush()
+        get_storage().delete(stored.storage_key)
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()  # keeps the unreferenced row; the next release retries
+        raise
+    finally:
+        db.close()
+
+
+@event.listens_for(Session, "after_commit")
+def _delete_released_blobs(session):
+    pending: List[Tuple[str, str]] = session.info.pop(_PENDING_DELETES, None) or []
+    for kind, value in pending:
+        try:
+            if kind == "sha256":
+                collect_unreferenced_blob(value)
+            else:
+                get_storage().delete(value)
+        except Exception:
+            logger.exception("Failed to delete stored file %s", value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_released_blobs(session):
+    session.info.pop(_PENDING_DELETES, None)
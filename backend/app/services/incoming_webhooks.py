@@ -0,0 +1,1134 @@
+"""
+Incoming webhook handlers.
+
+Every incoming event is an async handler registered with `@incoming_handler`.
+The per-entity routes in app/api/v1/endpoints/webhooks.py and the generic
+POST /webhooks/incoming both go through `dispatch_incoming_webhook()`, which
+owns the shared plumbing: WebhookLog creation, signature check, commit, and
+rollback + failure logging. Enum and mapping tables are built once at import.
+Log rows go through `webhook_log_writer`, which either adds them to the
+request's transaction or buffers them for batched inserts (WEBHOOK_LOG_MODE).
+
+A handler takes an IncomingWebhookContext and returns the response data dict;
+it can be called on its own (e.g. for benchmarking) with a session and payload.
+
+Deliveries carrying an idempotency key (Idempotency-Key header or the
+payload's idempotency_key) store their response in webhook_idempotency_keys
+in the same transaction. Repeats are answered from an in-process LRU/TTL
+cache, or from that table, without running the handler or writing anything.
+"""
+import hashlib
+import hmac
+import random
+import string
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.webhook import WebhookLog, WebhookDirection, WebhookEvent, WebhookIdempotencyKey
+from app.models.pre_lead import PreLead, PreLeadSource
+from app.models.pre_lead_contact import PreLeadContact
+from app.models.pre_lead_memo import PreLeadMemo
+from app.models.pre_lead_status_history import PreLeadStatusHistory
+from app.models.lead import Lead, LeadSource, LeadPriority
+from app.models.lead_contact import LeadContact
+from app.models.lead_activity import LeadActivity
+from app.models.lead_memo import LeadMemo
+from app.models.lead_document import LeadDocument
+from app.models.lead_status_history import LeadStatusHistory
+from app.models.lead_qualified_profile import LeadQualifiedProfile
+from app.models.customer import Customer, CustomerStatus
+from app.schemas.webhook import IncomingWebhookPayload
+from app.services.webhook_log_writer import webhook_log_writer
+
+# ================== LOOKUP TABLES ==================
+
+WEBHOOK_EVENTS_BY_VALUE: Dict[str, WebhookEvent] = {e.value: e for e in WebhookEvent}
+
+PRE_LEAD_SOURCES: Dict[str, PreLeadSource] = {
+    "website": PreLeadSource.WEBSITE,
+    "referral": PreLeadSource.REFERRAL,
+    "social_media": PreLeadSource.SOCIAL_MEDIA,
+    "cold_call": PreLeadSource.COLD_CALL,
+    "walk_in": PreLeadSource.WALK_IN,
+    "whatsapp": PreLeadSource.WHATSAPP,
+    "email": PreLeadSource.EMAIL,
+    "erp": PreLeadSource.ERP,
+    "other": PreLeadSource.OTHER,
+}
+
+LEAD_SOURCES: Dict[str, LeadSource] = {
+    "website": LeadSource.WEBSITE,
+    "referral": LeadSource.REFERRAL,
+    "social_media": LeadSource.SOCIAL_MEDIA,
+    "cold_call": LeadSource.COLD_CALL,
+    "walk_in": LeadSource.WALK_IN,
+    "whatsapp": LeadSource.WHATSAPP,
+    "email": LeadSource.EMAIL,
+    "erp": LeadSource.ERP,
+    "direct": LeadSource.DIRECT,
+    "other": LeadSource.OTHER,
+}
+
+LEAD_PRIORITIES: Dict[str, LeadPriority] = {
+    "low": LeadPriority.LOW,
+    "medium": LeadPriority.MEDIUM,
+    "high": LeadPriority.HIGH,
+    "critical": LeadPriority.CRITICAL,
+}
+
+PRE_LEAD_UPDATABLE_FIELDS = (
+    'first_name', 'last_name', 'email', 'phone', 'company_name',
+    'product_interest', 'requirements', 'city', 'state', 'country',
+    'address_line1', 'address_line2', 'zip_code', 'lead_status',
+    'industry_id', 'region_id', 'office_timings', 'timezone',
+    'notes', 'remarks', 'memo', 'fax', 'phone_no'
+)
+
+LEAD_UPDATABLE_FIELDS = (
+    'first_name', 'last_name', 'email', 'phone', 'alternate_phone',
+    'company_name', 'company_code', 'designation', 'company_size',
+    'industry', 'website', 'product_interest', 'requirements',
+    'expected_value', 'city', 'state', 'country',
+    'address_line1', 'address_line2', 'zip_code', 'pincode',
+    'lead_status', 'notes', 'remarks', 'memo',
+    'industry_id', 'region_id', 'office_timings', 'timezone',
+    'fax', 'phone_no', 'lead_score'
+)
+
+QUALIFIED_PROFILE_FIELDS = (
+    'profile_type', 'company_name', 'company_type', 'industry_id',
+    'annual_revenue', 'employee_count', 'decision_maker', 'decision_process',
+    'budget', 'timeline', 'competitors', 'current_solution',
+    'pain_points', 'requirements', 'notes'
+)
+
+DOCUMENT_UPDATABLE_FIELDS = (
+    'name', 'original_name', 'file_path', 'file_type',
+    'size', 'notes', 'uploaded_by', 'company_id', 'pre_lead_id'
+)
+
+DOCUMENT_REQUIRED_FIELDS = ("name", "original_name", "file_path")
+
+
+# ================== REGISTRY ==================
+
+class IncomingWebhookContext:
+    """Per-request state passed to a handler"""
+
+    def __init__(self, db: AsyncSession, payload: IncomingWebhookPayload, params: Dict[str, int],
+                 entity_type: Optional[str] = None, entity_id: Optional[int] = None):
+        self.db = db
+        self.payload = payload
+        self.data = payload.data
+        self.params = params
+        # Written to the WebhookLog; handlers that create the entity set the id
+        self.entity_type = entity_type
+        self.entity_id = entity_id
+
+
+HandlerFunc = Callable[[IncomingWebhookContext], Awaitable[Dict[str, Any]]]
+
+
+class IncomingHandler(NamedTuple):
+    event: str
+    func: HandlerFunc
+    message: str
+    entity_type: Optional[str]
+    params: Tuple[str, ...]
+
+
+INCOMING_HANDLERS: Dict[str, IncomingHandler] = {}
+
+
+def incoming_handler(event: str, message: str, entity_type: Optional[str] = None,
+                     params: Tuple[str, ...] = ()):
+    """
+    Register a handler for an incoming event.
+
+    `params` are the ids the handler needs (path parameters on the per-entity
+    routes, `data` fields on the generic route); the first one is logged as
+    the entity id.
+    """
+    def decorator(func: HandlerFunc) -> HandlerFunc:
+        if event in INCOMING_HANDLERS:
+            raise ValueError(f"Duplicate incoming webhook handler for {event}")
+        INCOMING_HANDLERS[event] = IncomingHandler(event, func, message, entity_type, params)
+        return func
+    return decorator
+
+
+# ================== IDEMPOTENCY ==================
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# idempotency key -> (event, response data) for completed deliveries
+idempotency_cache = TTLCache(
+    maxsize=settings.WEBHOOK_IDEMPOTENCY_CACHE_SIZE,
+    ttl_seconds=settings.WEBHOOK_IDEMPOTENCY_CACHE_TTL_SECONDS
+)
+
+
+def get_idempotency_key(request: Optional[Request], payload: IncomingWebhookPayload) -> Optional[str]:
+    """Idempotency key from the header, falling back to the payload field"""
+    key = request.headers.get(IDEMPOTENCY_HEADER) if request is not None else None
+    key = (key or payload.idempotency_key or "").strip()
+    if not key:
+        return None
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency key longer than {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+    return key
+
+
+def _replay(key: str, event: str, stored: Tuple[str, Any]) -> Dict[str, Any]:
+    stored_event, response = stored
+    if stored_event != event:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Idempotency key {key} was already used for event {stored_event}"
+        )
+    return response
+
+
+async def load_idempotent_responses(db: AsyncSession, keys) -> Dict[str, Tuple[str, Any]]:
+    """Stored (event, response) for the given keys: cache first, then one query for the rest"""
+    found = {}
+    missing = []
+    for key in keys:
+        stored = idempotency_cache.get(key)
+        if stored is not None:
+            found[key] = stored
+        else:
+            missing.append(key)
+
+    if missing:
+        rows = (await db.execute(
+            select(WebhookIdempotencyKey.idempotency_key, WebhookIdempotencyKey.event, WebhookIdempotencyKey.response)
+            .where(WebhookIdempotencyKey.idempotency_key.in_(missing))
+        )).all()
+        for row in rows:
+            found[row.idempotency_key] = (row.event, row.response)
+            idempotency_cache.set(row.idempotency_key, (row.event, row.response))
+    return found
+
+
+def record_idempotent_response(db: AsyncSession, key: str, event: str, response: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the key row to the current transaction; returns the JSON-safe response"""
+    response = jsonable_encoder(response)
+    db.add(WebhookIdempotencyKey(idempotency_key=key, event=event, response=response))
+    return response
+
+
+# ================== SHARED PLUMBING ==================
+
+def verify_webhook_signature(payload: bytes, signature: str, secret: str) -> bool:
+    """Verify HMAC signature of incoming webhook"""
+    expected = hmac.new(
+        secret.encode(),
+        payload,
+        hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def log_webhook(direction: WebhookDirection, event: str, payload: dict,
+                entity_type: str = None, entity_id: int = None) -> WebhookLog:
+    """Create a webhook log entry"""
+    return WebhookLog(
+        direction=direction,
+        event=WEBHOOK_EVENTS_BY_VALUE.get(event),
+        method="POST",
+        request_payload=payload,
+        entity_type=entity_type,
+        entity_id=entity_id
+    )
+
+
+def resolve_params(handler: IncomingHandler, params: Optional[Dict[str, Any]],
+                   data: Dict[str, Any]) -> Dict[str, int]:
+    """Take handler ids from the route path, falling back to the payload data"""
+    resolved = {}
+    for name in handler.params:
+        value = params.get(name) if params else None
+        if value is None:
+            value = data.get(name)
+        if value is None:
+            raise HTTPException(status_code=400, detail=f"{name} is required")
+        try:
+            resolved[name] = int(value)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"{name} must be an integer")
+    return resolved
+
+
+async def dispatch_incoming_webhook(
+    db: AsyncSession,
+    request: Request,
+    payload: IncomingWebhookPayload,
+    signature: Optional[str],
+    event: str,
+    params: Optional[Dict[str, Any]] = None
+) -> Tuple[IncomingHandler, Dict[str, Any]]:
+    """
+    Verify, run and log one incoming webhook.
+
+    The WebhookLog row is handed to webhook_log_writer with the handler's
+    changes and only recorded if they commit; on an unexpected error the
+    changes are rolled back and the failure is logged.
+    """
+    handler = INCOMING_HANDLERS.get(event)
+    log = log_webhook(WebhookDirection.INCOMING, event, payload.model_dump(mode="json"),
+                      handler.entity_type if handler else None)
+    key = None
+
+    try:
+        if signature and settings.WEBHOOK_SECRET:
+            body = await request.body()
+            if not verify_webhook_signature(body, signature, settings.WEBHOOK_SECRET):
+                log.is_successful = False
+                log.error_message = "Invalid webhook signature"
+                await webhook_log_writer.add(db, log)
+                await db.commit()
+                raise HTTPException(status_code=401, detail="Invalid signature")
+
+        if handler is None:
+            raise HTTPException(status_code=400, detail=f"Unknown event type: {event}")
+
+        key = get_idempotency_key(request, payload)
+        if key:
+            stored = (await load_idempotent_responses(db, [key])).get(key)
+            if stored is not None:
+                return handler, _replay(key, event, stored)
+
+        resolved = resolve_params(handler, params, payload.data)
+        log.entity_id = resolved[handler.params[0]] if handler.params else None
+        ctx = IncomingWebhookContext(db, payload, resolved, log.entity_type, log.entity_id)
+        result = await handler.func(ctx)
+        if key:
+            result = record_idempotent_response(db, key, event, result)
+
+        log.entity_type = ctx.entity_type
+        log.entity_id = ctx.entity_id
+        log.is_successful = True
+        log.response_status = 200
+        log.processed_at = datetime.utcnow()
+        await webhook_log_writer.add(db, log)
+        await db.commit()
+
+        if key:
+            idempotency_cache.set(key, (event, result))
+        return handler, result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        if key and isinstance(e, IntegrityError):
+            # A concurrent delivery with the same key committed first
+            stored = (await load_idempotent_responses(db, [key])).get(key)
+            if stored is not None:
+                return handler, _replay(key, event, stored)
+        log.is_successful = False
+        log.error_message = str(e)
+        await webhook_log_writer.add(db, log)
+        await db.commit()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ================== HELPERS ==================
+
+async def get_or_404(db: AsyncSession, model, entity_id: int, detail: str):
+    entity = await db.get(model, entity_id)
+    if not entity:
+        raise HTTPException(status_code=404, detail=detail)
+    return entity
+
+
+def parse_iso_date(value: Optional[str], default: Optional[date] = None) -> Optional[date]:
+    """Date part of an ISO timestamp ('Z' accepted), or the default if unparseable"""
+    if not value:
+        return default
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+    except (AttributeError, ValueError):
+        return default
+
+
+def update_fields(entity, data: Dict[str, Any], fields: Tuple[str, ...]) -> None:
+    """Copy the non-null fields present in data onto the entity"""
+    for field in fields:
+        if field in data and data[field] is not None:
+            setattr(entity, field, data[field])
+
+
+def require_fields(data: Dict[str, Any], fields: Tuple[str, ...]) -> None:
+    for field in fields:
+        if not data.get(field):
+            raise HTTPException(status_code=400, detail=f"{field} is required")
+
+
+def document_info(document: LeadDocument) -> Dict[str, Any]:
+    return {
+        "document_id": document.id,
+        "name": document.name,
+        "original_name": document.original_name,
+        "file_path": document.file_path,
+        "file_type": document.file_type,
+        "size": document.size
+    }
+
+
+async def get_lead_document(db: AsyncSession, lead_id: int, document_id: int) -> LeadDocument:
+    document = (await db.execute(
+        select(LeadDocument).where(
+            LeadDocument.id == document_id,
+            LeadDocument.lead_id == lead_id
+        )
+    )).scalars().first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+
+async def get_customer_by_code(db: AsyncSession, customer_code: Optional[str]) -> Optional[Customer]:
+    if not customer_code:
+        return None
+    return (await db.execute(
+        select(Customer).where(Customer.customer_code == customer_code)
+    )).scalars().first()
+
+
+# ================== PRE-LEAD HANDLERS ==================
+
+def build_pre_lead(payload: IncomingWebhookPayload) -> PreLead:
+    """PreLead for a new_inquiry payload (shared with the batch endpoint)"""
+    data = payload.data
+
+    source_value = data.get("lead_source") or data.get("source") or payload.source
+    source_enum = PRE_LEAD_SOURCES.get(source_value, PreLeadSource.WEBSITE)
+    if payload.source == "erp":
+        source_enum = PreLeadSource.ERP
+
+    office_timings = data.get("office_timings")
+    if not office_timings:
+        from_timings = data.get("from_timings")
+        to_timings = data.get("to_timings")
+        if from_timings and to_timings:
+            office_timings = f"{from_timings} - {to_timings}"
+
+    return PreLead(
+        first_name=data.get("first_name") or data.get("company_name") or "Unknown",
+        last_name=data.get("last_name"),
+        email=data.get("email"),
+        phone=data.get("phone"),
+        company_name=data.get("company_name"),
+        source=source_enum,
+        source_details=f"Webhook: {payload.source}",
+        product_interest=data.get("product_interest"),
+        requirements=data.get("requirements"),
+        city=data.get("city"),
+        state=data.get("state"),
+        country=data.get("country", "India"),
+        notes=data.get("notes"),
+        address_line1=data.get("address_line1") or data.get("address"),
+        address_line2=data.get("address_line2"),
+        zip_code=data.get("zip_code") or data.get("postal_code"),
+        lead_status=data.get("lead_status"),
+        industry_id=data.get("industry_id"),
+        region_id=data.get("region_id"),
+        office_timings=office_timings,
+        timezone=data.get("timezone"),
+        company_id=data.get("company_id") or 1,
+    )
+
+
+@incoming_handler("new_inquiry", "Pre-lead created successfully", entity_type="pre_lead")
+async def create_pre_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead = build_pre_lead(ctx.payload)
+    ctx.db.add(pre_lead)
+    await ctx.db.flush()
+
+    ctx.entity_id = pre_lead.id
+    return {"pre_lead_id": pre_lead.id}
+
+
+@incoming_handler("pre_lead_update", "Pre-lead updated successfully", "pre_lead", ("pre_lead_id",))
+async def update_pre_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead_id = ctx.params["pre_lead_id"]
+    pre_lead = await get_or_404(ctx.db, PreLead, pre_lead_id, "Pre-lead not found")
+
+    update_fields(pre_lead, ctx.data, PRE_LEAD_UPDATABLE_FIELDS)
+    pre_lead.updated_at = datetime.utcnow()
+
+    return {"pre_lead_id": pre_lead_id}
+
+
+@incoming_handler("pre_lead_discard", "Pre-lead discarded successfully", "pre_lead", ("pre_lead_id",))
+async def discard_pre_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead_id = ctx.params["pre_lead_id"]
+    pre_lead = await get_or_404(ctx.db, PreLead, pre_lead_id, "Pre-lead not found")
+
+    pre_lead.status = 1  # 1 = discarded
+    if ctx.data.get("reason"):
+        pre_lead.remarks = ctx.data.get("reason")
+    pre_lead.updated_at = datetime.utcnow()
+
+    return {"pre_lead_id": pre_lead_id}
+
+
+@incoming_handler("pre_lead_contact_add", "Contact added successfully", "pre_lead", ("pre_lead_id",))
+async def add_pre_lead_contact(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead_id = ctx.params["pre_lead_id"]
+    await get_or_404(ctx.db, PreLead, pre_lead_id, "Pre-lead not found")
+    data = ctx.data
+
+    contact = PreLeadContact(
+        pre_lead_id=pre_lead_id,
+        first_name=data.get("first_name", "Unknown"),
+        last_name=data.get("last_name"),
+        email=data.get("email"),
+        phone=data.get("phone"),
+        designation=data.get("designation"),
+        department=data.get("department"),
+        is_primary=data.get("is_primary", False),
+        contact_type=data.get("contact_type", "primary")
+    )
+    ctx.db.add(contact)
+    await ctx.db.flush()
+
+    return {"contact_id": contact.id, "pre_lead_id": pre_lead_id}
+
+
+@incoming_handler("pre_lead_memo_add", "Memo added successfully", "pre_lead", ("pre_lead_id",))
+async def add_pre_lead_memo(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead_id = ctx.params["pre_lead_id"]
+    await get_or_404(ctx.db, PreLead, pre_lead_id, "Pre-lead not found")
+    data = ctx.data
+
+    memo = PreLeadMemo(
+        pre_lead_id=pre_lead_id,
+        title=data.get("title", "Memo"),
+        content=data.get("content", ""),
+        memo_type=data.get("memo_type", "general")
+    )
+    ctx.db.add(memo)
+    await ctx.db.flush()
+
+    return {"memo_id": memo.id, "pre_lead_id": pre_lead_id}
+
+
+@incoming_handler("pre_lead_status_update", "Pre-lead status updated successfully", "pre_lead", ("pre_lead_id",))
+async def update_pre_lead_status(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead_id = ctx.params["pre_lead_id"]
+    pre_lead = await get_or_404(ctx.db, PreLead, pre_lead_id, "Pre-lead not found")
+    data = ctx.data
+
+    old_status = pre_lead.lead_status
+    new_status = data.get("lead_status")
+    if not new_status:
+        raise HTTPException(status_code=400, detail="lead_status is required")
+
+    pre_lead.lead_status = new_status
+    pre_lead.updated_at = datetime.utcnow()
+
+    ctx.db.add(PreLeadStatusHistory(
+        pre_lead_id=pre_lead_id,
+        status=new_status,
+        status_date=parse_iso_date(data.get("status_date"), date.today()),
+        remarks=data.get("remarks")
+    ))
+
+    return {"pre_lead_id": pre_lead_id, "old_status": old_status, "new_status": new_status}
+
+
+@incoming_handler("pre_lead_document_add", "Document added to pre-lead successfully", "pre_lead", ("pre_lead_id",))
+async def add_pre_lead_document(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead_id = ctx.params["pre_lead_id"]
+    pre_lead = await get_or_404(ctx.db, PreLead, pre_lead_id, "Pre-lead not found")
+    data = ctx.data
+    require_fields(data, DOCUMENT_REQUIRED_FIELDS)
+
+    # Documents are tracked against the pre-lead (and its lead once converted)
+    document = LeadDocument(
+        lead_id=pre_lead.converted_lead_id if pre_lead.is_converted else None,
+        name=data.get("name"),
+        original_name=data.get("original_name"),
+        file_path=data.get("file_path"),
+        file_type=data.get("file_type"),
+        size=data.get("size"),
+        notes=data.get("notes"),
+        uploaded_by=data.get("uploaded_by"),
+        company_id=data.get("company_id") or pre_lead.company_id,
+        pre_lead_id=pre_lead_id
+    )
+    ctx.db.add(document)
+    await ctx.db.flush()
+
+    return {**document_info(document), "pre_lead_id": pre_lead_id}
+
+
+@incoming_handler("pre_lead_convert", "Pre-lead converted to lead successfully", "pre_lead", ("pre_lead_id",))
+async def convert_pre_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    pre_lead_id = ctx.params["pre_lead_id"]
+    pre_lead = await get_or_404(ctx.db, PreLead, pre_lead_id, "Pre-lead not found")
+    if pre_lead.is_converted:
+        raise HTTPException(status_code=400, detail="Pre-lead already converted")
+    data = ctx.data
+
+    lead = Lead(
+        first_name=pre_lead.first_name,
+        last_name=pre_lead.last_name,
+        email=pre_lead.email,
+        phone=pre_lead.phone,
+        company_name=pre_lead.company_name,
+        source=LeadSource.PRE_LEAD,
+        source_details=f"Converted from Pre-Lead #{pre_lead_id}",
+        priority=LEAD_PRIORITIES.get(data.get("priority", "medium"), LeadPriority.MEDIUM),
+        product_interest=pre_lead.product_interest,
+        requirements=pre_lead.requirements,
+        city=pre_lead.city,
+        state=pre_lead.state,
+        country=pre_lead.country,
+        address_line1=pre_lead.address_line1,
+        address_line2=pre_lead.address_line2,
+        zip_code=pre_lead.zip_code,
+        notes=data.get("notes") or pre_lead.notes,
+        pre_lead_id=pre_lead_id,
+        assigned_to=data.get("assigned_to"),
+        expected_value=data.get("expected_value"),
+        company_id=pre_lead.company_id,
+        industry_id=pre_lead.industry_id,
+        region_id=pre_lead.region_id,
+        office_timings=pre_lead.office_timings,
+        timezone=pre_lead.timezone,
+    )
+    ctx.db.add(lead)
+    await ctx.db.flush()
+
+    pre_lead.is_converted = True
+    pre_lead.converted_lead_id = lead.id
+    pre_lead.converted_at = datetime.utcnow()
+
+    return {"pre_lead_id": pre_lead_id, "lead_id": lead.id}
+
+
+# ================== LEAD HANDLERS ==================
+
+def build_lead(payload: IncomingWebhookPayload) -> Lead:
+    """Lead for a new_lead payload (shared with the batch endpoint)"""
+    data = payload.data
+
+    source_value = data.get("lead_source") or data.get("source") or payload.source
+    priority_value = (data.get("priority") or "medium").lower()
+
+    return Lead(
+        first_name=data.get("first_name") or data.get("company_name") or "Unknown",
+        last_name=data.get("last_name"),
+        email=data.get("email") or data.get("customer_email"),
+        phone=data.get("phone") or data.get("contact_phone"),
+        company_name=data.get("company_name") or data.get("customer_name"),
+        source=LEAD_SOURCES.get(source_value, LeadSource.WEBSITE),
+        source_details=f"Webhook: {payload.source}",
+        priority=LEAD_PRIORITIES.get(priority_value, LeadPriority.MEDIUM),
+        product_interest=data.get("product_interest"),
+        requirements=data.get("requirements"),
+        expected_value=data.get("expected_value"),
+        city=data.get("city"),
+        state=data.get("state"),
+        country=data.get("country", "India"),
+        address_line1=data.get("address_line1"),
+        address_line2=data.get("address_line2"),
+        zip_code=data.get("zip_code"),
+        assigned_to=data.get("assigned_to"),
+        notes=data.get("notes"),
+        company_id=data.get("company_id") or 1,
+    )
+
+
+@incoming_handler("new_lead", "Lead created successfully", entity_type="lead")
+async def create_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead = build_lead(ctx.payload)
+    ctx.db.add(lead)
+    await ctx.db.flush()
+
+    ctx.entity_id = lead.id
+    return {"lead_id": lead.id}
+
+
+@incoming_handler("lead_update", "Lead updated successfully", "lead", ("lead_id",))
+async def update_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    lead = await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    data = ctx.data
+
+    update_fields(lead, data, LEAD_UPDATABLE_FIELDS)
+    if "priority" in data:
+        lead.priority = LEAD_PRIORITIES.get(data["priority"], lead.priority)
+    lead.updated_at = datetime.utcnow()
+
+    return {"lead_id": lead_id}
+
+
+@incoming_handler("lead_discard", "Lead discarded successfully", "lead", ("lead_id",))
+async def discard_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    lead = await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    data = ctx.data
+
+    lead.status = 1  # 1 = discarded
+    if data.get("reason"):
+        lead.remarks = data.get("reason")
+    if data.get("loss_reason"):
+        lead.loss_reason = data.get("loss_reason")
+    lead.updated_at = datetime.utcnow()
+
+    return {"lead_id": lead_id}
+
+
+@incoming_handler("lead_contact_add", "Contact added successfully", "lead", ("lead_id",))
+async def add_lead_contact(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    data = ctx.data
+
+    contact = LeadContact(
+        lead_id=lead_id,
+        first_name=data.get("first_name", "Unknown"),
+        last_name=data.get("last_name"),
+        email=data.get("email"),
+        phone=data.get("phone"),
+        designation=data.get("designation"),
+        department=data.get("department"),
+        is_primary=data.get("is_primary", False),
+        contact_type=data.get("contact_type", "primary")
+    )
+    ctx.db.add(contact)
+    await ctx.db.flush()
+
+    return {"contact_id": contact.id, "lead_id": lead_id}
+
+
+@incoming_handler("lead_activity_add", "Activity added successfully", "lead", ("lead_id",))
+async def add_lead_activity(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    data = ctx.data
+
+    is_completed = data.get("is_completed", False)
+    activity = LeadActivity(
+        lead_id=lead_id,
+        activity_type=data.get("activity_type", "note"),
+        subject=data.get("subject") or data.get("title", "Activity"),
+        description=data.get("description"),
+        activity_date=parse_iso_date(data.get("activity_date"), date.today()),
+        due_date=parse_iso_date(data.get("due_date")),
+        outcome=data.get("outcome"),
+        is_completed=is_completed,
+        completed_at=datetime.utcnow() if is_completed else None
+    )
+    ctx.db.add(activity)
+    await ctx.db.flush()
+
+    return {"activity_id": activity.id, "lead_id": lead_id}
+
+
+@incoming_handler("lead_qualified_profile_update", "Qualified profile updated successfully", "lead", ("lead_id",))
+async def update_lead_qualified_profile(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+
+    profile = (await ctx.db.execute(
+        select(LeadQualifiedProfile).where(LeadQualifiedProfile.lead_id == lead_id)
+    )).scalars().first()
+    if not profile:
+        profile = LeadQualifiedProfile(lead_id=lead_id)
+        ctx.db.add(profile)
+
+    update_fields(profile, ctx.data, QUALIFIED_PROFILE_FIELDS)
+    await ctx.db.flush()
+
+    return {"lead_id": lead_id, "profile_id": profile.id}
+
+
+@incoming_handler("lead_memo_add", "Memo added successfully", "lead", ("lead_id",))
+async def add_lead_memo(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    data = ctx.data
+
+    memo = LeadMemo(
+        lead_id=lead_id,
+        title=data.get("title", "Memo"),
+        content=data.get("content", ""),
+        memo_type=data.get("memo_type", "general")
+    )
+    ctx.db.add(memo)
+    await ctx.db.flush()
+
+    return {"memo_id": memo.id, "lead_id": lead_id}
+
+
+@incoming_handler("lead_document_add", "Document added successfully", "lead", ("lead_id",))
+async def add_lead_document(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    lead = await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    data = ctx.data
+    require_fields(data, DOCUMENT_REQUIRED_FIELDS)
+
+    document = LeadDocument(
+        lead_id=lead_id,
+        name=data.get("name"),
+        original_name=data.get("original_name"),
+        file_path=data.get("file_path"),
+        file_type=data.get("file_type"),
+        size=data.get("size"),
+        notes=data.get("notes"),
+        uploaded_by=data.get("uploaded_by"),
+        company_id=data.get("company_id") or lead.company_id,
+        pre_lead_id=data.get("pre_lead_id") or lead.pre_lead_id
+    )
+    ctx.db.add(document)
+    await ctx.db.flush()
+
+    return {**document_info(document), "lead_id": lead_id}
+
+
+@incoming_handler("lead_document_update", "Document updated successfully", "lead", ("lead_id", "document_id"))
+async def update_lead_document(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    document = await get_lead_document(ctx.db, lead_id, ctx.params["document_id"])
+
+    update_fields(document, ctx.data, DOCUMENT_UPDATABLE_FIELDS)
+
+    return {**document_info(document), "lead_id": lead_id, "notes": document.notes}
+
+
+@incoming_handler("lead_document_delete", "Document deleted successfully", "lead", ("lead_id", "document_id"))
+async def delete_lead_document(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    document = await get_lead_document(ctx.db, lead_id, ctx.params["document_id"])
+
+    deleted = {
+        "document_id": document.id,
+        "name": document.name,
+        "original_name": document.original_name
+    }
+    await ctx.db.delete(document)
+
+    return deleted
+
+
+@incoming_handler("lead_status_update", "Lead status updated successfully", "lead", ("lead_id",))
+async def update_lead_status(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    lead = await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    data = ctx.data
+
+    old_status = lead.lead_status
+    new_status = data.get("lead_status")
+    if not new_status:
+        raise HTTPException(status_code=400, detail="lead_status is required")
+
+    lead.lead_status = new_status
+    lead.updated_at = datetime.utcnow()
+
+    ctx.db.add(LeadStatusHistory(
+        lead_id=lead_id,
+        status=new_status,
+        status_date=parse_iso_date(data.get("status_date"), date.today()),
+        remarks=data.get("remarks")
+    ))
+
+    return {"lead_id": lead_id, "old_status": old_status, "new_status": new_status}
+
+
+@incoming_handler("lead_convert", "Lead converted to customer successfully", "lead", ("lead_id",))
+async def convert_lead(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    lead_id = ctx.params["lead_id"]
+    lead = await get_or_404(ctx.db, Lead, lead_id, "Lead not found")
+    if lead.is_converted:
+        raise HTTPException(status_code=400, detail="Lead already converted")
+    data = ctx.data
+
+    customer_code = data.get("customer_code")
+    if not customer_code:
+        customer_code = f"CUST-{''.join(random.choices(string.ascii_uppercase + string.digits, k=8))}"
+
+    customer = Customer(
+        customer_code=customer_code,
+        first_name=lead.first_name,
+        last_name=lead.last_name,
+        email=lead.email,
+        phone=lead.phone,
+        company_name=lead.company_name,
+        industry=lead.industry,
+        website=lead.website,
+        address=lead.address,
+        city=lead.city,
+        state=lead.state,
+        country=lead.country,
+        pincode=lead.pincode,
+        status=CustomerStatus.ACTIVE,
+        credit_limit=data.get("credit_limit", 0),
+        payment_terms=data.get("payment_terms"),
+        notes=data.get("notes") or lead.notes,
+        lead_id=lead_id,
+    )
+    ctx.db.add(customer)
+    await ctx.db.flush()
+
+    lead.is_converted = True
+    lead.converted_customer_id = customer.id
+    lead.converted_at = datetime.utcnow()
+    lead.lead_status = "won"
+
+    return {"lead_id": lead_id, "customer_id": customer.id, "customer_code": customer_code}
+
+
+# ================== CUSTOMER HANDLERS ==================
+
+@incoming_handler("order_created", "Order recorded successfully")
+async def record_order(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    customer = await get_customer_by_code(ctx.db, ctx.data.get("customer_code"))
+    if not customer:
+        return {}
+
+    customer.total_orders = (customer.total_orders or 0) + 1
+    customer.last_order_date = datetime.utcnow()
+    order_value = ctx.data.get("order_value", 0)
+    customer.total_revenue = float(customer.total_revenue or 0) + float(order_value)
+
+    ctx.entity_type, ctx.entity_id = "customer", customer.id
+    return {"customer_id": customer.id}
+
+
+@incoming_handler("payment_received", "Payment recorded successfully")
+async def record_payment(ctx: IncomingWebhookContext) -> Dict[str, Any]:
+    customer = await get_customer_by_code(ctx.db, ctx.data.get("customer_code"))
+    if not customer:
+        return {}
+
+    payment_amount = ctx.data.get("amount", 0)
+    customer.outstanding_amount = max(0, float(customer.outstanding_amount or 0) - float(payment_amount))
+
+    ctx.entity_type, ctx.entity_id = "customer", customer.id
+    return {"customer_id": customer.id}
+
+
+# ================== BATCH ==================
+
+# Create events that the batch endpoint inserts in bulk: builder, result key
+BULK_CREATE_EVENTS: Dict[str, Tuple[Callable[[IncomingWebhookPayload], Any], str]] = {
+    "new_inquiry": (build_pre_lead, "pre_lead_id"),
+    "new_lead": (build_lead, "lead_id"),
+}
+
+
+def batch_item_error(index: int, event: str, status_code: int, detail: str) -> Dict[str, Any]:
+    return {"index": index, "event": event, "status": "error", "status_code": status_code, "detail": detail}
+
+
+async def _run_batch_item(db: AsyncSession, index: int, item: IncomingWebhookPayload,
+                          log: WebhookLog) -> Dict[str, Any]:
+    """Run one non-bulk item through its handler inside a savepoint"""
+    handler = INCOMING_HANDLERS[item.event]
+    try:
+        async with db.begin_nested():
+            resolved = resolve_params(handler, None, item.data)
+            log.entity_id = resolved[handler.params[0]] if handler.params else None
+            ctx = IncomingWebhookContext(db, item, resolved, log.entity_type, log.entity_id)
+            data = await handler.func(ctx)
+            await db.flush()
+    except HTTPException as e:
+        log.error_message = str(e.detail)
+        return batch_item_error(index, item.event, e.status_code, str(e.detail))
+    except Exception as e:
+        log.error_message = str(e)
+        return batch_item_error(index, item.event, 500, str(e))
+
+    log.entity_type, log.entity_id = ctx.entity_type, ctx.entity_id
+    log.is_successful = True
+    log.response_status = 200
+    return {"index": index, "event": item.event, "status": "success", "data": data}
+
+
+async def _insert_bulk_items(db: AsyncSession, bulk: list, logs: Dict[int, WebhookLog],
+                             results: Dict[int, Dict[str, Any]]) -> None:
+    """
+    Insert the create events of a chunk with one multi-row INSERT per table.
+
+    If the combined insert fails, each row is retried in its own savepoint so
+    one bad item only fails itself.
+    """
+    try:
+        async with db.begin_nested():
+            db.add_all([entity for _, _, entity, _ in bulk])
+            await db.flush()
+        failed = []
+    except Exception:
+        failed = bulk
+        bulk = []
+
+    for index, item, entity, key in failed:
+        try:
+            async with db.begin_nested():
+                entity = BULK_CREATE_EVENTS[item.event][0](item)
+                db.add(entity)
+                await db.flush()
+            bulk.append((index, item, entity, key))
+        except Exception as e:
+            logs[index].error_message = str(e)
+            results[index] = batch_item_error(index, item.event, 500, str(e))
+
+    for index, item, entity, key in bulk:
+        log = logs[index]
+        log.entity_id = entity.id
+        log.is_successful = True
+        log.response_status = 200
+        results[index] = {"index": index, "event": item.event, "status": "success", "data": {key: entity.id}}
+
+
+async def process_batch_chunk(db: AsyncSession, chunk: List[Tuple[int, IncomingWebhookPayload]]) -> List[Dict[str, Any]]:
+    """Process and commit one chunk of batch items (one transaction); results in item order"""
+    results: Dict[int, Dict[str, Any]] = {}
+    logs: Dict[int, WebhookLog] = {}
+    bulk = []
+    individual = []
+
+    # Idempotency: replay stored responses, and let repeats of a key inside
+    # the chunk share the result of its first occurrence
+    item_keys: Dict[int, str] = {}
+    chunk_events = {index: item.event for index, item in chunk}
+    for index, item in chunk:
+        try:
+            key = get_idempotency_key(None, item)
+        except HTTPException as e:
+            results[index] = batch_item_error(index, item.event, e.status_code, str(e.detail))
+            continue
+        if key:
+            item_keys[index] = key
+    stored = await load_idempotent_responses(db, set(item_keys.values()))
+    first_index: Dict[str, int] = {}
+    repeats: List[Tuple[int, str]] = []
+
+    for index, item in chunk:
+        if index in results:
+            continue
+        key = item_keys.get(index)
+        if key in stored:
+            try:
+                data = _replay(key, item.event, stored[key])
+                results[index] = {"index": index, "event": item.event, "status": "success", "data": data}
+            except HTTPException as e:
+                results[index] = batch_item_error(index, item.event, e.status_code, str(e.detail))
+            continue
+        if key in first_index:
+            repeats.append((index, key))
+            continue
+        if key:
+            first_index[key] = index
+
+        handler = INCOMING_HANDLERS.get(item.event)
+        logs[index] = log = log_webhook(WebhookDirection.INCOMING, item.event, item.model_dump(mode="json"),
+                                        handler.entity_type if handler else None)
+        if handler is None:
+            log.error_message = f"Unknown event type: {item.event}"
+            results[index] = batch_item_error(index, item.event, 400, log.error_message)
+        elif item.event in BULK_CREATE_EVENTS:
+            builder, result_key = BULK_CREATE_EVENTS[item.event]
+            bulk.append((index, item, builder(item), result_key))
+        else:
+            individual.append((index, item))
+
+    try:
+        if bulk:
+            await _insert_bulk_items(db, bulk, logs, results)
+        for index, item in individual:
+            results[index] = await _run_batch_item(db, index, item, logs[index])
+
+        new_keys = {}
+        for key, index in first_index.items():
+            result = results[index]
+            if result["status"] == "success":
+                result["data"] = record_idempotent_response(db, key, result["event"], result["data"])
+                new_keys[key] = (result["event"], result["data"])
+
+        processed_at = datetime.utcnow()
+        for log in logs.values():
+            log.processed_at = processed_at
+        await webhook_log_writer.add_all(db, logs.values())
+        await db.commit()
+
+        for key, value in new_keys.items():
+            idempotency_cache.set(key, value)
+    except Exception as e:
+        # The chunk's transaction is lost: report every processed item as failed
+        await db.rollback()
+        failed_logs = []
+        for index, item in chunk:
+            if index not in logs:
+                continue
+            results[index] = batch_item_error(index, item.event, 500, str(e))
+            log = log_webhook(WebhookDirection.INCOMING, item.event, item.model_dump(mode="json"))
+            log.error_message = str(e)
+            failed_logs.append(log)
+        await webhook_log_writer.add_all(db, failed_logs)
+        await db.commit()
+
+    for index, key in repeats:
+        event = chunk_events[index]
+        first = results[first_index[key]]
+        if first["event"] != event:
+            results[index] = batch_item_error(
+                index, event, 409, f"Idempotency key {key} was already used for event {first['event']}"
+            )
+        else:
+            results[index] = {**first, "index": index}
+
+    return [results[index] for index, _ in chunk]
+
+
+async def process_incoming_batch(db: AsyncSession, request: Request, items: List[IncomingWebhookPayload],
+                                 signature: Optional[str], chunk_size: int) -> Dict[str, Any]:
+    """
+    Verify one signature over the whole body, then process the items in
+    chunked transactions. new_inquiry/new_lead items are bulk-inserted; other
+    events run through their registered handler in a per-item savepoint.
+    Idempotency keys are taken per item from the payload field.
+    """
+    if signature and settings.WEBHOOK_SECRET:
+        body = await request.body()
+        if not verify_webhook_signature(body, signature, settings.WEBHOOK_SECRET):
+            log = log_webhook(WebhookDirection.INCOMING, "batch", {"item_count": len(items)})
+            log.is_successful = False
+            log.error_message = "Invalid webhook signature"
+            await webhook_log_writer.add(db, log)
+            await db.commit()
+            raise HTTPException(status_code=401, detail="Invalid signature")
+
+    indexed = list(enumerate(items))
+    results = []
+    for start in range(0, len(indexed), chunk_size):
+        results.extend(await process_batch_chunk(db, indexed[start:start + chunk_size]))
+
+    failed = sum(1 for r in results if r["status"] != "success")
+    return {
+        "status": "success" if not failed else ("partial" if failed < len(results) else "failed"),
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }
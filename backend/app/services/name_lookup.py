@@ -0,0 +1,41 @@
+"""
+Bulk display-name resolution for list and feed endpoints.
+
+Collect the foreign keys from a page of rows, then resolve each entity type
+with a single `IN (...)` query instead of one lookup per row.
+"""
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional
+
+from app.models.user import User
+
+
+def _unique_ids(ids: Iterable[Optional[int]]) -> set:
+    return {i for i in ids if i is not None}
+
+
+def format_person_name(first_name: Optional[str], last_name: Optional[str]) -> str:
+    """'First Last' with missing parts dropped"""
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+def fetch_rows_by_id(db: Session, model, ids: Iterable[Optional[int]], *columns) -> Dict[int, tuple]:
+    """Map id -> (id, *columns) for the given ids in one query"""
+    id_set = _unique_ids(ids)
+    if not id_set:
+        return {}
+
+    rows = db.query(model.id, *columns).filter(model.id.in_(id_set)).all()
+    return {row[0]: row for row in rows}
+
+
+def get_person_names(db: Session, model, ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """Resolve ids of any model with first_name/last_name (Lead, Customer, contacts)"""
+    rows = fetch_rows_by_id(db, model, ids, model.first_name, model.last_name)
+    return {id_: format_person_name(row[1], row[2]) for id_, row in rows.items()}
+
+
+def get_user_names(db: Session, ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """Resolve user ids to full name (falling back to email)"""
+    rows = fetch_rows_by_id(db, User, ids, User.full_name, User.email)
+    return {id_: row[1] or row[2] for id_, row in rows.items()}
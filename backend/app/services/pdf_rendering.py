@@ -0,0 +1,201 @@
+"""
+PDF rendering with ReportLab.
+
+Documents are described as plain data (`PdfSection`: title, header lines
+and content blocks) and rendered in memory by `render_document()`, so no
+temporary files are involved and the work can move to another process.
+
+`pdf_renderer` adds two things on top:
+- A per-worker cache keyed by the caller (e.g. CR id and tab) and validated
+  by the SHA-256 of the sections, so an unchanged document is rendered once
+  and its hash doubles as the response ETag. `invalidate()` drops entries
+  early when their source changes.
+- Documents with at least PDF_RENDER_PROCESS_THRESHOLD characters of text
+  are rendered on a pool of PDF_RENDER_WORKERS processes instead of the
+  request thread (ReportLab is pure Python and holds the GIL), and so are
+  the changed documents of a `get_many()` batch, side by side. Workers are
+  started from a fork server (not forked from the threaded API process)
+  and warmed up at startup by `warm_up()`.
+
+Styles are built once per process at import.
+"""
+import hashlib
+import html
+import json
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Hashable, List, NamedTuple, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+_SAMPLE_STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle('CustomTitle', parent=_SAMPLE_STYLES['Heading1'], fontSize=18, spaceAfter=30, alignment=1)
+HEADING_STYLE = ParagraphStyle('CustomHeading', parent=_SAMPLE_STYLES['Heading2'], fontSize=14, spaceAfter=12)
+NORMAL_STYLE = _SAMPLE_STYLES['Normal']
+
+_TAG_RE = re.compile(r"<[^<]+?>")
+_BLOCK_END_RE = re.compile(r"<\s*(?:br|/p|/div|/li|/h[1-6]|/tr)\s*/?>", re.IGNORECASE)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+# Block kinds: ("heading", text), ("text", text), ("spacer", height)
+Block = Tuple[str, object]
+
+
+class PdfSection(NamedTuple):
+    title: str
+    header_lines: Tuple[str, ...]
+    blocks: Tuple[Block, ...]
+
+
+def html_to_text(value: Optional[str]) -> str:
+    """Plain text of rich-text HTML, keeping paragraph breaks"""
+    if not value:
+        return ""
+    text = _BLOCK_END_RE.sub("\n", value)
+    text = html.unescape(_TAG_RE.sub("", text))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def text_blocks(text: str) -> List[Block]:
+    """One text block per paragraph (one huge Paragraph is slow to lay out)"""
+    return [("text", paragraph.strip()) for paragraph in text.split("\n\n") if paragraph.strip()]
+
+
+def content_hash(sections: Sequence[PdfSection]) -> str:
+    payload = json.dumps([list(section) for section in sections], default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def text_length(sections: Sequence[PdfSection]) -> int:
+    return sum(len(str(value)) for section in sections for _, value in section.blocks)
+
+
+def _paragraph(text: str, style: ParagraphStyle) -> Paragraph:
+    return Paragraph(escape(text).replace("\n", "<br/>"), style)
+
+
+def render_document(sections: Sequence[PdfSection], generated: str) -> bytes:
+    """PDF with one section per page group (runs in worker processes too)"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    story = []
+    for index, section in enumerate(sections):
+        if index:
+            story.append(PageBreak())
+        story.append(_paragraph(section.title, TITLE_STYLE))
+        for line in section.header_lines:
+            story.append(_paragraph(line, NORMAL_STYLE))
+        story.append(_paragraph(f"Generated: {generated}", NORMAL_STYLE))
+        story.append(Spacer(1, 20))
+        for kind, value in section.blocks:
+            if kind == "spacer":
+                story.append(Spacer(1, value))
+            else:
+                story.append(_paragraph(str(value), HEADING_STYLE if kind == "heading" else NORMAL_STYLE))
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _warm_up() -> None:
+    render_document([PdfSection("Warm-up", (), ())], "")
+
+
+class PdfRenderer:
+    """Cached PDF rendering, on worker processes for large documents"""
+
+    def __init__(self, workers: int, process_threshold: int, cache_size: int, cache_ttl_seconds: float):
+        self.workers = workers
+        self.process_threshold = process_threshold
+        self._cache = TTLCache(cache_size, cache_ttl_seconds)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "inline": 0, "process": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Not fork: the API process runs several threads whose held
+                # locks a forked child would inherit. The fork server starts
+                # clean and has this module preloaded.
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload([__name__])
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def warm_up(self) -> None:
+        """Start the worker processes in the background (call at startup)"""
+        if self.workers <= 0:
+            return
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_warm_up)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, sections: Sequence[PdfSection], generated: str) -> bytes:
+        """Render now, on the process pool when the document is large (blocking)"""
+        if self.workers > 0 and text_length(sections) >= self.process_threshold:
+            self._counts["process"] += 1
+            return self._get_executor().submit(render_document, list(sections), generated).result()
+        self._counts["inline"] += 1
+        return render_document(sections, generated)
+
+    def get(self, key: Hashable, sections: Sequence[PdfSection], generated: str) -> Tuple[bytes, str]:
+        """(pdf, content hash), rendering only when the sections changed"""
+        return self.get_many([(key, sections)], generated)[0]
+
+    def get_many(
+        self, documents: Sequence[Tuple[Hashable, Sequence[PdfSection]]], generated: str
+    ) -> List[Tuple[bytes, str]]:
+        """get() for several documents, rendering the changed ones in parallel on the pool"""
+        results: List[Optional[Tuple[bytes, str]]] = [None] * len(documents)
+        pending = []
+        for index, (key, sections) in enumerate(documents):
+            digest = content_hash(sections)
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == digest:
+                self._counts["hits"] += 1
+                results[index] = (cached[1], digest)
+            else:
+                pending.append((index, key, sections, digest))
+
+        if self.workers > 0 and len(pending) > 1:
+            executor = self._get_executor()
+            self._counts["process"] += len(pending)
+            futures = [executor.submit(render_document, list(sections), generated) for _, _, sections, _ in pending]
+            pdfs = [future.result() for future in futures]
+        else:
+            pdfs = [self.render(sections, generated) for _, _, sections, _ in pending]
+
+        for (index, key, _, digest), pdf in zip(pending, pdfs):
+            self._cache.set(key, (digest, pdf))
+            results[index] = (pdf, digest)
+        return results
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._cache), "workers": self.workers, **self._counts}
+
+
+pdf_renderer = PdfRenderer(
+    workers=settings.PDF_RENDER_WORKERS,
+    process_threshold=settings.PDF_RENDER_PROCESS_THRESHOLD,
+    cache_size=settings.PDF_CACHE_SIZE,
+    cache_ttl_seconds=settings.PDF_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,73 @@
+"""
+Reference data cache (locations, option master, user display names).
+
+Countries/states/cities, option categories/dropdowns and user names change
+rarely but are read on every form open and every lead write. Each namespace
+is an app.core.http_cache namespace holding serialized GET responses (served
+with ETags) and id -> name lookups.
+
+The write endpoints call `invalidate()` after commit, so this worker serves
+fresh data at once; other workers pick the change up when their entries
+expire (REFERENCE_CACHE_TTL_SECONDS).
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.http_cache import cache_namespace
+from app.models.location import Country, State, City
+from app.models.user import User
+
+location_cache = cache_namespace(
+    "locations", settings.REFERENCE_CACHE_SIZE, settings.REFERENCE_CACHE_TTL_SECONDS
+)
+option_cache = cache_namespace(
+    "options", settings.REFERENCE_CACHE_SIZE, settings.REFERENCE_CACHE_TTL_SECONDS
+)
+user_name_cache = cache_namespace(
+    "user_names", settings.REFERENCE_CACHE_SIZE, settings.REFERENCE_CACHE_TTL_SECONDS
+)
+
+
+# ============ Name lookups ============
+
+def _location_name(db: Session, model, id: Optional[int]) -> Optional[str]:
+    if not id:
+        return None
+    return location_cache.get(
+        (model.__tablename__, id),
+        lambda: db.query(model.name).filter(model.id == id).scalar(),
+    )
+
+
+def country_name(db: Session, country_id: Optional[int]) -> Optional[str]:
+    return _location_name(db, Country, country_id)
+
+
+def state_name(db: Session, state_id: Optional[int]) -> Optional[str]:
+    return _location_name(db, State, state_id)
+
+
+def city_name(db: Session, city_id: Optional[int]) -> Optional[str]:
+    return _location_name(db, City, city_id)
+
+
+def user_display_name(db: Session, user_id: Optional[int]) -> Optional[str]:
+    """full_name, falling back to email (the lead/pre-lead sales_rep value)"""
+    if not user_id:
+        return None
+
+    def load():
+        row = db.query(User.full_name, User.email).filter(User.id == user_id).first()
+        return (row.full_name or row.email) if row else None
+
+    return user_name_cache.get(user_id, load)
+
+
+def fill_location_names(db: Session, data: dict) -> None:
+    """Set denormalised country/state/city names for the ids present in data"""
+    for field, lookup in (("country", country_name), ("state", state_name), ("city", city_name)):
+        name = lookup(db, data.get(f"{field}_id"))
+        if name:
+            data[field] = name
@@ -0,0 +1,80 @@
+"""
+Typeahead search over leads, pre-leads, customers and lead contacts.
+
+Each searchable entity has a search document: its name/email/phone/company
+columns joined into one lower-cased string. On PostgreSQL every document has a
+pg_trgm GIN expression index (migration t8u9v0w1x2y3), so the
+`document LIKE '%term%'` filter is an index scan instead of a sequential scan
+over OR-ed ILIKEs. The SQL built by `search_document()` must stay identical
+to the indexed expression or the planner will not use the index.
+
+The search string is split into words; every word must appear in a document
+(substring match). Results are ranked by how many words match at the start of
+a word (prefix matches first), then by trigram similarity on PostgreSQL.
+SQLite has no pg_trgm: the same filter runs as a plain scan and ranking uses
+the prefix score only.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func, literal, literal_column, or_
+from sqlalchemy.orm import Query
+
+from app.models.customer import Customer
+from app.models.lead import Lead
+from app.models.lead_contact import LeadContact
+from app.models.pre_lead import PreLead
+
+MAX_SEARCH_TERMS = 5
+
+LEAD_SEARCH_COLUMNS = (Lead.first_name, Lead.last_name, Lead.email, Lead.phone, Lead.company_name)
+PRE_LEAD_SEARCH_COLUMNS = (PreLead.first_name, PreLead.last_name, PreLead.email, PreLead.phone, PreLead.company_name)
+CUSTOMER_SEARCH_COLUMNS = (Customer.first_name, Customer.last_name, Customer.email, Customer.phone,
+                           Customer.company_name, Customer.customer_code)
+LEAD_CONTACT_SEARCH_COLUMNS = (LeadContact.first_name, LeadContact.last_name, LeadContact.work_email)
+LEAD_COMPANY_SEARCH_COLUMNS = (Lead.company_name,)
+
+
+def search_document(columns: Sequence):
+    """lower(coalesce(col1, '') || ' ' || coalesce(col2, '') ...) with inline literals"""
+    document = None
+    for column in columns:
+        part = func.coalesce(column, literal_column("''"))
+        document = part if document is None else document + literal_column("' '") + part
+    return func.lower(document)
+
+
+def search_terms(search: Optional[str]) -> List[str]:
+    return (search or "").lower().split()[:MAX_SEARCH_TERMS]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_search(query: Query, search: Optional[str], *column_sets: Sequence) -> Tuple[Query, Optional[list]]:
+    """
+    Filter a query by a search string over one or more search documents.
+
+    Every word must match at least one document. Returns the filtered query
+    and the ranking ORDER BY clauses (None when the search string is empty).
+    """
+    terms = search_terms(search)
+    if not terms:
+        return query, None
+
+    documents = [search_document(columns) for columns in column_sets]
+    prefix_score = None
+    for term in terms:
+        escaped = _escape_like(term)
+        query = query.filter(or_(*[doc.like(f"%{escaped}%", escape="\\") for doc in documents]))
+        for doc in documents:
+            at_word_start = or_(doc.like(f"{escaped}%", escape="\\"), doc.like(f"% {escaped}%", escape="\\"))
+            score = case((at_word_start, 1), else_=0)
+            prefix_score = score if prefix_score is None else prefix_score + score
+
+    order_by = [prefix_score.desc()]
+    if query.session.get_bind().dialect.name == "postgresql":
+        phrase = literal(" ".join(terms))
+        similarities = [func.similarity(doc, phrase) for doc in documents]
+        order_by.append((similarities[0] if len(similarities) == 1 else func.greatest(*similarities)).desc())
+    return query, order_by
@@ -0,0 +1,465 @@
+"""
+Outgoing webhook dispatcher (transactional outbox).
+
+Request handlers call `enqueue_event()` before committing, so the event row is
+stored atomically with the change that raised it and the handler never waits
+on the network. A pool of async workers in the API process then:
+
+1. claims due rows (SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL) and leases
+   them by pushing next_attempt_at forward, so several API workers can share
+   the outbox without double-delivering;
+2. fans new events out into one row per active outgoing WebhookConfig;
+3. POSTs them through one pooled httpx.AsyncClient, bounded by a global and a
+   per-endpoint semaphore (per process);
+4. reschedules failures with exponential backoff and jitter, and after
+   WebhookConfig.retry_count retries dead-letters them into webhook_logs.
+
+Commits that enqueue events wake the workers immediately; otherwise they poll
+every WEBHOOK_DISPATCH_POLL_SECONDS.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from string import Template
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.webhook import (
+    WebhookConfig, WebhookIdempotencyKey, WebhookLog, WebhookOutbox, WebhookOutboxStatus,
+    WebhookDirection, WebhookEvent
+)
+
+logger = logging.getLogger(__name__)
+
+# Claimed rows become visible to other workers again after this long, which
+# recovers deliveries from a worker that died mid-batch. Must exceed the
+# longest WebhookConfig.timeout_seconds.
+CLAIM_LEASE_SECONDS = 300
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+MAX_LOGGED_RESPONSE_CHARS = 2000
+PRUNE_INTERVAL_SECONDS = 600
+
+_PENDING_FLAG = "webhook_outbox_pending"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_event(db, event_type: WebhookEvent, payload: dict,
+                  entity_type: Optional[str] = None, entity_id: Optional[int] = None) -> WebhookOutbox:
+    """
+    Add an outgoing event to the outbox in the caller's transaction.
+
+    Works with both Session and AsyncSession; the row is delivered only if the
+    caller commits.
+    """
+    row = WebhookOutbox(
+        event=event_type.value,
+        payload=jsonable_encoder(payload),
+        entity_type=entity_type,
+        entity_id=entity_id,
+        status=WebhookOutboxStatus.PENDING.value,
+        attempts=0,
+        next_attempt_at=_utcnow(),
+    )
+    db.add(row)
+    db.info[_PENDING_FLAG] = True
+    return row
+
+
+class DeliveryResult(NamedTuple):
+    success: bool
+    retryable: bool = False
+    status_code: Optional[int] = None
+    response_body: Optional[str] = None
+    error: Optional[str] = None
+
+
+def build_request_body(row: WebhookOutbox, config: WebhookConfig) -> bytes:
+    """
+    Serialize the delivery body.
+
+    Without a payload_template the body is a standard envelope. A template is
+    a JSON document with $event, $delivery_id, $entity_type, $entity_id,
+    $timestamp and $data placeholders ($data is the JSON-encoded payload).
+    """
+    timestamp = (row.created_at or _utcnow()).isoformat()
+    if config.payload_template:
+        rendered = Template(config.payload_template).substitute(
+            event=row.event,
+            delivery_id=row.id,
+            entity_type=row.entity_type or "",
+            entity_id=row.entity_id if row.entity_id is not None else "null",
+            timestamp=timestamp,
+            data=json.dumps(row.payload),
+        )
+        json.loads(rendered)  # reject templates that do not render to JSON
+        return rendered.encode()
+
+    return json.dumps({
+        "id": row.id,
+        "event": row.event,
+        "timestamp": timestamp,
+        "entity_type": row.entity_type,
+        "entity_id": row.entity_id,
+        "data": row.payload,
+    }, separators=(",", ":")).encode()
+
+
+def build_request_headers(row: WebhookOutbox, config: WebhookConfig, body: bytes) -> Dict[str, str]:
+    """Static config headers plus event, delivery id, auth and HMAC signature"""
+    headers = {"Content-Type": "application/json"}
+    headers.update(config.headers or {})
+    headers["X-Webhook-Event"] = row.event
+    headers["X-Webhook-Delivery"] = str(row.id)
+    if config.auth_header and config.auth_value:
+        headers[config.auth_header] = config.auth_value
+    if config.secret_key:
+        # Same scheme verify_webhook_signature() checks on incoming webhooks
+        headers["X-Webhook-Signature"] = hmac.new(
+            config.secret_key.encode(), body, hashlib.sha256
+        ).hexdigest()
+    return headers
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(settings.WEBHOOK_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), settings.WEBHOOK_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def claim_batch(db: AsyncSession, limit: int) -> List[WebhookOutbox]:
+    """Lease up to `limit` due pending rows for this worker"""
+    now = _utcnow()
+    rows = (await db.execute(
+        select(WebhookOutbox)
+        .where(
+            WebhookOutbox.status == WebhookOutboxStatus.PENDING.value,
+            WebhookOutbox.next_attempt_at <= now
+        )
+        .order_by(WebhookOutbox.next_attempt_at, WebhookOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+
+    if not rows:
+        await db.commit()
+        return []
+
+    # The conditional UPDATE is the actual lease; it also keeps databases
+    # without SKIP LOCKED (SQLite) from handing a row to two workers.
+    lease_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    claimed_ids = set((await db.execute(
+        update(WebhookOutbox)
+        .where(
+            WebhookOutbox.id.in_([row.id for row in rows]),
+            WebhookOutbox.status == WebhookOutboxStatus.PENDING.value,
+            WebhookOutbox.next_attempt_at <= now
+        )
+        .values(next_attempt_at=lease_until)
+        .returning(WebhookOutbox.id)
+        .execution_options(synchronize_session=False)
+    )).scalars())
+    await db.commit()
+
+    claimed = [row for row in rows if row.id in claimed_ids]
+    for row in claimed:
+        set_committed_value(row, "next_attempt_at", lease_until)
+    return claimed
+
+
+async def load_outgoing_configs(db: AsyncSession) -> Dict[int, WebhookConfig]:
+    """Active outgoing webhook configs by id"""
+    configs = (await db.execute(
+        select(WebhookConfig).where(
+            WebhookConfig.direction == WebhookDirection.OUTGOING,
+            WebhookConfig.is_active == True,
+            WebhookConfig.url.isnot(None)
+        )
+    )).scalars().all()
+    return {config.id: config for config in configs}
+
+
+def fan_out(db: AsyncSession, rows: List[WebhookOutbox],
+            configs: Dict[int, WebhookConfig]) -> List[Tuple[WebhookOutbox, WebhookConfig]]:
+    """
+    Pair claimed rows with their endpoint.
+
+    A new event (no webhook_config_id) is assigned to the first matching
+    config and copied for the others; events nobody subscribes to, and rows
+    whose config was deactivated, are marked skipped.
+    """
+    by_event: Dict[str, List[WebhookConfig]] = {}
+    for config in configs.values():
+        by_event.setdefault(config.event.value, []).append(config)
+
+    now = _utcnow()
+    deliveries = []
+    for row in rows:
+        if row.webhook_config_id is not None:
+            targets = [configs[row.webhook_config_id]] if row.webhook_config_id in configs else []
+        else:
+            targets = by_event.get(row.event, [])
+
+        if not targets:
+            row.status = WebhookOutboxStatus.SKIPPED.value
+            row.processed_at = now
+            continue
+
+        row.webhook_config_id = targets[0].id
+        deliveries.append((row, targets[0]))
+        for config in targets[1:]:
+            copy = WebhookOutbox(
+                event=row.event,
+                webhook_config_id=config.id,
+                payload=row.payload,
+                entity_type=row.entity_type,
+                entity_id=row.entity_id,
+                status=WebhookOutboxStatus.PENDING.value,
+                attempts=0,
+                next_attempt_at=row.next_attempt_at,  # already leased
+                created_at=row.created_at,
+            )
+            db.add(copy)
+            deliveries.append((copy, config))
+    return deliveries
+
+
+def record_result(db: AsyncSession, row: WebhookOutbox, config: WebhookConfig,
+                  result: DeliveryResult, headers: Optional[Dict[str, str]] = None) -> None:
+    """Mark a delivery done, reschedule it, or dead-letter it into webhook_logs"""
+    now = _utcnow()
+    row.attempts += 1
+
+    if result.success:
+        row.status = WebhookOutboxStatus.DELIVERED.value
+        row.last_error = None
+        row.processed_at = now
+        return
+
+    row.last_error = result.error
+    max_attempts = 1 + max(config.retry_count or 0, 0)
+    if result.retryable and row.attempts < max_attempts:
+        row.next_attempt_at = now + timedelta(seconds=backoff_seconds(row.attempts))
+        return
+
+    row.status = WebhookOutboxStatus.DEAD.value
+    row.processed_at = now
+    if headers:
+        # Do not persist credentials in the log
+        headers = {k: v for k, v in headers.items()
+                   if k not in ("X-Webhook-Signature", config.auth_header)}
+    db.add(WebhookLog(
+        webhook_config_id=config.id,
+        direction=WebhookDirection.OUTGOING,
+        event=WebhookEvent(row.event),
+        url=config.url,
+        method="POST",
+        request_headers=headers,
+        request_payload=row.payload,
+        response_status=result.status_code,
+        response_body=result.response_body,
+        is_successful=False,
+        error_message=result.error,
+        retry_count=row.attempts - 1,
+        entity_type=row.entity_type,
+        entity_id=row.entity_id,
+        processed_at=now
+    ))
+
+
+class WebhookDispatcher:
+    """Async worker pool delivering the webhook outbox"""
+
+    def __init__(self, workers: int, batch_size: int, poll_seconds: float,
+                 max_concurrency: int, per_endpoint_concurrency: int):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_concurrency = max_concurrency
+        self.per_endpoint_concurrency = per_endpoint_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._tasks: List[asyncio.Task] = []
+        self._client: Optional[httpx.AsyncClient] = None
+        self._concurrency: Optional[asyncio.Semaphore] = None
+        self._endpoint_limits: Dict[int, asyncio.Semaphore] = {}
+        self._last_prune = 0.0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._wake.set()  # drain anything left over from the last run
+        self._stopping = False
+        self._concurrency = asyncio.Semaphore(self.max_concurrency)
+        self._endpoint_limits = {}
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            )
+        )
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"webhook-dispatcher-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._wake.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()  # leased rows are picked up again after CLAIM_LEASE_SECONDS
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    def notify(self) -> None:
+        """Wake the workers; safe to call from any thread"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake.set()
+        else:
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # loop shutting down
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            while not self._stopping:
+                try:
+                    claimed = await self.process_batch()
+                except Exception:
+                    logger.exception("Webhook dispatch failed")
+                    break
+                if claimed < self.batch_size:
+                    break  # caught up; keep draining otherwise
+
+            try:
+                await self._maybe_prune()
+            except Exception:
+                logger.exception("Webhook outbox pruning failed")
+
+    async def process_batch(self) -> int:
+        """Claim, deliver and record one batch; returns the number of rows claimed"""
+        async with AsyncSessionLocal() as db:
+            rows = await claim_batch(db, self.batch_size)
+            if not rows:
+                return 0
+
+            deliveries = fan_out(db, rows, await load_outgoing_configs(db))
+            await db.commit()
+
+            results = await asyncio.gather(*(self._deliver(row, config) for row, config in deliveries))
+            for (row, config), (result, headers) in zip(deliveries, results):
+                record_result(db, row, config, result, headers)
+            await db.commit()
+            return len(rows)
+
+    async def _deliver(self, row: WebhookOutbox,
+                       config: WebhookConfig) -> Tuple[DeliveryResult, Optional[Dict[str, str]]]:
+        try:
+            body = build_request_body(row, config)
+        except (KeyError, ValueError) as e:
+            return DeliveryResult(success=False, error=f"Invalid payload template: {e}"), None
+        headers = build_request_headers(row, config, body)
+
+        endpoint_limit = self._endpoint_limits.get(config.id)
+        if endpoint_limit is None:
+            endpoint_limit = self._endpoint_limits[config.id] = asyncio.Semaphore(self.per_endpoint_concurrency)
+
+        async with self._concurrency, endpoint_limit:
+            try:
+                response = await self._client.post(
+                    config.url, content=body, headers=headers,
+                    timeout=config.timeout_seconds or 30
+                )
+            except httpx.TimeoutException:
+                return DeliveryResult(success=False, retryable=True, error="Connection timeout"), headers
+            except httpx.RequestError as e:
+                return DeliveryResult(success=False, retryable=True, error=f"Connection error: {e}"), headers
+
+        if response.is_success:
+            return DeliveryResult(success=True, status_code=response.status_code), headers
+        return DeliveryResult(
+            success=False,
+            retryable=response.status_code in RETRYABLE_STATUS_CODES,
+            status_code=response.status_code,
+            response_body=response.text[:MAX_LOGGED_RESPONSE_CHARS],
+            error=f"HTTP {response.status_code}"
+        ), headers
+
+    async def _maybe_prune(self) -> None:
+        """Delete delivered/skipped rows and idempotency keys past their retention windows"""
+        if time.monotonic() - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = time.monotonic()
+        now = _utcnow()
+        cutoff = now - timedelta(hours=settings.WEBHOOK_OUTBOX_RETENTION_HOURS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(WebhookOutbox).where(
+                WebhookOutbox.status.in_([
+                    WebhookOutboxStatus.DELIVERED.value, WebhookOutboxStatus.SKIPPED.value
+                ]),
+                WebhookOutbox.processed_at < cutoff
+            ))
+            await db.execute(delete(WebhookIdempotencyKey).where(
+                WebhookIdempotencyKey.created_at
+                < now - timedelta(days=settings.WEBHOOK_IDEMPOTENCY_RETENTION_DAYS)
+            ))
+            await db.commit()
+
+
+webhook_dispatcher = WebhookDispatcher(
+    workers=settings.WEBHOOK_DISPATCH_WORKERS,
+    batch_size=settings.WEBHOOK_DISPATCH_BATCH_SIZE,
+    poll_seconds=settings.WEBHOOK_DISPATCH_POLL_SECONDS,
+    max_concurrency=settings.WEBHOOK_MAX_CONCURRENCY,
+    per_endpoint_concurrency=settings.WEBHOOK_PER_ENDPOINT_CONCURRENCY,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_webhook_dispatcher(session):
+    if session.info.pop(_PENDING_FLAG, False):
+        webhook_dispatcher.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_webhook_events(session):
+    session.info.pop(_PENDING_FLAG, None)
@@ -0,0 +1,252 @@
+"""
+Buffered WebhookLog writer.
+
+With WEBHOOK_LOG_MODE=buffered, incoming-webhook log rows are not written in
+the request's transaction. `add()` parks them on the session and, once that
+session commits, they are queued in memory and a background task writes them
+with multi-row INSERTs (up to WEBHOOK_LOG_BATCH_SIZE rows, at least every
+WEBHOOK_LOG_FLUSH_INTERVAL_SECONDS). Rows of a rolled-back transaction are
+discarded, so a log never claims success for work that was not committed.
+
+Durability:
+- WEBHOOK_LOG_MODE=sync keeps the old behaviour (log row in the request's
+  transaction, nothing can be lost);
+- in buffered mode the queue is drained on graceful shutdown, but up to one
+  queue's worth of rows can be lost if the process dies;
+- a batch that still fails after FLUSH_RETRIES attempts is written row by
+  row, so only the rows that cannot be inserted are dropped;
+- `add()` reserves queue room for its rows until the transaction ends, so
+  queued plus in-flight rows never exceed WEBHOOK_LOG_QUEUE_SIZE; without
+  room it waits up to WEBHOOK_LOG_ENQUEUE_TIMEOUT_SECONDS (backpressure),
+  then falls back to writing the row in the request's transaction instead
+  of dropping it.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.models.webhook import WebhookLog
+
+logger = logging.getLogger(__name__)
+
+_PENDING_LOGS = "pending_webhook_logs"
+FLUSH_RETRIES = 3
+
+# Every column except the primary key, so all queued rows share one INSERT shape
+_LOG_COLUMNS = [column.key for column in WebhookLog.__table__.columns if not column.primary_key]
+
+
+def log_to_row(log: WebhookLog) -> dict:
+    row = {key: getattr(log, key) for key in _LOG_COLUMNS}
+    if row["created_at"] is None:
+        row["created_at"] = datetime.now(timezone.utc)
+    if row["method"] is None:
+        row["method"] = "POST"
+    if row["is_successful"] is None:
+        row["is_successful"] = False
+    if row["retry_count"] is None:
+        row["retry_count"] = 0
+    return row
+
+
+class WebhookLogWriter:
+    """In-memory queue of WebhookLog rows flushed by a background task"""
+
+    def __init__(self, buffered: bool, queue_size: int, batch_size: int,
+                 flush_interval_seconds: float, enqueue_timeout_seconds: float):
+        self.buffered = buffered
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.enqueue_timeout_seconds = enqueue_timeout_seconds
+        self._queue: deque = deque()
+        self._reserved = 0  # room held for rows of transactions not yet finished
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.fallbacks = 0
+        self.flush_failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    async def start(self) -> None:
+        if not self.buffered or self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="webhook-log-writer")
+
+    async def stop(self) -> None:
+        """Stop accepting rows and flush everything still queued"""
+        if not self._task:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        self._loop = None
+
+    async def add(self, db, log: WebhookLog) -> None:
+        """Record a log row as part of the caller's transaction (caller commits)"""
+        await self.add_all(db, [log])
+
+    async def add_all(self, db, logs: Iterable[WebhookLog]) -> None:
+        logs = list(logs)
+        if not logs:
+            return
+        if not self.running or not await self._wait_for_room(len(logs)):
+            if self.running:
+                self.fallbacks += len(logs)
+            db.add_all(logs)
+            return
+        db.info.setdefault(_PENDING_LOGS, []).extend(logs)
+
+    def _reserve(self, count: int) -> bool:
+        with self._lock:
+            if len(self._queue) + self._reserved + count > self.queue_size:
+                return False
+            self._reserved += count
+            return True
+
+    def _release(self, count: int) -> None:
+        with self._lock:
+            self._reserved = max(self._reserved - count, 0)
+
+    async def _wait_for_room(self, count: int) -> bool:
+        """
+        Backpressure: wait until the queue has room for count rows and reserve
+        it; the reservation is released when the transaction commits (the rows
+        take its place) or rolls back
+        """
+        if count > self.queue_size:
+            return False
+        if self._reserve(count):
+            return True
+        deadline = time.monotonic() + self.enqueue_timeout_seconds
+        while time.monotonic() < deadline:
+            self._wake.set()
+            await asyncio.sleep(0.05)
+            if self._reserve(count):
+                return True
+        return False
+
+    def enqueue_committed(self, logs: List[WebhookLog]) -> None:
+        """Queue rows whose transaction committed; called from the session hook"""
+        rows = [log_to_row(log) for log in logs]
+        with self._lock:
+            self._reserved = max(self._reserved - len(rows), 0)
+            self._queue.extend(rows)
+            size = len(self._queue)
+        if size >= self.batch_size:
+            self._notify()
+
+    def discard(self, logs: List[WebhookLog]) -> None:
+        """Release the room of rows whose transaction rolled back"""
+        self._release(len(logs))
+
+    def _notify(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake.set()
+        else:
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # loop shutting down
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                await self._write(batch)
+
+            if self._stopping:
+                break
+
+    async def _insert(self, rows: List[dict]) -> None:
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(WebhookLog), rows)
+
+    async def _write(self, rows: List[dict]) -> None:
+        for attempt in range(1, FLUSH_RETRIES + 1):
+            try:
+                await self._insert(rows)
+                self.written += len(rows)
+                return
+            except Exception:
+                self.flush_failures += 1
+                logger.exception("Writing %d webhook log rows failed (attempt %d)", len(rows), attempt)
+                await asyncio.sleep(0.5 * attempt)
+
+        # The batch keeps failing: write rows one by one so a bad row only drops itself
+        for row in rows:
+            try:
+                await self._insert([row])
+                self.written += 1
+            except Exception:
+                self.dropped += 1
+                logger.exception("Dropping webhook log row for event %s", row.get("event"))
+
+    def stats(self) -> dict:
+        return {
+            "mode": "buffered" if self.buffered else "sync",
+            "running": self.running,
+            "queued": len(self._queue),
+            "reserved": self._reserved,
+            "queue_size": self.queue_size,
+            "written": self.written,
+            "dropped": self.dropped,
+            "fallbacks": self.fallbacks,
+            "flush_failures": self.flush_failures,
+        }
+
+
+webhook_log_writer = WebhookLogWriter(
+    buffered=settings.WEBHOOK_LOG_MODE == "buffered",
+    queue_size=settings.WEBHOOK_LOG_QUEUE_SIZE,
+    batch_size=settings.WEBHOOK_LOG_BATCH_SIZE,
+    flush_interval_seconds=settings.WEBHOOK_LOG_FLUSH_INTERVAL_SECONDS,
+    enqueue_timeout_seconds=settings.WEBHOOK_LOG_ENQUEUE_TIMEOUT_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed_webhook_logs(session):
+    logs = session.info.pop(_PENDING_LOGS, None)
+    if logs:
+        webhook_log_writer.enqueue_committed(logs)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_webhook_logs(session):
+    logs = session.info.pop(_PENDING_LOGS, None)
+    if logs:
+        webhook_log_writer.discard(logs)
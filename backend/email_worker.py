@@ -0,0 +1,38 @@
+"""
+Standalone email campaign worker.
+
+Sends queued bulk email campaigns outside the API processes. Run one or
+more of these (campaigns are leased, so they share the queue) and set
+EMAIL_CAMPAIGN_WORKER_ENABLED=false for the API:
+    python email_worker.py
+
+Stops on SIGINT/SIGTERM after the batch in flight, handing its campaign
+back to the queue.
+"""
+
+import logging
+import signal
+import threading
+
+from app.services.email_campaigns import email_campaign_worker
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    stopping = threading.Event()
+
+    def handle_signal(signum, frame):
+        logging.info("Received signal %s, stopping", signum)
+        stopping.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    email_campaign_worker.start()
+    logging.info("Email campaign worker %s started", email_campaign_worker.worker_id)
+    stopping.wait()
+    email_campaign_worker.stop()
+
+
+if __name__ == "__main__":
+    main()
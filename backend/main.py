@@ -4,18 +4,49 @@ from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
 from app.api.v1.router import api_router
 from app.core.database import engine, Base
+from app.core.http_cache import ETagMiddleware
+from app.core.upload_limits import UploadSizeLimitMiddleware
+from app.core.password_hashing import password_hasher
+from app.services.dashboard_snapshot import snapshot_refresher
+from app.services.email_campaigns import email_campaign_worker
+from app.services.pdf_rendering import pdf_renderer
+from app.services.webhook_dispatcher import webhook_dispatcher
+from app.services.webhook_log_writer import webhook_log_writer
+from contextlib import asynccontextmanager
 import os
 
 # Create database tables (for development - use Alembic in production)
 # Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background workers"""
+    if settings.DASHBOARD_SNAPSHOT_ENABLED:
+        snapshot_refresher.start()
+    if settings.WEBHOOK_DISPATCH_ENABLED:
+        await webhook_dispatcher.start()
+    await webhook_log_writer.start()
+    if settings.EMAIL_CAMPAIGN_WORKER_ENABLED:
+        email_campaign_worker.start()
+    pdf_renderer.warm_up()
+    yield
+    email_campaign_worker.stop()
+    await webhook_log_writer.stop()
+    await webhook_dispatcher.stop()
+    snapshot_refresher.stop()
+    password_hasher.shutdown()
+    pdf_renderer.shutdown()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="CRM Microservice API - Independent CRM system with Pre-Lead, Lead, Customer management",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -25,16 +56,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# ETags / 304 Not Modified for GET responses
+if settings.HTTP_ETAG_ENABLED:
+    app.add_middleware(ETagMiddleware, max_body_bytes=settings.HTTP_ETAG_MAX_BODY_BYTES)
+
+# Reject oversized uploads before reading the body
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.UPLOAD_MAX_BYTES)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
-# Mount uploads directory for static file serving (documents, images, etc.)
-uploads_dir = os.path.join(os.path.dirname(__file__), "uploads")
-if not os.path.exists(uploads_dir):
-    os.makedirs(uploads_dir)
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+# Mount uploads directory for static file serving (documents, images, etc.).
+# Unauthenticated: prefer the per-entity document download endpoints.
+if settings.UPLOADS_STATIC_ENABLED:
+    uploads_dir = os.path.join(os.path.dirname(__file__), "uploads")
+    if not os.path.exists(uploads_dir):
+        os.makedirs(uploads_dir)
+    app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
 
 
 @app.get("/")
@@ -0,0 +1,36 @@
+"""Add dashboard snapshots table
+
+Revision ID: q5r6s7t8u9v0
+Revises: p4q5r6s7t8u9
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'q5r6s7t8u9v0'
+down_revision = 'p4q5r6s7t8u9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dashboard_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_key', sa.String(50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('refresh_duration_ms', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), onupdate=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_dashboard_snapshots_id', 'dashboard_snapshots', ['id'])
+    op.create_index('ix_dashboard_snapshots_snapshot_key', 'dashboard_snapshots', ['snapshot_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('dashboard_snapshots')
@@ -0,0 +1,34 @@
+"""Add webhook idempotency keys table
+
+Revision ID: s7t8u9v0w1x2
+Revises: r6s7t8u9v0w1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 's7t8u9v0w1x2'
+down_revision = 'r6s7t8u9v0w1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'webhook_idempotency_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(255), nullable=False),
+        sa.Column('event', sa.String(50), nullable=False),
+        sa.Column('response', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_webhook_idempotency_keys_id', 'webhook_idempotency_keys', ['id'])
+    op.create_index('ix_webhook_idempotency_keys_idempotency_key', 'webhook_idempotency_keys', ['idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('webhook_idempotency_keys')
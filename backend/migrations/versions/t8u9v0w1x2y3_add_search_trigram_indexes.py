@@ -0,0 +1,53 @@
+"""Add pg_trgm search indexes for lead, pre-lead, customer and contact search
+
+Revision ID: t8u9v0w1x2y3
+Revises: s7t8u9v0w1x2
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 't8u9v0w1x2y3'
+down_revision = 's7t8u9v0w1x2'
+branch_labels = None
+depends_on = None
+
+
+# Must match app.services.search.search_document() for each column set
+SEARCH_INDEXES = {
+    'ix_leads_search_trgm': ('leads', ['first_name', 'last_name', 'email', 'phone', 'company_name']),
+    'ix_pre_leads_search_trgm': ('pre_leads', ['first_name', 'last_name', 'email', 'phone', 'company_name']),
+    'ix_customers_search_trgm': ('customers', ['first_name', 'last_name', 'email', 'phone', 'company_name', 'customer_code']),
+    'ix_lead_contacts_search_trgm': ('lead_contacts', ['first_name', 'last_name', 'work_email']),
+    'ix_leads_company_name_trgm': ('leads', ['company_name']),
+}
+
+
+def search_document(columns):
+    return "lower(" + " || ' ' || ".join(f"coalesce({column}, '')" for column in columns) + ")"
+
+
+def upgrade() -> None:
+    # Trigram indexes are PostgreSQL-only; other databases search with a scan
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY keeps the tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in SEARCH_INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+                f"USING gin ({search_document(columns)} gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for name in SEARCH_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
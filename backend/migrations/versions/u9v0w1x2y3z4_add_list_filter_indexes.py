@@ -0,0 +1,76 @@
+"""Add composite and partial indexes for list and dashboard queries
+
+Revision ID: u9v0w1x2y3z4
+Revises: t8u9v0w1x2y3
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'u9v0w1x2y3z4'
+down_revision = 't8u9v0w1x2y3'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_leads_created_at_id', 'leads', ['created_at', 'id'], None),
+    ('ix_leads_active_created_at', 'leads', ['created_at', 'id'], 'status = 0'),
+    ('ix_leads_active_lead_status_created_at', 'leads', ['lead_status', 'created_at'], 'status = 0'),
+    ('ix_leads_assigned_to_created_at', 'leads', ['assigned_to', 'created_at'], None),
+    ('ix_leads_source_created_at', 'leads', ['source', 'created_at'], None),
+    ('ix_leads_pipeline_stage_created_at', 'leads', ['pipeline_stage', 'created_at'], None),
+    ('ix_leads_company_id_created_at', 'leads', ['company_id', 'created_at'], None),
+    ('ix_leads_active_next_follow_up', 'leads', ['next_follow_up'], 'status = 0'),
+
+    ('ix_pre_leads_created_at_id', 'pre_leads', ['created_at', 'id'], None),
+    ('ix_pre_leads_active_created_at', 'pre_leads', ['created_at', 'id'], 'status = 0'),
+    ('ix_pre_leads_assigned_to_created_at', 'pre_leads', ['assigned_to', 'created_at'], None),
+    ('ix_pre_leads_source_created_at', 'pre_leads', ['source', 'created_at'], None),
+    ('ix_pre_leads_company_id_created_at', 'pre_leads', ['company_id', 'created_at'], None),
+
+    ('ix_customers_created_at_id', 'customers', ['created_at', 'id'], None),
+    ('ix_customers_status_created_at', 'customers', ['status', 'created_at'], None),
+    ('ix_customers_account_manager_created_at', 'customers', ['account_manager', 'created_at'], None),
+
+    ('ix_activities_created_at_id', 'activities', ['created_at', 'id'], None),
+    ('ix_activities_lead_id_created_at', 'activities', ['lead_id', 'created_at'], None),
+    ('ix_activities_customer_id_created_at', 'activities', ['customer_id', 'created_at'], None),
+    ('ix_activities_open_performed_by_scheduled', 'activities', ['performed_by', 'scheduled_date'],
+     'is_completed = false'),
+    ('ix_activities_open_scheduled_date', 'activities', ['scheduled_date'], 'is_completed = false'),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, columns, _ in INDEXES:
+            op.create_index(name, table, columns)
+        return
+
+    # CONCURRENTLY keeps the tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for table in ('leads', 'pre_leads', 'customers', 'activities'):
+            op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, _, _ in INDEXES:
+            op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
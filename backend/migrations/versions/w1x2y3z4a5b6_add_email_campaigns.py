@@ -0,0 +1,70 @@
+"""Add email campaign job tables
+
+Revision ID: w1x2y3z4a5b6
+Revises: v0w1x2y3z4a5
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'w1x2y3z4a5b6'
+down_revision = 'v0w1x2y3z4a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subject', sa.String(255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('cc', sa.JSON(), nullable=True),
+        sa.Column('bcc', sa.JSON(), nullable=True),
+        sa.Column('attachments', sa.JSON(), nullable=True),
+        sa.Column('recipient_type', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('total_recipients', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sent_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('locked_by', sa.String(100), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_email_campaigns_id', 'email_campaigns', ['id'])
+    op.create_index('ix_email_campaigns_status', 'email_campaigns', ['status'])
+
+    op.create_table(
+        'email_campaign_recipients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(),
+                  sa.ForeignKey('email_campaigns.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('email', sa.String(255), nullable=False),
+        sa.Column('name', sa.String(255), nullable=True),
+        sa.Column('lead_id', sa.Integer(), sa.ForeignKey('leads.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('customer_id', sa.Integer(),
+                  sa.ForeignKey('customers.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_email_campaign_recipients_campaign_status',
+        'email_campaign_recipients', ['campaign_id', 'status', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('email_campaign_recipients')
+    op.drop_table('email_campaigns')
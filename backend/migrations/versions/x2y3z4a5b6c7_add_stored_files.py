@@ -0,0 +1,38 @@
+"""Add content-addressed stored files table
+
+Revision ID: x2y3z4a5b6c7
+Revises: w1x2y3z4a5b6
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'x2y3z4a5b6c7'
+down_revision = 'w1x2y3z4a5b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stored_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(64), nullable=False),
+        sa.Column('storage_key', sa.String(500), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(100), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stored_files_id', 'stored_files', ['id'])
+    op.create_index('ix_stored_files_sha256', 'stored_files', ['sha256'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stored_files_sha256', table_name='stored_files')
+    op.drop_index('ix_stored_files_id', table_name='stored_files')
+    op.drop_table('stored_files')
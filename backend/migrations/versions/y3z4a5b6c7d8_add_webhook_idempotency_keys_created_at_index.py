@@ -0,0 +1,24 @@
+"""Add created_at index to webhook idempotency keys for retention pruning
+
+Revision ID: y3z4a5b6c7d8
+Revises: x2y3z4a5b6c7
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'y3z4a5b6c7d8'
+down_revision = 'x2y3z4a5b6c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_webhook_idempotency_keys_created_at', 'webhook_idempotency_keys', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_idempotency_keys_created_at', table_name='webhook_idempotency_keys')
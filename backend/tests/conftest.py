@@ -0,0 +1,55 @@
+"""
+Test setup: a throwaway SQLite database and no background workers that
+need external services. The environment is set before the app is imported.
+
+With DATABASE_URL pointing at PostgreSQL only the `query_plans` tests run
+(read-only, against that database); everything else needs the throwaway
+database and is skipped.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+USE_POSTGRESQL = os.environ.get("DATABASE_URL", "").startswith("postgresql")
+
+_db_dir = tempfile.mkdtemp(prefix="crm-tests-")
+if not USE_POSTGRESQL:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+os.environ["DASHBOARD_SNAPSHOT_ENABLED"] = "false"
+os.environ["WEBHOOK_DISPATCH_ENABLED"] = "false"
+os.environ["EMAIL_CAMPAIGN_WORKER_ENABLED"] = "false"
+os.environ["STORAGE_LOCAL_ROOT"] = os.path.join(_db_dir, "uploads")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.models  # noqa: E402,F401  (register every table)
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "query_plans: read-only EXPLAIN checks against a PostgreSQL DATABASE_URL")
+
+
+@pytest.fixture(autouse=True)
+def database(request):
+    if request.node.get_closest_marker("query_plans"):
+        yield
+        return
+    if USE_POSTGRESQL:
+        pytest.skip("needs the throwaway SQLite database (unset DATABASE_URL)")
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
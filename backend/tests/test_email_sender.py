@@ -0,0 +1,64 @@
+import socketserver
+import threading
+
+import pytest
+
+from app.services.email_sender import SMTPSender, build_message
+
+
+class _SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server: refuses recipients starting with "bounce" """
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self._reply("220 stub ready")
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].split(":", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 stub")
+            elif verb == "RCPT":
+                self._reply("550 no such user" if "<bounce" in command else "250 ok")
+            elif verb == "DATA":
+                self._reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.delivered += 1
+                self._reply("250 queued")
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                return
+            else:  # MAIL, RSET, NOOP
+                self._reply("250 ok")
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPStubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.delivered = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_refused_recipient_keeps_pooled_connection(smtp_server):
+    sender = SMTPSender("127.0.0.1", smtp_server.server_address[1], None, None,
+                        starttls=False, use_ssl=False, timeout=5, pool_size=1)
+    try:
+        ok = sender.send(build_message("a@example.com", "A", "Hi", "Hello"), ["a@example.com"])
+        refused = sender.send(build_message("bounce@example.com", "B", "Hi", "Hello"), ["bounce@example.com"])
+        again = sender.send(build_message("c@example.com", "C", "Hi", "Hello"), ["c@example.com"])
+    finally:
+        sender.close()
+
+    assert ok.success and again.success
+    assert not refused.success and not refused.retryable
+    assert smtp_server.delivered == 2
+    assert smtp_server.connections == 1
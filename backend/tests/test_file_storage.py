@@ -0,0 +1,56 @@
+import asyncio
+import io
+
+from fastapi import UploadFile
+
+from app.core.database import AsyncSessionLocal
+from app.models.stored_file import StoredFile
+from app.services import file_storage
+from app.services.file_storage import get_storage, key_from_path, release_file, store_upload
+
+CONTENT = b"%PDF-1.4 same content"
+
+
+def _upload(data: bytes = CONTENT) -> str:
+    async def run():
+        async with AsyncSessionLocal() as session:
+            stored = await store_upload(session, UploadFile(io.BytesIO(data), filename="doc.pdf", size=len(data)))
+            await session.commit()
+            return stored.path
+    return asyncio.run(run())
+
+
+def _release(db, path: str) -> None:
+    release_file(db, path)
+    db.commit()
+
+
+def test_last_release_deletes_blob_and_row(db):
+    path = _upload()
+    _upload()  # same content: one blob, two references
+
+    _release(db, path)
+    assert get_storage().exists(key_from_path(path))
+
+    _release(db, path)
+    assert not get_storage().exists(key_from_path(path))
+    assert db.query(StoredFile).count() == 0
+
+
+def test_reupload_before_cleanup_keeps_blob(db, monkeypatch):
+    path = _upload()
+
+    # Request A releases the last reference; its after-commit cleanup is
+    # held back until request B has uploaded the same content
+    deferred = []
+    monkeypatch.setattr(file_storage, "collect_unreferenced_blob", deferred.append)
+    _release(db, path)
+    monkeypatch.undo()
+
+    assert _upload() == path
+    for sha256 in deferred:
+        assert file_storage.collect_unreferenced_blob(sha256) is False
+
+    assert get_storage().exists(key_from_path(path))
+    stored = db.query(StoredFile).populate_existing().one()
+    assert stored.ref_count == 1
@@ -0,0 +1,120 @@
+"""
+Query plan check for the list endpoints.
+
+Calls each list endpoint (with its common filters) in-process, captures the
+SELECT statements it runs, and EXPLAINs them against the configured
+PostgreSQL database. A plan with a sequential scan on a table of more than
+QUERY_PLAN_MIN_ROWS rows (planner estimate, default 10000) fails: that
+filter/sort pattern is not covered by an index.
+
+Skipped unless DATABASE_URL points at PostgreSQL; run it against a database
+with production-like volumes (small tables are always seq-scanned):
+    DATABASE_URL=postgresql://... pytest tests/test_query_plans.py
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from app.core.database import SessionLocal, engine
+from app.core.security import create_access_token
+from app.models.user import User
+
+pytestmark = [
+    pytest.mark.query_plans,
+    pytest.mark.skipif(engine.dialect.name != "postgresql", reason="query plan check needs PostgreSQL"),
+]
+
+MIN_ROWS = int(os.environ.get("QUERY_PLAN_MIN_ROWS", "10000"))
+
+# Endpoint paths with the filter combinations the frontend uses
+LIST_REQUESTS = [
+    "/api/v1/leads/?status=0",
+    "/api/v1/leads/?status=0&lead_status=new",
+    "/api/v1/leads/?assigned_to=1",
+    "/api/v1/leads/?source=direct",
+    "/api/v1/leads/?pipeline_stage=1",
+    "/api/v1/leads/?status=0&search=acme",
+    "/api/v1/leads/?status=0&count=none&page=50",
+    "/api/v1/leads/by-company/1",
+    "/api/v1/pre-leads/?status=0",
+    "/api/v1/pre-leads/?assigned_to=1",
+    "/api/v1/pre-leads/?source=website",
+    "/api/v1/pre-leads/?status=0&search=acme",
+    "/api/v1/customers/",
+    "/api/v1/customers/?status=active",
+    "/api/v1/customers/?account_manager=1",
+    "/api/v1/customers/?search=acme",
+    "/api/v1/activities/",
+    "/api/v1/activities/?lead_id=1",
+    "/api/v1/activities/?customer_id=1",
+    "/api/v1/activities/?performed_by=1",
+    "/api/v1/activities/pending",
+    "/api/v1/activities/overdue",
+    "/api/v1/leads/all-contacts?search=acme",
+]
+
+
+def find_seq_scans(plan: dict):
+    """Yield every Seq Scan node in an EXPLAIN (FORMAT JSON) plan tree"""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from find_seq_scans(child)
+
+
+@pytest.fixture(scope="module")
+def client():
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def headers():
+    db = SessionLocal()
+    try:
+        admin = db.query(User).filter(User.role == "admin", User.is_active == True).first()
+    finally:
+        db.close()
+    if not admin:
+        pytest.fail("No active admin user to run the endpoints as")
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(admin.id)})}"}
+
+
+@pytest.fixture(scope="module")
+def table_rows():
+    with engine.connect() as conn:
+        return dict(conn.execute(text(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r'"
+        )).all())
+
+
+@pytest.mark.parametrize("path", LIST_REQUESTS)
+def test_list_endpoint_uses_indexes(path, client, headers, table_rows):
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    # A failing endpoint would otherwise pass without checking anything
+    assert response.status_code == 200, f"{path}: HTTP {response.status_code} {response.text[:200]}"
+    assert captured, f"{path}: no SELECT statements captured"
+
+    seq_scans = []
+    with engine.connect() as conn:
+        for statement, parameters in captured:
+            plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()[0]["Plan"]
+            for node in find_seq_scans(plan):
+                rows = table_rows.get(node["Relation Name"], 0)
+                if rows > MIN_ROWS:
+                    seq_scans.append(
+                        f"Seq Scan on {node['Relation Name']} (~{rows} rows) filter: {node.get('Filter', '-')}"
+                    )
+    assert not seq_scans, f"{path}: " + "; ".join(seq_scans)
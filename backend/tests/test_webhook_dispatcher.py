@@ -0,0 +1,28 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.models.webhook import WebhookIdempotencyKey
+from app.services.webhook_dispatcher import PRUNE_INTERVAL_SECONDS, WebhookDispatcher
+
+
+def test_prune_deletes_idempotency_keys_past_retention(db):
+    now = datetime.now(timezone.utc)
+    retention = timedelta(days=settings.WEBHOOK_IDEMPOTENCY_RETENTION_DAYS)
+    db.add_all([
+        WebhookIdempotencyKey(idempotency_key="expired", event="new_inquiry",
+                              created_at=now - retention - timedelta(hours=1)),
+        WebhookIdempotencyKey(idempotency_key="recent", event="new_inquiry",
+                              created_at=now - retention + timedelta(hours=1)),
+    ])
+    db.commit()
+
+    dispatcher = WebhookDispatcher(workers=1, batch_size=10, poll_seconds=1,
+                                   max_concurrency=1, per_endpoint_concurrency=1)
+    dispatcher._last_prune = time.monotonic() - PRUNE_INTERVAL_SECONDS
+    asyncio.run(dispatcher._maybe_prune())
+
+    db.expire_all()
+    keys = [row.idempotency_key for row in db.query(WebhookIdempotencyKey)]
+    assert keys == ["recent"]
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.models.webhook import WebhookLog
+from app.services import webhook_log_writer as writer_module
+from app.services.webhook_log_writer import WebhookLogWriter, webhook_log_writer
+
+
+def _row(**overrides):
+    row = {key: None for key in writer_module._LOG_COLUMNS}
+    row.update(
+        direction="incoming",
+        method="POST",
+        is_successful=True,
+        retry_count=0,
+        created_at=datetime.now(timezone.utc),
+        request_payload={"event": "new_inquiry"},
+    )
+    row.update(overrides)
+    return row
+
+
+def test_incoming_webhook_with_timestamp_is_logged(db):
+    written, dropped = webhook_log_writer.written, webhook_log_writer.dropped
+    with TestClient(main.app) as client:
+        for index in range(3):
+            payload = {"event": "new_inquiry", "data": {"first_name": f"Lead {index}"}}
+            if index == 0:
+                payload["timestamp"] = "2026-01-01T00:00:00Z"
+            response = client.post("/api/v1/webhooks/incoming/pre-lead/create", json=payload)
+            assert response.status_code == 200, response.text
+    # Leaving the client stops the writer, which drains the queue
+
+    assert webhook_log_writer.written - written == 3
+    assert webhook_log_writer.dropped == dropped
+    payloads = [log.request_payload for log in db.query(WebhookLog).order_by(WebhookLog.id)]
+    assert payloads[0]["timestamp"].startswith("2026-01-01T00:00:00")
+
+
+@pytest.mark.anyio
+async def test_failed_batch_falls_back_to_single_rows(monkeypatch, db):
+    monkeypatch.setattr(writer_module, "FLUSH_RETRIES", 1)
+    writer = WebhookLogWriter(buffered=True, queue_size=10, batch_size=10,
+                              flush_interval_seconds=1, enqueue_timeout_seconds=1)
+    bad = _row(request_payload={"timestamp": datetime.now(timezone.utc)})  # not JSON serializable
+
+    await writer._write([_row(), bad, _row()])
+
+    assert (writer.written, writer.dropped, writer.flush_failures) == (2, 1, 1)
+    assert db.query(WebhookLog).count() == 2
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_concurrent_adds_respect_queue_size():
+    from app.core.database import AsyncSessionLocal
+
+    writer = WebhookLogWriter(buffered=True, queue_size=5, batch_size=100,
+                              flush_interval_seconds=60, enqueue_timeout_seconds=0.1)
+    async def request(index: int) -> None:
+        async with AsyncSessionLocal() as session:
+            log = WebhookLog(direction="incoming", request_payload={"index": index})
+            await writer.add(session, log)
+            await asyncio.sleep(0.01)  # every request passes the room check before any commits
+            # What the after_commit hook does for the module's writer
+            pending = session.info.pop(writer_module._PENDING_LOGS, None)
+            if pending:
+                writer.enqueue_committed(pending)
+
+    # A running writer whose flush task never drains the queue
+    writer._loop = asyncio.get_running_loop()
+    writer._wake = asyncio.Event()
+    writer._task = asyncio.create_task(asyncio.sleep(3600))
+    try:
+        await asyncio.gather(*(request(index) for index in range(12)))
+    finally:
+        writer._task.cancel()
+
+    assert len(writer._queue) == 5
+    assert writer._reserved == 0
+    assert writer.fallbacks == 7